@@ -0,0 +1,283 @@
+"""Read audio duration and format from WAV/MP3 headers, and join MP3 files, without decoding."""
+import os
+import struct
+from collections import namedtuple
+
+AudioInfo = namedtuple('AudioInfo', ['duration', 'sample_rate', 'channels'])
+
+# MPEG audio frame header tables, indexed by the header's bit fields
+_MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+_MPEG_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+_MPEG_BITRATES = {  # kbit/s for (version 1 or 2/2.5, layer)
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# How far past the ID3 tag to look for the first MPEG frame
+_MP3_SYNC_SEARCH_BYTES = 64 * 1024
+# How much of each file join_mp3() reads at a time
+_MP3_JOIN_BLOCK_BYTES = 64 * 1024
+
+
+def probe_audio(path):
+    """Return AudioInfo(duration, sample_rate, channels) for a WAV or MP3 file.
+
+    Only headers are read, so the cost does not depend on the audio length.
+    Raises ValueError for formats it cannot recognise.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        f.seek(0)
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return _probe_wav(f, file_size)
+        return _probe_mp3(f, file_size)
+
+
+def audio_duration(path):
+    """Duration of an audio file in seconds, or None if its headers cannot be read."""
+    try:
+        return probe_audio(path).duration
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Could not read duration of {path}: {e}")
+        return None
+
+
+def _probe_wav(f, file_size):
+    f.seek(12)
+    channels = sample_rate = byte_rate = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size + (chunk_size & 1))
+            _, channels, sample_rate, byte_rate = struct.unpack('<HHII', fmt[:12])
+        elif chunk_id == b'data':
+            if not byte_rate:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streamed WAVs often leave the size as 0 or 0xFFFFFFFF
+            remaining = file_size - f.tell()
+            if chunk_size == 0 or chunk_size > remaining:
+                chunk_size = remaining
+            return AudioInfo(chunk_size / byte_rate, sample_rate, channels)
+        else:
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _skip_id3v2(f):
+    """Position f after a leading ID3v2 tag and return the offset."""
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset = size + (20 if header[5] & 0x10 else 10)
+    else:
+        offset = 0
+    f.seek(offset)
+    return offset
+
+
+def _parse_frame_header(header):
+    """Decode a 4-byte MPEG audio frame header, or return None if it is not one."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = _MPEG_VERSIONS.get((header[1] >> 3) & 0x03)
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version is None or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate_index]
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 2 or version == 1:
+        samples_per_frame = 1152
+    else:
+        samples_per_frame = 576
+    channels = 1 if (header[3] >> 6) == 3 else 2
+    return version, layer, bitrate, sample_rate, samples_per_frame, channels
+
+
+def _frame_length(header, frame):
+    """Length in bytes of the MPEG audio frame whose header was decoded into frame."""
+    version, layer, bitrate, sample_rate = frame[:4]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and version != 1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def _side_info_size(version, channels):
+    """Bytes between a Layer III frame header and where a Xing/Info tag starts."""
+    if version == 1:
+        return 17 if channels == 1 else 32
+    return 9 if channels == 1 else 17
+
+
+def _probe_mp3(f, file_size):
+    start = _skip_id3v2(f)
+    data = f.read(_MP3_SYNC_SEARCH_BYTES)
+
+    # Find the first valid frame header
+    position = data.find(b'\xff')
+    frame = None
+    while position != -1 and position + 4 <= len(data):
+        frame = _parse_frame_header(data[position:position + 4])
+        if frame:
+            break
+        position = data.find(b'\xff', position + 1)
+    if not frame:
+        raise ValueError("No MPEG audio frame found")
+
+    version, layer, bitrate, sample_rate, samples_per_frame, channels = frame
+    frame_start = start + position
+
+    # VBR files carry a frame count in a Xing/Info or VBRI header in the first frame
+    if layer == 3:
+        side_info = _side_info_size(version, channels)
+        xing = data[position + 4 + side_info:position + 4 + side_info + 12]
+        if xing[:4] in (b'Xing', b'Info') and struct.unpack('>I', xing[4:8])[0] & 0x01:
+            frames = struct.unpack('>I', xing[8:12])[0]
+            return AudioInfo(frames * samples_per_frame / sample_rate, sample_rate, channels)
+        vbri = data[position + 36:position + 54]
+        if vbri[:4] == b'VBRI' and len(vbri) >= 18:
+            frames = struct.unpack('>I', vbri[14:18])[0]
+            return AudioInfo(frames * samples_per_frame / sample_rate, sample_rate, channels)
+
+    # Constant bitrate: audio bytes / byte rate, ignoring a trailing ID3v1 tag
+    audio_bytes = file_size - frame_start
+    if file_size >= 128:
+        f.seek(file_size - 128)
+        if f.read(3) == b'TAG':
+            audio_bytes -= 128
+    return AudioInfo(audio_bytes * 8 / bitrate, sample_rate, channels)
+
+
+def _is_vbr_header_frame(data, position, frame):
+    """True if the frame at position is a Xing/Info or VBRI header rather than audio."""
+    version, layer, _, _, _, channels = frame
+    if layer != 3:
+        return False
+    tag_at = position + 4 + _side_info_size(version, channels)
+    return data[tag_at:tag_at + 4] in (b'Xing', b'Info') or data[position + 36:position + 40] == b'VBRI'
+
+
+def _mp3_audio_blocks(f, block_size):
+    """Yield (data, frames) for an open MP3 file, read block_size bytes at a time.
+
+    frames lists (offset, length, header, frame) for every audio frame that
+    lies whole in data; a frame cut off at the end of a block is carried over
+    into the next one. ID3v2 and ID3v1 tags, a leading Xing/Info/VBRI header
+    frame and any bytes that are not a frame are skipped.
+    """
+    start = _skip_id3v2(f)
+    end = os.fstat(f.fileno()).st_size
+    if end - start >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b'TAG':
+            end -= 128
+    f.seek(start)
+    remaining = end - start
+
+    data = b''
+    first = True
+    while True:
+        block = f.read(min(block_size, remaining))
+        remaining -= len(block)
+        data += block
+        last = not block or remaining <= 0
+        frames = []
+        consumed = len(data)
+        position = data.find(b'\xff')
+        while position != -1:
+            if position + 4 > len(data):
+                if not last:
+                    consumed = position
+                break
+            header = data[position:position + 4]
+            frame = _parse_frame_header(header)
+            length = _frame_length(header, frame) if frame else 0
+            if frame and length >= 4 and position + length > len(data) and not last:
+                consumed = position  # the rest of the frame is in the next block
+                break
+            if not frame or length < 4 or position + length > len(data):
+                # Not a frame (or a truncated one); resynchronise on the next sync byte
+                position = data.find(b'\xff', position + 1)
+                continue
+            if not (first and _is_vbr_header_frame(data, position, frame)):
+                frames.append((position, length, header, frame))
+            first = False
+            position += length
+        if frames:
+            yield data, frames
+        if last:
+            return
+        data = data[consumed:]
+
+
+def _info_frame(header, frame, frame_count, byte_count, tag):
+    """A silent Layer III frame carrying a Xing/Info tag with frame and byte counts, or None."""
+    version, layer, _, _, _, channels = frame
+    header = bytes([header[0], header[1], header[2] & ~0x02, header[3]])  # no padding
+    length = _frame_length(header, frame)
+    tag_at = 4 + _side_info_size(version, channels)
+    if layer != 3 or length < tag_at + 16:
+        return None
+    info = bytearray(length)
+    info[:4] = header
+    # Flags 0x03: the frame and byte counts follow; the byte count includes this frame
+    info[tag_at:tag_at + 16] = tag + struct.pack('>III', 0x03, frame_count, byte_count + length)
+    return bytes(info)
+
+
+def join_mp3(dest, source_paths):
+    """Write the MP3 files at source_paths into the binary file dest as one stream.
+
+    Only the audio frames of each file are copied, so no tag or VBR header ends
+    up in the middle of the stream, and the output starts with a new Xing/Info
+    frame counting every frame so players and probe_audio() see the full
+    length. Files are read in blocks of _MP3_JOIN_BLOCK_BYTES, so memory use
+    does not grow with the audio length.
+    """
+    header_at = dest.tell()
+    placeholder = None
+    frame_count = byte_count = 0
+    bitrates = set()
+    for path in source_paths:
+        with open(path, 'rb') as f:
+            for data, frames in _mp3_audio_blocks(f, _MP3_JOIN_BLOCK_BYTES):
+                data = memoryview(data)
+                run_start = run_end = None
+                for offset, length, header, frame in frames:
+                    if placeholder is None:
+                        first_header, first_frame = header, frame
+                        placeholder = _info_frame(header, frame, 0, 0, b'Info') or b''
+                        dest.write(placeholder)
+                    if offset != run_end:
+                        if run_start is not None:
+                            dest.write(data[run_start:run_end])
+                        run_start = offset
+                    run_end = offset + length
+                    frame_count += 1
+                    byte_count += length
+                    bitrates.add(frame[2])
+                dest.write(data[run_start:run_end])
+
+    if placeholder:
+        end = dest.tell()
+        dest.seek(header_at)
+        dest.write(_info_frame(first_header, first_frame, frame_count, byte_count,
+                               b'Info' if len(bitrates) == 1 else b'Xing'))
+        dest.seek(end)
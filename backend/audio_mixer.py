@@ -0,0 +1,159 @@
+"""In-process mixing of timed speech segments into a single track."""
+import wave
+
+import numpy as np
+
+from audio_metadata import audio_duration
+from ffmpeg_pool import ffmpeg_pool
+
+# Sample widths supported when reading PCM WAV data directly
+_PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def _pcm_to_float(data, sample_width, channels):
+    """Convert interleaved PCM bytes to mono float32 samples in [-1, 1]."""
+    samples = np.frombuffer(data, dtype=_PCM_DTYPES[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(2 ** (8 * sample_width - 1))
+    if channels > 1:
+        usable = len(samples) - len(samples) % channels
+        samples = samples[:usable].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def _resample(samples, from_rate, to_rate):
+    """Linear-interpolation resampling; speech segments only need to line up."""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    target_length = int(round(len(samples) * to_rate / from_rate))
+    positions = np.linspace(0, len(samples) - 1, target_length)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode_segment(path, sample_rate=None):
+    """Decode an audio file once into mono float32 samples.
+
+    PCM WAV files are read directly; anything else is decoded through a single
+    ffmpeg pipe. Returns (samples, sample_rate). When sample_rate is given the
+    samples are converted to it.
+    """
+    try:
+        with wave.open(path, 'rb') as wav:
+            if wav.getcomptype() == 'NONE' and wav.getsampwidth() in _PCM_DTYPES:
+                rate = wav.getframerate()
+                samples = _pcm_to_float(wav.readframes(wav.getnframes()), wav.getsampwidth(), wav.getnchannels())
+                if len(samples):
+                    return _resample(samples, rate, sample_rate or rate), sample_rate or rate
+    except (wave.Error, EOFError):
+        pass
+
+    # Not plain PCM WAV (or a streamed header without a frame count)
+    rate = sample_rate or 44100
+    result = ffmpeg_pool.run(
+        ['-v', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(rate), '-'],
+        label='decode segment'
+    )
+    return _pcm_to_float(result.stdout, 2, 1), rate
+
+
+def _float_to_pcm(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+
+
+def write_wav(path, samples, sample_rate):
+    """Write mono float32 samples as 16-bit PCM WAV."""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(_float_to_pcm(samples))
+
+
+def _load_segment(segment, sample_rate, fit_segment):
+    """Decode a segment, first swapping in its fitted copy if fit_segment asks for one."""
+    source = segment['file']
+    if fit_segment:
+        duration = audio_duration(source)
+        if duration is None:
+            # Unreadable header: decode first and measure the samples instead
+            samples, rate = decode_segment(source, sample_rate)
+            fitted_file = fit_segment(segment, len(samples) / rate)
+            if not fitted_file:
+                return samples, rate
+            source = fitted_file
+        else:
+            source = fit_segment(segment, duration) or source
+    return decode_segment(source, sample_rate)
+
+
+def render_timeline(audio_segments, total_duration, output_file, fit_segment=None, block_seconds=30):
+    """Mix timed segments into one WAV track, streaming it out block by block.
+
+    Segments are visited in start order and decoded once, just before the
+    block where they begin; a segment is dropped as soon as the output passes
+    its end. Memory therefore depends on the block size and on how many
+    segments overlap, not on the track length or segment count, and no file
+    stays open between blocks. Work grows linearly with segments and duration.
+
+    If fit_segment is given it is called as fit_segment(segment, duration),
+    with the duration read from the file header, and may return the path of a
+    replacement file (e.g. a sped-up copy) that is decoded instead. The track
+    is cut at total_duration, or ends with the last segment if that comes
+    first. Returns the track duration in seconds.
+    """
+    ordered = sorted(audio_segments, key=lambda segment: segment['start_time'])
+    if not ordered:
+        raise ValueError("No audio segments to mix")
+
+    # The first segment fixes the output rate for the whole track
+    first_samples, sample_rate = _load_segment(ordered[0], None, fit_segment)
+    track_length = int(total_duration * sample_rate)
+    block_length = max(1, int(block_seconds * sample_rate))
+
+    active = []  # (offset, samples) of decoded segments still being played
+    next_index = 0
+    written = 0
+    end = 0
+
+    with wave.open(output_file, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+
+        while written < track_length:
+            block_end = min(written + block_length, track_length)
+
+            # Decode every segment that starts before the end of this block
+            while next_index < len(ordered):
+                segment = ordered[next_index]
+                offset = int(round(segment['start_time'] * sample_rate))
+                if offset >= block_end:
+                    break
+                if next_index == 0:
+                    samples = first_samples
+                else:
+                    samples, _ = _load_segment(segment, sample_rate, fit_segment)
+                active.append((offset, samples))
+                end = max(end, min(offset + len(samples), track_length))
+                next_index += 1
+
+            block = np.zeros(block_end - written, dtype=np.float32)
+            for offset, samples in active:
+                start = max(offset, written)
+                stop = min(offset + len(samples), block_end)
+                if start < stop:
+                    block[start - written:stop - written] += samples[start - offset:stop - offset]
+            active = [(offset, samples) for offset, samples in active if offset + len(samples) > block_end]
+
+            if next_index >= len(ordered) and not active:
+                # Last audible block: stop at the end of the final segment
+                wav.writeframes(_float_to_pcm(block[:max(0, end - written)]))
+                written = max(written, end)
+                break
+
+            wav.writeframes(_float_to_pcm(block))
+            written = block_end
+
+    return written / sample_rate
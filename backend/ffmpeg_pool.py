@@ -0,0 +1,200 @@
+"""Shared runner for ffmpeg processes with a concurrency cap, timeouts and timing."""
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+# Where ffmpeg lived before it was discoverable; still tried as a last resort
+WINDOWS_FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+
+# Encodes are CPU-bound, so by default run at most one per core
+FFMPEG_MAX_CONCURRENCY = int(os.getenv('FFMPEG_MAX_CONCURRENCY', str(os.cpu_count() or 1)))
+# Seconds an ffmpeg process may run before it is killed
+FFMPEG_TIMEOUT = float(os.getenv('FFMPEG_TIMEOUT', '300'))
+# Invocations kept for inspection
+FFMPEG_HISTORY_SIZE = 100
+
+
+def find_ffmpeg():
+    """Locate ffmpeg: $FFMPEG_PATH, then PATH, then the old Windows install location."""
+    configured = os.getenv('FFMPEG_PATH')
+    if configured:
+        return configured
+    found = shutil.which('ffmpeg')
+    if found:
+        return found
+    if os.path.exists(WINDOWS_FFMPEG_PATH):
+        return WINDOWS_FFMPEG_PATH
+    return None
+
+
+class FFmpegPool:
+    """Runs ffmpeg commands, at most max_concurrency at a time.
+
+    Every invocation gets a timeout and is recorded with its queue wait, wall
+    time and CPU time (user + system of the ffmpeg process; POSIX only, None
+    elsewhere).
+    """
+
+    def __init__(self, path=None, max_concurrency=FFMPEG_MAX_CONCURRENCY, timeout=FFMPEG_TIMEOUT):
+        self.path = path or find_ffmpeg()
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.invocations = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.history = deque(maxlen=FFMPEG_HISTORY_SIZE)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def run(self, args, input=None, timeout=None, label='ffmpeg'):
+        """Run ffmpeg with args and return the CompletedProcess (stdout/stderr as bytes).
+
+        Raises subprocess.CalledProcessError on a non-zero exit and
+        subprocess.TimeoutExpired after killing a process that overran.
+        """
+        if not self.path:
+            raise FileNotFoundError("ffmpeg not found; install it or set FFMPEG_PATH")
+        # Never let ffmpeg wait on the terminal (e.g. to confirm overwriting a file)
+        command = [self.path, '-hide_banner'] + (['-nostdin'] if input is None else []) + list(args)
+        timeout = self.timeout if timeout is None else timeout
+
+        queued_at = time.monotonic()
+        with self._slots:
+            started_at = time.monotonic()
+            with self._lock:
+                self._active += 1
+            try:
+                returncode, stdout, stderr, cpu, timed_out = self._execute(command, input, timeout)
+            finally:
+                with self._lock:
+                    self._active -= 1
+        finished_at = time.monotonic()
+
+        self._record(label, started_at - queued_at, finished_at - started_at, cpu, returncode, timed_out)
+        if timed_out:
+            raise subprocess.TimeoutExpired(command, timeout, stdout, stderr)
+        if returncode != 0:
+            print(f"{label} failed with exit code {returncode}: {stderr.decode('utf-8', 'replace').strip()[-500:]}")
+            raise subprocess.CalledProcessError(returncode, command, stdout, stderr)
+        return subprocess.CompletedProcess(command, returncode, stdout, stderr)
+
+    def _execute(self, command, input, timeout):
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        if not hasattr(os, 'wait4'):
+            try:
+                stdout, stderr = process.communicate(input, timeout=timeout)
+                return process.returncode, stdout, stderr, None, False
+            except subprocess.TimeoutExpired:
+                process.kill()
+                stdout, stderr = process.communicate()
+                return process.returncode, stdout, stderr, None, True
+
+        # Reap the process ourselves so its own resource usage can be read
+        outputs = {}
+
+        def drain(name, stream):
+            outputs[name] = stream.read()
+            stream.close()
+
+        def feed():
+            try:
+                process.stdin.write(input)
+            except BrokenPipeError:
+                pass
+            finally:
+                process.stdin.close()
+
+        threads = [
+            threading.Thread(target=drain, args=('stdout', process.stdout), daemon=True),
+            threading.Thread(target=drain, args=('stderr', process.stderr), daemon=True),
+        ]
+        if input is not None:
+            threads.append(threading.Thread(target=feed, daemon=True))
+        for thread in threads:
+            thread.start()
+
+        kill_lock = threading.Lock()
+        reaped = killed = False
+
+        def kill():
+            nonlocal killed
+            # Signal the pid directly: Popen.kill() polls first and could reap the
+            # process itself. Once wait4 has reaped it, the pid may belong to another.
+            with kill_lock:
+                if reaped:
+                    return
+                try:
+                    os.kill(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    return  # reaped between wait4 returning and taking the lock
+                killed = True
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            with kill_lock:
+                reaped = True
+            if timer:
+                timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        for thread in threads:
+            thread.join()
+        cpu = usage.ru_utime + usage.ru_stime
+        # A kill that landed as the process was exiting on its own did not cut it short
+        timed_out = killed and process.returncode == -signal.SIGKILL
+        return process.returncode, outputs.get('stdout', b''), outputs.get('stderr', b''), cpu, timed_out
+
+    def _record(self, label, wait, wall, cpu, returncode, timed_out):
+        with self._lock:
+            self.invocations += 1
+            self.wait_seconds += wait
+            self.wall_seconds += wall
+            if cpu is not None:
+                self.cpu_seconds += cpu
+            if timed_out:
+                self.timeouts += 1
+            elif returncode != 0:
+                self.failures += 1
+            self.history.append({
+                'label': label,
+                'wait_seconds': wait,
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'returncode': returncode,
+                'timed_out': timed_out,
+            })
+        cpu_text = 'n/a' if cpu is None else f"{cpu:.2f}s"
+        print(f"{label}: {wall:.2f}s wall, {cpu_text} CPU, waited {wait:.2f}s for a slot")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'max_concurrency': self.max_concurrency,
+                'active': self._active,
+                'invocations': self.invocations,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'wall_seconds': self.wall_seconds,
+                'cpu_seconds': self.cpu_seconds,
+                'wait_seconds': self.wait_seconds,
+            }
+
+
+ffmpeg_pool = FFmpegPool()
@@ -0,0 +1,111 @@
+"""One pooled HTTP client per process, shared by all upstream traffic.
+
+Every request to YouTube, Murf and Google Translate reuses kept-alive
+connections from the same pools instead of paying a fresh TCP and TLS
+handshake. requests-based traffic goes through http_session; the Murf SDK
+(built on httpx) uses httpx_client, which can speak HTTP/2.
+"""
+import os
+
+import httpx
+import requests
+from bs4 import BeautifulSoup
+from deep_translator import GoogleTranslator
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from deep_translator.validate import is_empty, is_input_valid
+from requests.adapters import HTTPAdapter
+from youtube_transcript_api._transcripts import TranscriptListFetcher
+
+# Kept-alive connections per upstream host; further requests wait for a free one
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '10'))
+# Distinct hosts whose pools are kept open at the same time
+HTTP_MAX_HOSTS = int(os.getenv('HTTP_MAX_HOSTS', '20'))
+# Default (connect, read) timeouts in seconds for requests that do not set their own
+HTTP_TIMEOUT = (float(os.getenv('HTTP_CONNECT_TIMEOUT', '10')), float(os.getenv('HTTP_READ_TIMEOUT', '60')))
+# Negotiate HTTP/2 on the httpx client; needs the optional h2 package
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+
+class PooledSession(requests.Session):
+    """requests.Session with bounded per-host keep-alive pools and a default timeout."""
+
+    def __init__(self, max_connections_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                 max_hosts=HTTP_MAX_HOSTS, timeout=HTTP_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        # pool_block makes callers wait for a pooled connection instead of opening throwaway ones
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host, pool_block=True)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def _http2_available():
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+        return False
+
+
+http_session = PooledSession()
+
+# httpx only limits its pool as a whole, so size it for every host at the per-host limit
+HTTPX_MAX_CONNECTIONS = HTTP_MAX_CONNECTIONS_PER_HOST * HTTP_MAX_HOSTS
+
+httpx_client = httpx.Client(
+    http2=_http2_available(),
+    limits=httpx.Limits(max_connections=HTTPX_MAX_CONNECTIONS, max_keepalive_connections=HTTPX_MAX_CONNECTIONS),
+    timeout=httpx.Timeout(HTTP_TIMEOUT[1], connect=HTTP_TIMEOUT[0]),
+    follow_redirects=True,
+)
+
+
+def list_youtube_transcripts(video_id):
+    """YouTubeTranscriptApi.list_transcripts, but over the shared session.
+
+    The library opens a new session per call and has no public way to pass
+    one in; its private fetcher accepts any session. youtube-transcript-api is
+    pinned for this, and tests/test_http_client.py checks the fetcher.
+    """
+    return TranscriptListFetcher(http_session).fetch(video_id)
+
+
+class PooledGoogleTranslator(GoogleTranslator):
+    """GoogleTranslator that sends its requests over the shared session.
+
+    The stock translate() opens a new connection per call and keeps its query
+    in shared state; this one builds the query per call, so one instance can
+    be used from several threads. It mirrors deep-translator's own translate(),
+    including private attributes, so deep-translator is pinned and
+    tests/test_http_client.py compares the two.
+    """
+
+    def translate(self, text, **kwargs):
+        if not is_input_valid(text):
+            return text
+        text = text.strip()
+        if self._same_source_target() or is_empty(text):
+            return text
+
+        params = dict(self._url_params, tl=self._target, sl=self._source)
+        params[self.payload_key] = text
+        response = http_session.get(self._base_url, params=params, proxies=self.proxies)
+        if response.status_code == 429:
+            raise TooManyRequests()
+        if response.status_code != 200:
+            raise RequestError()
+
+        soup = BeautifulSoup(response.text, 'html.parser')
+        element = (soup.find(self._element_tag, self._element_query)
+                   or soup.find(self._element_tag, self._alt_element_query))
+        if not element:
+            raise TranslationNotFound(text)
+        return element.get_text(strip=True)
@@ -0,0 +1,202 @@
+"""Background job queue for long-running dubbing pipelines."""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+# Number of pipelines that may run at the same time
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+
+# How long finished jobs stay queryable before they are forgotten
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT_SECONDS = 15
+
+job_seconds = metrics.histogram(
+    'dubbing_job_seconds', 'Wall time of dubbing jobs from start to finish.', ['status'])
+
+
+class Job:
+    """State and progress events of a single queued pipeline run."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'queued'  # queued, running, completed, failed
+        self.stage = 'queued'
+        self.progress = 0.0
+        self.message = 'Waiting for a free worker'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events = []
+        self.pieces = []  # progressively published audio, in playback order
+        self._condition = threading.Condition()
+        with self._condition:
+            self._record_event()
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self):
+        return {
+            'jobId': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'pieceCount': len(self.pieces),
+            'createdAt': self.created_at,
+            'updatedAt': self.updated_at,
+        }
+
+    def _record_event(self):
+        """Append the current state to the event log and wake up listeners."""
+        self.updated_at = time.time()
+        self.events.append(self.to_dict())
+        self._condition.notify_all()
+
+    def update(self, stage=None, progress=None, message=None):
+        """Report that the pipeline moved to a new stage or made progress."""
+        with self._condition:
+            if self.status == 'queued':
+                self.status = 'running'
+            if stage is not None:
+                self.stage = stage
+            if progress is not None:
+                self.progress = max(0.0, min(float(progress), 1.0))
+            if message is not None:
+                self.message = message
+            self._record_event()
+        print(f"Job {self.id}: [{self.stage}] {self.message}")
+
+    def add_piece(self, url, start, duration):
+        """Publish the next finished piece of output for progressive playback."""
+        with self._condition:
+            self.pieces.append({
+                'index': len(self.pieces),
+                'url': url,
+                'start': start,
+                'duration': duration,
+            })
+            self.message = f"Piece {len(self.pieces)} ready"
+            self._record_event()
+
+    def complete(self, result):
+        with self._condition:
+            self.status = 'completed'
+            self.stage = 'completed'
+            self.progress = 1.0
+            self.message = 'Done'
+            self.result = result
+            self._record_event()
+
+    def fail(self, error):
+        with self._condition:
+            self.status = 'failed'
+            self.stage = 'failed'
+            self.message = 'Failed'
+            self.error = error
+            self._record_event()
+
+    def wait_for_events(self, since, timeout=None):
+        """Return events recorded after index `since`, blocking up to `timeout` seconds."""
+        with self._condition:
+            if len(self.events) <= since and not self.finished:
+                self._condition.wait(timeout)
+            return self.events[since:]
+
+
+class JobQueue:
+    """Run pipeline functions on a bounded worker pool and track their jobs."""
+
+    def __init__(self, max_workers=JOB_WORKERS, retention_seconds=JOB_RETENTION_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dub-job')
+        self._retention_seconds = retention_seconds
+        self._jobs = {}
+        self._in_flight = {}  # dedupe key -> unfinished Job
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, dedupe_key=None, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return its Job right away.
+
+        If an unfinished job was submitted with the same dedupe_key, that job is
+        returned instead of starting a second identical pipeline.
+        """
+        with self._lock:
+            if dedupe_key is not None:
+                running = self._in_flight.get(dedupe_key)
+                if running and not running.finished:
+                    print(f"Attaching request to in-flight job {running.id}")
+                    return running
+            self._prune()
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            if dedupe_key is not None:
+                self._in_flight[dedupe_key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs, dedupe_key)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status_counts(self):
+        """Number of known jobs per status, as {(status,): count}."""
+        counts = {(status,): 0 for status in ('queued', 'running', 'completed', 'failed')}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[(job.status,)] += 1
+        return counts
+
+    def _run(self, job, fn, args, kwargs, dedupe_key=None):
+        job.update(stage='starting', message='Job started')
+        started = time.monotonic()
+        try:
+            result, error = fn(job, *args, **kwargs), None
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            result, error = None, str(e)
+        job_seconds.observe(time.monotonic() - started, status='completed' if error is None else 'failed')
+
+        # Stop attaching new requests before listeners see the final state
+        if dedupe_key is not None:
+            with self._lock:
+                if self._in_flight.get(dedupe_key) is job:
+                    del self._in_flight[dedupe_key]
+        if error is None:
+            job.complete(result)
+        else:
+            job.fail(error)
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window."""
+        cutoff = time.time() - self._retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def stream_events(job, heartbeat=SSE_HEARTBEAT_SECONDS):
+    """Yield the job's progress as server-sent events until it finishes."""
+    sent = 0
+    while True:
+        events = job.wait_for_events(sent, timeout=heartbeat)
+        if not events:
+            # Comment line keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+            continue
+        for event in events:
+            yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+        sent += len(events)
+        if events[-1]['status'] in ('completed', 'failed'):
+            return
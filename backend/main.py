@@ -1,16 +1,48 @@
-from youtube_transcript_api import YouTubeTranscriptApi
 from murf import Murf
-from deep_translator import GoogleTranslator
 import re
 import yt_dlp
-import subprocess
 import os
+import copy
 import glob
 import json
 import math
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tts_cache import tts_cache
+from translation_cache import translation_cache
+from transcript_cache import transcript_cache
+from transcript_window import select_transcript_window
+from video_info import extract_video_info, fetch_subtitle_segments, video_info_cache
+from text_chunking import CHUNK_BUDGETS, chunk_text
+from audio_mixer import render_timeline
+from audio_metadata import audio_duration
+from ffmpeg_pool import ffmpeg_pool
+from metrics import characters_total, upstream_request, upstream_retries_total
+from rate_limit import rate_limiter, retry_after_seconds, is_youtube_throttling_error
+from http_client import httpx_client, list_youtube_transcripts, PooledGoogleTranslator
 
-# Use the full path to FFmpeg since it's installed in C:\ffmpeg\bin
-FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+# Process-wide caps on concurrent requests per provider when groups run in parallel
+TRANSLATE_MAX_CONCURRENCY = int(os.getenv('TRANSLATE_MAX_CONCURRENCY', '4'))
+TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', '4'))
+translate_slots = threading.BoundedSemaphore(TRANSLATE_MAX_CONCURRENCY)
+tts_slots = threading.BoundedSemaphore(TTS_MAX_CONCURRENCY)
+
+# Segments may overrun their slot by this fraction before they are sped up
+SEGMENT_OVERFLOW_TOLERANCE = 0.05
+# Speeding speech up further than this hurts intelligibility more than overlap does
+MAX_SEGMENT_SPEEDUP = 2.0
+
+# Requests to YouTube share one adaptive rate limit
+youtube_limiter = rate_limiter('www.youtube.com')
+# Tries per transcript API call while YouTube is throttling us
+YOUTUBE_MAX_ATTEMPTS = 3
+
+# Size budgets for packing many transcript lines into one translation request
+GOOGLE_TRANSLATE_BATCH_CHARS = CHUNK_BUDGETS['google_translate'][0]
+MURF_TRANSLATE_BATCH_CHARS = CHUNK_BUDGETS['murf_translate'][0]
+MURF_TRANSLATE_BATCH_TEXTS = 10
 
 def get_video_id(url):
     # Extract video ID from YouTube URL
@@ -20,76 +52,70 @@ def get_video_id(url):
     return None
 
 def get_transcript_via_ytdlp(video_url):
-    """Alternative method to get transcript using yt-dlp"""
+    """Alternative method to get timed transcript segments from the subtitles yt-dlp lists"""
     print("Trying to extract transcript using yt-dlp...")
     
-    ydl_opts = {
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'subtitleslangs': ['en', 'en-US', 'en-GB'],
-        'subtitlesformat': 'vtt',
-        'skip_download': True,
-        'outtmpl': 'subtitle_temp'
-    }
-    
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
-            
-            # Check if subtitles are available
-            if 'subtitles' in info or 'automatic_captions' in info:
-                print("Subtitles found, downloading...")
-                ydl.download([video_url])
-                
-                # Look for downloaded subtitle files
-                import glob
-                subtitle_files = glob.glob('subtitle_temp*.vtt')
-                
-                if subtitle_files:
-                    subtitle_file = subtitle_files[0]
-                    print(f"Reading subtitle file: {subtitle_file}")
-                    
-                    # Parse VTT file and extract text
-                    with open(subtitle_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Simple VTT parser - extract text lines
-                    lines = content.split('\n')
-                    text_lines = []
-                    for line in lines:
-                        line = line.strip()
-                        # Skip VTT headers, timestamps, and empty lines
-                        if (line and 
-                            not line.startswith('WEBVTT') and 
-                            not line.startswith('NOTE') and
-                            '-->' not in line and
-                            not line.startswith('<')):
-                            text_lines.append(line)
-                    
-                    # Clean up subtitle file
-                    try:
-                        for file in subtitle_files:
-                            os.remove(file)
-                    except:
-                        pass
-                    
-                    transcript = ' '.join(text_lines)
-                    if transcript.strip():
-                        return transcript
-                    
-            print("No subtitles found via yt-dlp")
+        video_id = get_video_id(video_url)
+        if not video_id:
+            print("Invalid YouTube URL")
             return None
+        
+        # The subtitle track is read straight from its URL in the info dict
+        info = extract_video_info(video_id)
+        language, segments = fetch_subtitle_segments(info)
+        if segments:
+            print(f"Read {language} subtitles with {len(segments)} segments")
+            return segments
+            
+        print("No subtitles found via yt-dlp")
+        return None
             
     except Exception as e:
         print(f"Error extracting subtitles via yt-dlp: {e}")
         return None
 
 def get_transcript(video_id, language_code='en'):
+    """Get timed transcript segments and their combined text, reusing recent fetches"""
+    cached = transcript_cache.get(video_id)
+    if cached and cached['segments']:
+        print(f"Using cached transcript for video ID: {video_id}")
+        return cached['segments'], cached['text']
+    
+    transcript_data, full_text, source_language = fetch_transcript(video_id, language_code)
+    if transcript_data:
+        transcript_cache.put(video_id, transcript_data, source_language, full_text)
+    return transcript_data, full_text
+
+def youtube_call(fn, *args):
+    """Call the transcript API through the shared limiter, backing off and retrying while throttled"""
+    for attempt in range(1, YOUTUBE_MAX_ATTEMPTS + 1):
+        youtube_limiter.acquire()
+        try:
+            with upstream_request('youtube_transcript'):
+                result = fn(*args)
+        except Exception as e:
+            if not is_youtube_throttling_error(e):
+                raise
+            # The limiter slows down and pauses every caller before the next try
+            youtube_limiter.record_throttled(retry_after_seconds(e))
+            if attempt == YOUTUBE_MAX_ATTEMPTS:
+                raise
+            upstream_retries_total.inc(service='youtube_transcript')
+            continue
+        youtube_limiter.record_success()
+        return result
+
+def fetch_transcript(video_id, language_code='en'):
+    """Fetch a transcript from YouTube, falling back to yt-dlp subtitles
+
+    Returns (transcript_data, full_text, source_language), or Nones on failure.
+    """
     print(f"Attempting to get transcript for video ID: {video_id}")
     try:
         # First, let's check what transcripts are available
         print("Checking available transcripts...")
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        transcript_list = youtube_call(list_youtube_transcripts, video_id)
         
         available_transcripts = []
         for transcript in transcript_list:
@@ -107,11 +133,13 @@ def get_transcript(video_id, language_code='en'):
         # Try different language codes in order of preference
         language_preferences = ['en', 'en-US', 'en-GB', language_code]
         transcript_data = None
+        source_language = None
         
         for lang in language_preferences:
             try:
                 print(f"Trying to get {lang} transcript...")
-                transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=[lang])
+                transcript_data = youtube_call(transcript_list.find_transcript([lang]).fetch)
+                source_language = lang
                 print(f"Found {lang} transcript")
                 break
             except Exception as e:
@@ -125,51 +153,39 @@ def get_transcript(video_id, language_code='en'):
                 # Get the first available transcript
                 if available_transcripts:
                     first_transcript = available_transcripts[0]
-                    transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=[first_transcript['language_code']])
+                    transcript = transcript_list.find_transcript([first_transcript['language_code']])
+                    transcript_data = youtube_call(transcript.fetch)
+                    source_language = first_transcript['language_code']
                     print(f"Got transcript in {first_transcript['language']}")
                 else:
                     print("No transcripts available for this video")
-                    return None, None
+                    return None, None, None
             except Exception as e:
                 print(f"Failed to get any transcript: {e}")
-                return None, None
+                return None, None, None
         
         if transcript_data is None:
             print("Could not retrieve transcript data")
-            return None, None
+            return None, None, None
         
         # Return both the raw transcript data (with timestamps) and the combined text
         full_text = ' '.join([entry['text'] for entry in transcript_data])
         print(f"Successfully retrieved transcript with {len(transcript_data)} segments")
-        return transcript_data, full_text
+        return transcript_data, full_text, source_language
         
     except Exception as e:
         print(f"Error accessing transcript: {e}")
         # Fallback to yt-dlp method
         print("Trying yt-dlp fallback method...")
         video_url = f"https://www.youtube.com/watch?v={video_id}"
-        subtitle_text = get_transcript_via_ytdlp(video_url)
+        transcript_data = get_transcript_via_ytdlp(video_url)
         
-        if subtitle_text:
-            # Convert subtitle text to transcript format
-            # Split into segments (simplified - just by sentences)
-            sentences = subtitle_text.split('. ')
-            transcript_data = []
-            
-            for i, sentence in enumerate(sentences):
-                if sentence.strip():
-                    transcript_data.append({
-                        'text': sentence.strip() + ('.' if not sentence.endswith('.') else ''),
-                        'start': i * 3.0,  # Approximate timing
-                        'duration': 3.0
-                    })
-            
-            if transcript_data:
-                full_text = ' '.join([entry['text'] for entry in transcript_data])
-                print(f"Successfully retrieved transcript via yt-dlp with {len(transcript_data)} segments")
-                return transcript_data, full_text
+        if transcript_data:
+            full_text = ' '.join([entry['text'] for entry in transcript_data])
+            print(f"Successfully retrieved transcript via yt-dlp with {len(transcript_data)} segments")
+            return transcript_data, full_text, 'en'
         
-        return None, None
+        return None, None, None
 
 def download_video(url, output_path="original_video.mp4"):
     print("Downloading video...")
@@ -178,8 +194,18 @@ def download_video(url, output_path="original_video.mp4"):
         'outtmpl': output_path,
     }
     try:
+        video_id = get_video_id(url)
+        info = video_info_cache.get(video_id) if video_id else None
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            if info is None:
+                ydl.download([url])
+            else:
+                # Reuse the metadata fetched for the subtitles instead of extracting it again
+                try:
+                    ydl.process_ie_result(copy.deepcopy(info), download=True)
+                except yt_dlp.utils.DownloadError as e:
+                    print(f"Could not download from the cached video info ({e}), extracting again...")
+                    ydl.download([url])
         return output_path
     except Exception as e:
         print(f"Error downloading video: {e}")
@@ -190,7 +216,6 @@ def combine_video_audio(video_path, audio_path, output_path="final_video.mp4"):
     try:
         # Use ffmpeg to combine video and audio
         command = [
-            FFMPEG_PATH,
             '-i', video_path,  # Input video
             '-i', audio_path,  # Input audio
             '-c:v', 'copy',    # Copy video stream without re-encoding
@@ -198,54 +223,20 @@ def combine_video_audio(video_path, audio_path, output_path="final_video.mp4"):
             '-map', '0:v:0',   # Use video from first input
             '-map', '1:a:0',   # Use audio from second input
             '-shortest',       # Match duration to shortest stream
+            '-y',
             output_path
         ]
-        subprocess.run(command, check=True)
+        ffmpeg_pool.run(command, label='combine video and audio')
         return output_path
     except Exception as e:
         print(f"Error combining video and audio: {e}")
         return None
 
-def split_text_into_chunks(text, max_length=2000):
-    """Split text into chunks that are under the character limit"""
-    # Split by sentences first to keep coherent chunks
-    sentences = re.split(r'[.!?]+', text)
-    chunks = []
-    current_chunk = ""
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-            
-        # If adding this sentence would exceed the limit, start a new chunk
-        if len(current_chunk) + len(sentence) + 1 > max_length:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
-            else:
-                # If a single sentence is too long, split it by words
-                words = sentence.split()
-                for word in words:
-                    if len(current_chunk) + len(word) + 1 > max_length:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                            current_chunk = word
-                        else:
-                            # If a single word is too long, just add it as is
-                            chunks.append(word)
-                    else:
-                        current_chunk += " " + word if current_chunk else word
-        else:
-            current_chunk += ". " + sentence if current_chunk else sentence
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
-
 def combine_audio_files(audio_files, output_file="combined_audio.wav"):
-    """Combine multiple audio files into one using ffmpeg"""
+    """Combine multiple audio files into one using ffmpeg
+
+    The concat list is written next to output_file.
+    """
     if len(audio_files) == 1:
         # If only one file, just rename it
         os.rename(audio_files[0], output_file)
@@ -254,21 +245,23 @@ def combine_audio_files(audio_files, output_file="combined_audio.wav"):
     print(f"Combining {len(audio_files)} audio files...")
     try:
         # Create a file list for ffmpeg
-        file_list_path = "audio_files_list.txt"
+        file_list_path = os.path.join(os.path.dirname(output_file), "audio_files_list.txt")
         with open(file_list_path, 'w') as f:
             for audio_file in audio_files:
-                f.write(f"file '{audio_file}'\n")
+                # ffmpeg resolves relative entries against the list's directory
+                escaped_path = os.path.abspath(audio_file).replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
         
         # Use ffmpeg to concatenate audio files
         command = [
-            FFMPEG_PATH,
             '-f', 'concat',
             '-safe', '0',
             '-i', file_list_path,
             '-c', 'copy',
+            '-y',
             output_file
         ]
-        subprocess.run(command, check=True)
+        ffmpeg_pool.run(command, label='concatenate audio')
         
         # Clean up temporary files
         os.remove(file_list_path)
@@ -283,7 +276,7 @@ def combine_audio_files(audio_files, output_file="combined_audio.wav"):
         print(f"Error combining audio files: {e}")
         return None
 
-def group_transcript_segments(transcript_data, max_chars=2500):
+def group_transcript_segments(transcript_data, max_chars=MURF_TRANSLATE_BATCH_CHARS):
     """Group transcript segments to stay within character limits while preserving timing"""
     groups = []
     current_group = {
@@ -341,107 +334,226 @@ def save_transcript_with_timestamps(transcript_data, output_file, is_translated=
         print(f"Error saving transcript: {e}")
         return False
 
-def translate_and_create_timed_audio(transcript_data, target_language="es-ES", voice_id="es-ES-alvaro"):
-    """Translate transcript segments and create audio files with proper timing"""
-    print(f"Using voice_id: {voice_id} for target_language: {target_language}")
-    client = Murf(
-        api_key=os.getenv("MURF_API_KEY")  # Use environment variable or default key
-    )
+def read_transcript_with_timestamps(transcript_file):
+    """Read a file written by save_transcript_with_timestamps, sorted by start time"""
+    segments = []
+    with open(transcript_file, 'r', encoding='utf-8') as f:
+        # Skip header lines
+        next(f)
+        next(f)
+        
+        for line in f:
+            if line.strip():
+                timestamp, text = line.split('\t', 1)
+                # Convert timestamp to seconds
+                minutes, seconds = timestamp.split(':')
+                seconds, milliseconds = seconds.split('.')
+                start_time = int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
+                
+                segments.append({
+                    'start': start_time,
+                    'text': text.strip()
+                })
     
-    # Group transcript segments
-    print("Grouping transcript segments...")
-    groups = group_transcript_segments(transcript_data)
-    print(f"Created {len(groups)} groups from transcript")
+    # Sort segments by start time
+    segments.sort(key=lambda x: x['start'])
+    return segments
+
+def synthesize_speech(client, text, voice_id, output_file):
+    """Stream Murf speech for text into output_file, reusing cached audio when possible"""
+    if tts_cache.fetch(text, voice_id, 'wav', output_file):
+        print(f"Using cached audio for {len(text)} characters")
+        return output_file
+    
+    characters_total.inc(len(text), operation='synthesize', provider='murf')
+    with tts_slots, upstream_request('murf_tts'):
+        res = client.text_to_speech.stream(
+            text=text,
+            voice_id=voice_id
+        )
+        
+        with open(output_file, "wb") as f:
+            for audio_chunk in res:
+                f.write(audio_chunk)
     
+    tts_cache.store(text, voice_id, 'wav', output_file)
+    return output_file
+
+def process_transcript_group(client, i, group, target_language, voice_id, workspace='.'):
+    """Translate one transcript group and synthesize its audio segments.
+
+    Returns (audio_segments, translated_segments) for the group; audio files are
+    written to workspace. Translation and synthesis each hold a slot of their
+    provider's concurrency cap.
+    """
+    print(f"Processing group {i+1} (duration: {group['end_time'] - group['start_time']:.2f}s)...")
     audio_segments = []
     translated_segments = []
     
-    for i, group in enumerate(groups):
-        print(f"Processing group {i+1}/{len(groups)} (duration: {group['end_time'] - group['start_time']:.2f}s)...")
+    try:
+        # Translate the group text
+        print(f"Translating group {i+1}...")
+        def murf_translate(text):
+            characters_total.inc(len(text), operation='translate', provider='murf')
+            with translate_slots, upstream_request('murf_translate'):
+                translation_response = client.text.translate(
+                    target_language=target_language,
+                    texts=[text]
+                )
+            return translation_response.translations[0].translated_text
         
-        try:
-            # Translate the group text
-            print(f"Translating group {i+1}...")
-            translation_response = client.text.translate(
-                target_language=target_language,
-                texts=[group['text']]
-            )
-            
-            translated_text = translation_response.translations[0].translated_text
-            print(f"Translation completed for group {i+1}!")
+        translated_text = translation_cache.translate(group['text'], 'auto', target_language, 'murf', murf_translate)
+        print(f"Translation completed for group {i+1}!")
+        
+        # Store translated text with original timing
+        for segment in group['segments']:
+            segment_copy = segment.copy()
+            segment_copy['translated_text'] = translated_text
+            translated_segments.append(segment_copy)
+        
+        # Check if translated text is still too long
+        chunks = chunk_text(translated_text, 'murf_tts')
+        if len(chunks) > 1:
+            print(f"Translated text is {len(translated_text)} characters, split into {len(chunks)} chunks")
             
-            # Store translated text with original timing
-            for segment in group['segments']:
-                segment_copy = segment.copy()
-                segment_copy['translated_text'] = translated_text
-                translated_segments.append(segment_copy)
+            chunk_duration = (group['end_time'] - group['start_time']) / len(chunks)
             
-            # Check if translated text is still too long
-            if len(translated_text) > 3000:
-                print(f"Translated text is {len(translated_text)} characters, splitting further...")
-                # Split into smaller chunks and handle each
-                chunks = split_text_into_chunks(translated_text, max_length=2500)
+            for j, chunk in enumerate(chunks):
+                chunk_start = group['start_time'] + (j * chunk_duration)
+                chunk_end = group['start_time'] + ((j + 1) * chunk_duration)
                 
-                chunk_duration = (group['end_time'] - group['start_time']) / len(chunks)
-                
-                for j, chunk in enumerate(chunks):
-                    chunk_start = group['start_time'] + (j * chunk_duration)
-                    chunk_end = group['start_time'] + ((j + 1) * chunk_duration)
-                    
-                    # Generate audio for this chunk
-                    res = client.text_to_speech.stream(
-                        text=chunk,
-                        voice_id=voice_id
-                    )
-                    
-                    audio_file = f"audio_segment_{i+1}_{j+1}.wav"
-                    with open(audio_file, "wb") as f:
-                        for audio_chunk in res:
-                            f.write(audio_chunk)
-                    
-                    audio_segments.append({
-                        'file': audio_file,
-                        'start_time': chunk_start,
-                        'end_time': chunk_end,
-                        'duration': chunk_end - chunk_start
-                    })
-                    
-                    print(f"Created audio segment {i+1}.{j+1}: {chunk_start:.2f}s - {chunk_end:.2f}s")
-            else:
-                # Generate audio for the entire group
-                print(f"Converting group {i+1} to speech...")
-                res = client.text_to_speech.stream(
-                    text=translated_text,
-                    voice_id=voice_id
-                )
-                
-                audio_file = f"audio_segment_{i+1}.wav"
-                with open(audio_file, "wb") as f:
-                    for audio_chunk in res:
-                        f.write(audio_chunk)
+                # Generate audio for this chunk
+                audio_file = os.path.join(workspace, f"audio_segment_{i+1}_{j+1}.wav")
+                synthesize_speech(client, chunk, voice_id, audio_file)
                 
                 audio_segments.append({
                     'file': audio_file,
-                    'start_time': group['start_time'],
-                    'end_time': group['end_time'],
-                    'duration': group['end_time'] - group['start_time']
+                    'start_time': chunk_start,
+                    'end_time': chunk_end,
+                    'duration': chunk_end - chunk_start
                 })
                 
-                print(f"Created audio segment {i+1}: {group['start_time']:.2f}s - {group['end_time']:.2f}s")
-                
-        except Exception as e:
-            print(f"Error processing group {i+1}: {e}")
-            # Clean up any created files
-            for segment in audio_segments:
+                print(f"Created audio segment {i+1}.{j+1}: {chunk_start:.2f}s - {chunk_end:.2f}s")
+        else:
+            # Generate audio for the entire group
+            print(f"Converting group {i+1} to speech...")
+            audio_file = os.path.join(workspace, f"audio_segment_{i+1}.wav")
+            synthesize_speech(client, translated_text, voice_id, audio_file)
+            
+            audio_segments.append({
+                'file': audio_file,
+                'start_time': group['start_time'],
+                'end_time': group['end_time'],
+                'duration': group['end_time'] - group['start_time']
+            })
+            
+            print(f"Created audio segment {i+1}: {group['start_time']:.2f}s - {group['end_time']:.2f}s")
+        
+        return audio_segments, translated_segments
+    
+    except Exception:
+        # Clean up any files this group already created
+        for segment in audio_segments:
+            try:
+                os.remove(segment['file'])
+            except:
+                pass
+        raise
+
+def translate_and_create_timed_audio(transcript_data, target_language="es-ES", voice_id="es-ES-alvaro", concurrent=False, max_workers=None,
+                                     start_time=None, end_time=None, workspace='.'):
+    """Translate transcript segments and create audio files with proper timing
+
+    With concurrent=True, groups are processed in parallel by up to max_workers
+    threads while translation and TTS requests stay under their provider caps
+    (TRANSLATE_MAX_CONCURRENCY / TTS_MAX_CONCURRENCY). The returned segments keep
+    the transcript order either way.
+
+    start_time/end_time (seconds) restrict grouping, translation and TTS to the
+    segments overlapping that window; segment times stay relative to the video.
+
+    Audio segments and transcripts are written to workspace, which should be
+    private to the job so concurrent jobs cannot overwrite each other's files.
+    """
+    print(f"Using voice_id: {voice_id} for target_language: {target_language}")
+    
+    if start_time is not None or end_time is not None:
+        transcript_data = select_transcript_window(transcript_data, start_time, end_time)
+        print(f"Dubbing {len(transcript_data)} segments between {start_time or 0:.2f}s and "
+              f"{'the end' if end_time is None else f'{end_time:.2f}s'}")
+        if not transcript_data:
+            return None
+    
+    client = Murf(
+        api_key=os.getenv("MURF_API_KEY"),  # Use environment variable or default key
+        httpx_client=httpx_client
+    )
+    
+    # Group transcript segments
+    print("Grouping transcript segments...")
+    groups = group_transcript_segments(transcript_data)
+    print(f"Created {len(groups)} groups from transcript")
+    
+    audio_segments = []
+    translated_segments = []
+    
+    if concurrent and len(groups) > 1:
+        # Enough workers for translation of one group to overlap with TTS of another
+        workers = max_workers or (TRANSLATE_MAX_CONCURRENCY + TTS_MAX_CONCURRENCY)
+        workers = max(1, min(workers, len(groups)))
+        print(f"Processing {len(groups)} groups concurrently with {workers} workers...")
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='timed-audio') as executor:
+            futures = [
+                executor.submit(process_transcript_group, client, i, group, target_language, voice_id, workspace)
+                for i, group in enumerate(groups)
+            ]
+            results = []
+            failed = False
+            for i, future in enumerate(futures):
                 try:
-                    os.remove(segment['file'])
-                except:
-                    pass
+                    results.append(future.result())
+                except Exception as e:
+                    if not failed:
+                        print(f"Error processing group {i+1}: {e}")
+                        failed = True
+                        # Don't start groups that are still queued
+                        for pending in futures:
+                            pending.cancel()
+        
+        if failed:
+            # Clean up files from every group that did finish
+            for group_audio, _ in results:
+                for segment in group_audio:
+                    try:
+                        os.remove(segment['file'])
+                    except:
+                        pass
             return None
+        
+        for group_audio, group_translated in results:
+            audio_segments.extend(group_audio)
+            translated_segments.extend(group_translated)
+    else:
+        for i, group in enumerate(groups):
+            try:
+                group_audio, group_translated = process_transcript_group(client, i, group, target_language, voice_id, workspace)
+            except Exception as e:
+                print(f"Error processing group {i+1}: {e}")
+                # Clean up any created files
+                for segment in audio_segments:
+                    try:
+                        os.remove(segment['file'])
+                    except:
+                        pass
+                return None
+            
+            audio_segments.extend(group_audio)
+            translated_segments.extend(group_translated)
     
     # Save both original and translated transcripts
-    save_transcript_with_timestamps(transcript_data, "original_transcript.txt")
-    save_transcript_with_timestamps(translated_segments, "translated_transcript.txt", is_translated=True)
+    save_transcript_with_timestamps(transcript_data, os.path.join(workspace, "original_transcript.txt"))
+    save_transcript_with_timestamps(translated_segments, os.path.join(workspace, "translated_transcript.txt"), is_translated=True)
     
     return audio_segments
 
@@ -472,95 +584,75 @@ def adjust_audio_speed(input_file, speed_factor, output_file):
             filter_complex = f"atempo={speed_factor:.2f}"
         
         command = [
-            FFMPEG_PATH,
             '-i', input_file,
             '-filter_complex', filter_complex,
             '-y',
             output_file
         ]
         
-        subprocess.run(command, check=True)
+        ffmpeg_pool.run(command, label='adjust audio speed')
         return output_file
     except Exception as e:
         print(f"Error adjusting audio speed: {e}")
         return None
 
-def create_synced_audio_track(audio_segments, total_duration):
-    """Create a single audio track with proper timing using ffmpeg"""
+def fit_segment_to_slot(segment, duration):
+    """Speed up a segment that overflows its [start_time, end_time) slot
+
+    Returns the path of the time-compressed copy, or None if the segment
+    already fits (within SEGMENT_OVERFLOW_TOLERANCE).
+    """
+    slot = segment['end_time'] - segment['start_time']
+    if slot <= 0 or duration <= slot * (1 + SEGMENT_OVERFLOW_TOLERANCE):
+        return None
+    
+    speed_factor = min(duration / slot, MAX_SEGMENT_SPEEDUP)
+    print(f"Segment at {segment['start_time']:.2f}s is {duration:.2f}s for a {slot:.2f}s slot, speeding up by {speed_factor:.2f}")
+    fitted_file = f"{os.path.splitext(segment['file'])[0]}_fitted.wav"
+    return adjust_audio_speed(segment['file'], speed_factor, fitted_file)
+
+def create_synced_audio_track(audio_segments, total_duration, output_file="synced_translated_audio.wav"):
+    """Create a single audio track with proper timing
+
+    Segments are decoded once and mixed at their start times by a streaming
+    renderer whose memory stays bounded however many segments there are. Only
+    segments longer than their own slot (up to end_time, or the next
+    segment's start) are time-compressed.
+    """
     print("Creating synchronized audio track...")
     
+    fitted_files = []
     try:
-        # First, combine all audio segments into one file
-        temp_combined = "temp_combined.wav"
-        filter_parts = []
-        input_files = []
-        
-        for i, segment in enumerate(audio_segments):
-            input_files.extend(['-i', segment['file']])
-            filter_parts.append(f"[{i}]adelay={int(segment['start_time'] * 1000)}|{int(segment['start_time'] * 1000)}[delayed{i}]")
-        
-        # Mix all delayed audio segments
-        if len(audio_segments) > 1:
-            inputs = ''.join([f"[delayed{i}]" for i in range(len(audio_segments))])
-            mix_filter = f"{inputs}amix=inputs={len(audio_segments)}:duration=longest[out]"
-            filter_parts.append(mix_filter)
-            output_map = "[out]"
-        else:
-            output_map = "[delayed0]"
-        
-        # Combine all filter parts
-        complex_filter = ";".join(filter_parts)
+        # Each segment's slot ends at its end_time, or where the next one starts
+        ordered = sorted(audio_segments, key=lambda segment: segment['start_time'])
+        timed_segments = []
+        for i, segment in enumerate(ordered):
+            segment = dict(segment)
+            if not segment.get('end_time'):
+                next_start = ordered[i + 1]['start_time'] if i + 1 < len(ordered) else total_duration
+                segment['end_time'] = max(next_start, segment['start_time'])
+            timed_segments.append(segment)
         
-        # Build ffmpeg command for initial combination
-        command = [FFMPEG_PATH] + input_files + [
-            '-filter_complex', complex_filter,
-            '-map', output_map,
-            '-t', str(total_duration),
-            '-y',
-            temp_combined
-        ]
+        def fit_segment(segment, duration):
+            fitted_file = fit_segment_to_slot(segment, duration)
+            if fitted_file:
+                fitted_files.append(fitted_file)
+            return fitted_file
         
-        print("Running ffmpeg to create initial combined audio...")
-        subprocess.run(command, check=True)
-        
-        # Calculate the actual duration of the combined audio
-        probe_command = [
-            FFMPEG_PATH,
-            '-i', temp_combined,
-            '-f', 'null',
-            '-'
-        ]
-        result = subprocess.run(probe_command, capture_output=True, text=True)
-        
-        # Extract duration from ffmpeg output
-        duration_match = re.search(r"Duration: (\d+):(\d+):(\d+\.\d+)", result.stderr)
-        if duration_match:
-            hours, minutes, seconds = map(float, duration_match.groups())
-            actual_duration = hours * 3600 + minutes * 60 + seconds
-            
-            # Calculate speed adjustment factor
-            if actual_duration > 0:
-                speed_factor = actual_duration / total_duration
-                print(f"Adjusting audio speed by factor: {speed_factor:.2f}")
-                
-                # Adjust the speed
-                final_audio = adjust_audio_speed(temp_combined, speed_factor, "synced_translated_audio.wav")
-                
-                # Clean up temporary file
-                try:
-                    os.remove(temp_combined)
-                except:
-                    pass
-                
-                return final_audio
-        
-        # If we couldn't calculate the speed factor, return the unadjusted audio
-        os.rename(temp_combined, "synced_translated_audio.wav")
-        return "synced_translated_audio.wav"
+        print(f"Mixing {len(timed_segments)} audio segments...")
+        render_timeline(timed_segments, total_duration, output_file, fit_segment=fit_segment)
+        print(f"Time-compressed {len(fitted_files)} of {len(timed_segments)} segments to fit their slots")
+        return output_file
         
     except Exception as e:
         print(f"Error creating synced audio track: {e}")
         return None
+    finally:
+        for fitted_file in fitted_files:
+            try:
+                os.remove(fitted_file)
+            except:
+                pass
 
 def map_language_code(murf_language_code):
     """Map Murf language codes to Google Translator language codes"""
@@ -618,30 +710,123 @@ def map_language_code(murf_language_code):
     # Return the mapped code if it exists, otherwise return the base code
     return language_map.get(murf_language_code, base_code)
 
-def translate_transcript_file(input_file, target_language, output_file):
-    """Translate a transcript file while maintaining timestamps using deep-translator"""
-    try:
-        # Map the language code to Google Translator format
-        google_language_code = map_language_code(target_language)
-        print(f"Using language code: {google_language_code} for translation")
+def pack_translation_batches(items, max_chars, max_items=None):
+    """Group consecutive (index, text) pairs into batches under the size limits"""
+    batches = []
+    current = []
+    current_chars = 0
+    
+    for index, text in items:
+        # +1 accounts for the separator between lines in a joined request
+        too_long = current_chars + len(text) + 1 > max_chars
+        too_many = max_items is not None and len(current) >= max_items
+        if current and (too_long or too_many):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append((index, text))
+        current_chars += len(text) + 1
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+def translate_lines_batched(lines, target_language, provider='google', client=None):
+    """Translate transcript lines with as few provider calls as possible
+
+    Google batches are sent as one newline-joined request; Murf batches use the
+    list form of text.translate. Returns one translation per input line, in
+    order. Lines already in the translation cache are not sent again; a line
+    the provider returns nothing for keeps its source text.
+    """
+    if provider == 'google':
+        language = map_language_code(target_language)
+        translator = PooledGoogleTranslator(source='auto', target=language)
+        max_chars, max_items = GOOGLE_TRANSLATE_BATCH_CHARS, None
         
-        # Initialize translator
-        translator = GoogleTranslator(source='auto', target=google_language_code)
+        def translate_batch(texts):
+            characters_total.inc(sum(len(text) for text in texts), operation='translate', provider='google')
+            with translate_slots, upstream_request('google_translate'):
+                translated = translator.translate('\n'.join(texts))
+            return translated.split('\n') if translated else []
+    elif provider == 'murf':
+        language = target_language
+        client = client or Murf(api_key=os.getenv("MURF_API_KEY"), httpx_client=httpx_client)
+        max_chars, max_items = MURF_TRANSLATE_BATCH_CHARS, MURF_TRANSLATE_BATCH_TEXTS
         
-        translated_lines = []
+        def translate_batch(texts):
+            characters_total.inc(sum(len(text) for text in texts), operation='translate', provider='murf')
+            with translate_slots, upstream_request('murf_translate'):
+                response = client.text.translate(target_language=language, texts=texts)
+            return [translation.translated_text for translation in response.translations]
+    else:
+        raise ValueError(f"Unknown translation provider: {provider}")
+    
+    results = [None] * len(lines)
+    pending = []
+    for i, line in enumerate(lines):
+        text = line.strip()
+        if not text:
+            results[i] = text
+            continue
+        cached = translation_cache.get(text, 'auto', language, provider)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, text))
+    
+    batches = pack_translation_batches(pending, max_chars, max_items)
+    print(f"Translating {len(pending)} of {len(lines)} lines in {len(batches)} batches ({provider})...")
+    
+    for b, batch in enumerate(batches):
+        texts = [text for _, text in batch]
+        translated = translate_batch(texts)
+        
+        if len(translated) != len(texts):
+            # The provider merged or split lines, so the mapping is ambiguous;
+            # translate this batch one line at a time instead
+            print(f"Batch {b+1} returned {len(translated)} lines for {len(texts)}, retrying line by line...")
+            upstream_retries_total.inc(service=f'{provider}_translate')
+            translated = [(translate_batch([text]) or [None])[0] for text in texts]
+        
+        for (i, text), translated_text in zip(batch, translated):
+            if not translated_text or not translated_text.strip():
+                # The provider returned nothing for this line; keep the source text, uncached
+                print(f"No translation returned for line {i+1}, keeping the original text")
+                results[i] = text
+                continue
+            results[i] = translated_text.strip()
+            translation_cache.put(text, 'auto', language, provider, results[i])
+    
+    return results
+
+def translate_transcript_file(input_file, target_language, output_file, provider='google'):
+    """Translate a transcript file while maintaining timestamps
+
+    Lines are translated in batches (see translate_lines_batched), using
+    deep-translator's Google backend by default or Murf with provider='murf'.
+    """
+    try:
+        timestamps = []
+        texts = []
         with open(input_file, 'r', encoding='utf-8') as f:
             # Skip header lines
             header1 = f.readline()
             header2 = f.readline()
-            translated_lines.extend([header1, header2])
             
-            # Process each line
+            # Collect each timed line
             for line in f:
                 if line.strip():
                     timestamp, text = line.split('\t', 1)
-                    # Translate the text using deep-translator
-                    translated_text = translator.translate(text.strip())
-                    translated_lines.append(f"{timestamp}\t{translated_text}\n")
+                    timestamps.append(timestamp)
+                    texts.append(text.strip())
+        
+        translated_texts = translate_lines_batched(texts, target_language, provider=provider)
+        
+        translated_lines = [header1, header2]
+        for timestamp, translated_text in zip(timestamps, translated_texts):
+            translated_lines.append(f"{timestamp}\t{translated_text}\n")
         
         # Save translated transcript
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -653,32 +838,42 @@ def translate_transcript_file(input_file, target_language, output_file):
         print(f"Error translating transcript file: {e}")
         return None
 
-def translate_and_convert_to_speech(text, target_language="es-ES", voice_id="es-ES-alvaro"):
-    """Translate text using deep-translator and convert to speech using Murf AI"""
+def translate_and_convert_to_speech(text, target_language="es-ES", voice_id="es-ES-alvaro", workspace='.'):
+    """Translate text using deep-translator and convert to speech using Murf AI
+
+    Chunk audio and the combined translated_audio.wav are written to workspace.
+    """
     try:
         # Map the language code to Google Translator format
         google_language_code = map_language_code(target_language)
         print(f"Using language code: {google_language_code} for translation")
         
         # Initialize translator
-        translator = GoogleTranslator(source='auto', target=google_language_code)
+        translator = PooledGoogleTranslator(source='auto', target=google_language_code)
+        
+        def google_translate(chunk):
+            # Only cache misses reach Google
+            characters_total.inc(len(chunk), operation='translate', provider='google')
+            with translate_slots, upstream_request('google_translate'):
+                return translator.translate(chunk)
         
         # Split text into manageable chunks
         print("Splitting text into chunks...")
-        text_chunks = split_text_into_chunks(text)
+        text_chunks = chunk_text(text, 'google_translate')
         print(f"Text split into {len(text_chunks)} chunks")
         
         # Translate chunks
         translated_chunks = []
         for i, chunk in enumerate(text_chunks):
             print(f"Translating chunk {i+1}/{len(text_chunks)}...")
-            translated_text = translator.translate(chunk)
+            translated_text = translation_cache.translate(chunk, 'auto', google_language_code, 'google', google_translate)
             translated_chunks.append(translated_text)
             print(f"Translation completed for chunk {i+1}!")
         
         # Initialize Murf client for text-to-speech
         client = Murf(
             api_key=os.getenv("MURF_API_KEY"),
+            httpx_client=httpx_client,
         )
         
         audio_files = []
@@ -689,38 +884,23 @@ def translate_and_convert_to_speech(text, target_language="es-ES", voice_id="es-
             
             try:
                 # Check if translated text is still too long and split further if needed
-                if len(translated_chunk) > 3000:
-                    print(f"Translated text is {len(translated_chunk)} characters, splitting further...")
-                    # Split the translated text into smaller chunks
-                    sub_chunks = split_text_into_chunks(translated_chunk, max_length=1500)
+                sub_chunks = chunk_text(translated_chunk, 'murf_tts')
+                if len(sub_chunks) > 1:
+                    print(f"Translated text is {len(translated_chunk)} characters, split into {len(sub_chunks)} chunks")
                     
                     for j, sub_chunk in enumerate(sub_chunks):
                         print(f"Converting sub-chunk {j+1}/{len(sub_chunks)} of chunk {i+1} to speech...")
-                        res = client.text_to_speech.stream(
-                            text=sub_chunk,
-                            voice_id=voice_id
-                        )
-                        
                         # Save the audio to a file
-                        output_file = f"translated_audio_chunk_{i+1}_{j+1}.wav"
-                        with open(output_file, "wb") as f:
-                            for audio_chunk in res:
-                                f.write(audio_chunk)
+                        output_file = os.path.join(workspace, f"translated_audio_chunk_{i+1}_{j+1}.wav")
+                        synthesize_speech(client, sub_chunk, voice_id, output_file)
                         
                         audio_files.append(output_file)
                         print(f"Sub-chunk {j+1} of chunk {i+1} completed!")
                 else:
                     # Convert the translated text to speech
-                    res = client.text_to_speech.stream(
-                        text=translated_chunk,
-                        voice_id=voice_id
-                    )
-                    
                     # Save the audio to a file
-                    output_file = f"translated_audio_chunk_{i+1}.wav"
-                    with open(output_file, "wb") as f:
-                        for audio_chunk in res:
-                            f.write(audio_chunk)
+                    output_file = os.path.join(workspace, f"translated_audio_chunk_{i+1}.wav")
+                    synthesize_speech(client, translated_chunk, voice_id, output_file)
                     
                     audio_files.append(output_file)
                     print(f"Chunk {i+1} completed!")
@@ -736,7 +916,7 @@ def translate_and_convert_to_speech(text, target_language="es-ES", voice_id="es-
                 return None
         
         # Combine all audio files into one
-        final_audio = combine_audio_files(audio_files, "translated_audio.wav")
+        final_audio = combine_audio_files(audio_files, os.path.join(workspace, "translated_audio.wav"))
         return final_audio
         
     except Exception as e:
@@ -744,57 +924,33 @@ def translate_and_convert_to_speech(text, target_language="es-ES", voice_id="es-
         return None
 
 def create_audio_from_transcript(transcript_file, voice_id, output_audio):
-    """Create audio from transcript file using Murf AI"""
+    """Create audio from transcript file using Murf AI
+
+    Segment audio is written next to output_audio.
+    """
     try:
         client = Murf(
             api_key=os.getenv("MURF_API_KEY"),
+            httpx_client=httpx_client,
         )
         
-        # Read transcript and group by timestamps
-        segments = []
-        with open(transcript_file, 'r', encoding='utf-8') as f:
-            # Skip header lines
-            next(f)
-            next(f)
-            
-            for line in f:
-                if line.strip():
-                    timestamp, text = line.split('\t', 1)
-                    # Convert timestamp to seconds
-                    minutes, seconds = timestamp.split(':')
-                    seconds, milliseconds = seconds.split('.')
-                    start_time = int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
-                    
-                    segments.append({
-                        'start': start_time,
-                        'text': text.strip()
-                    })
-        
-        # Sort segments by start time
-        segments.sort(key=lambda x: x['start'])
+        segments = read_transcript_with_timestamps(transcript_file)
         
         # Create audio segments
+        workspace = os.path.dirname(output_audio)
         audio_segments = []
         for i, segment in enumerate(segments):
             print(f"Processing segment {i+1}/{len(segments)}...")
             
             try:
-                # Convert text to speech
-                res = client.text_to_speech.stream(
-                    text=segment['text'],
-                    voice_id=voice_id
-                )
-                
-                # Save audio segment
-                audio_file = f"audio_segment_{i+1}.wav"
-                with open(audio_file, "wb") as f:
-                    for audio_chunk in res:
-                        f.write(audio_chunk)
+                # Convert text to speech and save audio segment
+                audio_file = os.path.join(workspace, f"audio_segment_{i+1}.wav")
+                synthesize_speech(client, segment['text'], voice_id, audio_file)
                 
                 audio_segments.append({
                     'file': audio_file,
                     'start_time': segment['start'],
-                    'duration': 0  # Will be calculated later
+                    'duration': audio_duration(audio_file)
                 })
                 
             except Exception as e:
@@ -807,16 +963,14 @@ def create_audio_from_transcript(transcript_file, voice_id, output_audio):
                         pass
                 return None
         
-        # Calculate total duration
-        total_duration = max(segment['start'] + 5 for segment in segments)  # Add 5 seconds buffer
+        # Calculate total duration from the real segment lengths (5 seconds if unreadable)
+        total_duration = max(
+            segment['start_time'] + (segment['duration'] if segment['duration'] is not None else 5)
+            for segment in audio_segments
+        )
         
         # Create synchronized audio track
-        final_audio = create_synced_audio_track(audio_segments, total_duration)
-        if final_audio:
-            # Rename to desired output file
-            os.rename(final_audio, output_audio)
-            return output_audio
-        return None
+        return create_synced_audio_track(audio_segments, total_duration, output_audio)
         
     except Exception as e:
         print(f"Error creating audio from transcript: {e}")
@@ -836,12 +990,11 @@ def main():
     transcript_data, transcript_text = get_transcript(video_id)
     if not transcript_data and not transcript_text:
         print("YouTube Transcript API failed, trying yt-dlp method...")
-        transcript_text = get_transcript_via_ytdlp(youtube_url)
-        if not transcript_text:
+        transcript_data = get_transcript_via_ytdlp(youtube_url)
+        if not transcript_data:
             print("Could not get transcript using any method")
             return
-        # If we got text from yt-dlp, we don't have timestamps, so fall back to old method
-        transcript_data = None
+        transcript_text = ' '.join(segment['text'] for segment in transcript_data)
         
     if transcript_data:
         print(f"Original transcript with timestamps: {len(transcript_data)} segments")
@@ -853,67 +1006,48 @@ def main():
     target_language = input("Enter target language code (e.g., 'es-ES' for Spanish, 'hi-IN' for Hindi): ")
     voice_id = input("Enter Murf voice ID for the target language (e.g., 'es-ES-alvaro' for Spanish): ")
     
-    # Download the original video
-    video_path = download_video(youtube_url)
-    if not video_path:
-        print("Failed to download video")
-        return
-    
-    # Save original transcript
-    if transcript_data:
-        save_transcript_with_timestamps(transcript_data, "original_transcript.txt")
-        
-        # Translate the transcript file
-        translated_transcript = translate_transcript_file("original_transcript.txt", target_language, "translated_transcript.txt")
-        if not translated_transcript:
-            print("Failed to translate transcript")
+    # Every intermediate file lives in a private workspace that is removed at the end
+    workspace = tempfile.mkdtemp(prefix='dub_')
+    try:
+        # Download the original video
+        video_path = download_video(youtube_url, os.path.join(workspace, "original_video.mp4"))
+        if not video_path:
+            print("Failed to download video")
             return
+        
+        # Save original transcript
+        if transcript_data:
+            original_transcript = os.path.join(workspace, "original_transcript.txt")
+            save_transcript_with_timestamps(transcript_data, original_transcript)
             
-        # Create audio from translated transcript
-        audio_path = create_audio_from_transcript(translated_transcript, voice_id, "translated_audio.wav")
-        if not audio_path:
-            print("Failed to create translated audio")
-            return
-    else:
-        print("Using basic translation without timestamps...")
-        # Fall back to old method
-        audio_path = translate_and_convert_to_speech(transcript_text, target_language, voice_id)
-        if not audio_path:
-            print("Failed to create translated audio")
-            return
-    
-    # Combine video with translated audio
-    final_video = combine_video_audio(video_path, audio_path)
-    if final_video:
-        print(f"Final video with translated audio saved to: {final_video}")
-    else:
-        print("Failed to create final video")
+            # Translate the transcript file
+            translated_transcript = translate_transcript_file(original_transcript, target_language, os.path.join(workspace, "translated_transcript.txt"))
+            if not translated_transcript:
+                print("Failed to translate transcript")
+                return
+                
+            # Create audio from translated transcript
+            audio_path = create_audio_from_transcript(translated_transcript, voice_id, os.path.join(workspace, "translated_audio.wav"))
+            if not audio_path:
+                print("Failed to create translated audio")
+                return
+        else:
+            print("Using basic translation without timestamps...")
+            # Fall back to old method
+            audio_path = translate_and_convert_to_speech(transcript_text, target_language, voice_id, workspace=workspace)
+            if not audio_path:
+                print("Failed to create translated audio")
+                return
         
-    # Clean up temporary files
-    try:
-        os.remove(video_path)
-        os.remove(audio_path)
-        # Also clean up any remaining chunk files
-        for i in range(1, 100):  # Clean up any leftover chunk files
-            chunk_file = f"translated_audio_chunk_{i}.wav"
-            if os.path.exists(chunk_file):
-                os.remove(chunk_file)
-            else:
-                break
-        # Clean up audio segment files
-        for i in range(1, 100):
-            segment_file = f"audio_segment_{i}.wav"
-            if os.path.exists(segment_file):
-                os.remove(segment_file)
-            else:
-                break
-            # Also check for sub-segments
-            for j in range(1, 10):
-                sub_segment_file = f"audio_segment_{i}_{j}.wav"
-                if os.path.exists(sub_segment_file):
-                    os.remove(sub_segment_file)
-    except:
-        pass
+        # Combine video with translated audio
+        final_video = combine_video_audio(video_path, audio_path)
+        if final_video:
+            print(f"Final video with translated audio saved to: {final_video}")
+        else:
+            print("Failed to create final video")
+    finally:
+        # Clean up temporary files
+        shutil.rmtree(workspace, ignore_errors=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""In-process counters and latency histograms, rendered in the Prometheus text format."""
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; stages range from
+# cache lookups to multi-minute synthesis runs
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing value per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.label_names, key), value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket distribution of observed values per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    le = _format_value(bound) if bound == float('inf') else f'{bound:g}'
+                    lines.append((f'{self.name}_bucket', _format_labels(self.label_names, key, [('le', le)]), count))
+                lines.append((f'{self.name}_sum', _format_labels(self.label_names, key), state[-2]))
+                lines.append((f'{self.name}_count', _format_labels(self.label_names, key), state[-1]))
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose values are read from other objects at scrape time.
+
+    callback returns {label value tuple: value}, e.g. hit counts kept by a cache.
+    """
+
+    def __init__(self, name, documentation, kind, label_names, callback):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.callback = callback
+
+    def samples(self):
+        return [(self.name, _format_labels(self.label_names, key), value)
+                for key, value in sorted(self.callback().items())]
+
+
+class MetricsRegistry:
+    """Named metrics of one process, rendered together on /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def callback(self, name, documentation, kind, label_names, callback):
+        return self._register(CallbackMetric(name, documentation, kind, label_names, callback))
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"Could not collect metric {metric.name}: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+# Pipeline-wide metrics shared by both servers
+stage_seconds = metrics.histogram(
+    'dubbing_stage_seconds', 'Wall time of each dubbing pipeline stage.', ['stage'])
+upstream_seconds = metrics.histogram(
+    'dubbing_upstream_request_seconds', 'Wall time of requests to upstream services.', ['service'])
+characters_total = metrics.counter(
+    'dubbing_characters_total', 'Characters sent to upstream translation and speech services.',
+    ['operation', 'provider'])
+upstream_errors_total = metrics.counter(
+    'dubbing_upstream_errors_total', 'Failed requests to upstream services.', ['service'])
+upstream_retries_total = metrics.counter(
+    'dubbing_upstream_retries_total', 'Requests to upstream services that were retried.', ['service'])
+
+
+@contextmanager
+def upstream_request(service):
+    """Time a request to an upstream service and count it if it fails."""
+    with upstream_seconds.time(service=service):
+        try:
+            yield
+        except Exception:
+            upstream_errors_total.inc(service=service)
+            raise
+
+
+def register_cache_metrics(caches):
+    """Expose hit/miss counts of caches given as {name: object with hits and misses}."""
+    metrics.callback(
+        'dubbing_cache_hits_total', 'Cache lookups that found an entry.', 'counter', ['cache'],
+        lambda: {(name,): cache.hits for name, cache in caches.items()})
+    metrics.callback(
+        'dubbing_cache_misses_total', 'Cache lookups that found nothing.', 'counter', ['cache'],
+        lambda: {(name,): cache.misses for name, cache in caches.items()})
+
+
+def register_job_metrics(job_queue):
+    """Expose the number of known jobs per status of a JobQueue."""
+    metrics.callback(
+        'dubbing_jobs', 'Jobs currently known to the queue, by status.', 'gauge', ['status'],
+        job_queue.status_counts)
+
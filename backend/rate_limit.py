@@ -0,0 +1,167 @@
+"""Process-wide adaptive rate limiting and jittered backoff per upstream host."""
+import os
+import random
+import threading
+import time
+from xml.etree.ElementTree import ParseError
+
+from youtube_transcript_api import TooManyRequests
+
+from metrics import metrics
+
+# Requests per second allowed to a host while it is healthy, and the burst on top
+DEFAULT_MAX_RATE = float(os.getenv('RATE_LIMIT_MAX_RPS', '10'))
+DEFAULT_BURST = int(os.getenv('RATE_LIMIT_BURST', '10'))
+# Throttling halves the rate, but never below this many requests per second
+DEFAULT_MIN_RATE = 0.2
+# Each successful request wins back this fraction of the maximum rate
+RECOVERY_FRACTION = 0.05
+
+# Per-host overrides of the maximum rate
+HOST_MAX_RATES = {
+    'www.youtube.com': float(os.getenv('YOUTUBE_MAX_RPS', '5')),
+}
+
+# Exponential backoff after throttling: base * 2**n seconds, at most BACKOFF_CAP
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+throttled_total = metrics.counter(
+    'dubbing_upstream_throttled_total', 'Throttling responses (HTTP 429 or garbled pages) from upstream hosts.',
+    ['host'])
+rate_limit_wait_seconds_total = metrics.counter(
+    'dubbing_rate_limit_wait_seconds_total', 'Time requests waited for the per-host rate limiter.', ['host'])
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Delay before retry number `attempt` (1-based): exponential, with equal jitter."""
+    ceiling = min(cap, base * 2 ** max(0, attempt - 1))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def _http_response(error):
+    """The HTTP response attached to error or to an exception it was raised from, if any."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, 'response', None)
+        if response is not None and hasattr(response, 'status_code'):
+            return response
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def http_status(error):
+    """Status code of the HTTP response behind error, or None."""
+    response = _http_response(error)
+    return response.status_code if response is not None else None
+
+
+def retry_after_seconds(error):
+    """Seconds from the Retry-After header of the HTTP response behind error, if any."""
+    response = _http_response(error)
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_youtube_throttling_error(error):
+    """True if YouTube is rate limiting us.
+
+    That is an HTTP 429, the captcha page (TooManyRequests), or a transcript
+    body that is not valid XML, which YouTube serves instead of a 429. Error
+    messages are not inspected: they contain the video URL, whose ID may
+    contain "429".
+    """
+    return isinstance(error, (TooManyRequests, ParseError)) or http_status(error) == 429
+
+
+class AdaptiveRateLimiter:
+    """Token bucket for one upstream host whose rate follows the limits the host enforces.
+
+    While the host is healthy requests pass at up to max_rate without waiting.
+    A throttling response halves the rate and pauses every caller for a
+    jittered backoff (or the host's Retry-After); successes then raise the rate
+    again step by step.
+    """
+
+    def __init__(self, host, max_rate=DEFAULT_MAX_RATE, burst=DEFAULT_BURST, min_rate=DEFAULT_MIN_RATE):
+        self.host = host
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.burst = max(1, burst)
+        self.rate = max_rate
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        """Block until a request to the host may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+            rate_limit_wait_seconds_total.inc(waited, host=self.host)
+        return waited
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+
+    def record_throttled(self, retry_after=None):
+        """Slow down after the host throttled us; returns the pause imposed on all callers."""
+        with self._lock:
+            self._consecutive_throttles += 1
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else backoff_delay(self._consecutive_throttles)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        throttled_total.inc(host=self.host)
+        print(f"{self.host} is throttling requests; pausing {pause:.1f}s and limiting to {self.rate:.2f} requests/s")
+        return pause
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'max_rate': self.max_rate,
+                'throttled': self.throttled,
+                'waited_seconds': self.waited_seconds,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(host):
+    """Return the process-wide limiter for host, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(host, max_rate=HOST_MAX_RATES.get(host, DEFAULT_MAX_RATE))
+            _limiters[host] = limiter
+        return limiter
@@ -0,0 +1,65 @@
+"""Persistent index of finished dubs so identical requests skip the pipeline."""
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file mapping (video, language, voice, variant) to the uploaded audio URL
+RESULT_INDEX_PATH = os.getenv(
+    'RESULT_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result_index.sqlite3')
+)
+
+
+class ResultIndex:
+    """Finished audio URLs keyed by (video_id, language, voice_id, variant).
+
+    variant separates outputs of different pipelines for the same video and voice.
+    """
+
+    def __init__(self, path=RESULT_INDEX_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' video_id TEXT NOT NULL,'
+            ' language TEXT NOT NULL,'
+            ' voice_id TEXT NOT NULL,'
+            ' variant TEXT NOT NULL,'
+            ' audio_url TEXT NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' PRIMARY KEY (video_id, language, voice_id, variant))'
+        )
+        self._conn.commit()
+
+    def get(self, video_id, language, voice_id, variant='full'):
+        """Return the audio URL of a finished dub or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT audio_url FROM results'
+                ' WHERE video_id = ? AND language = ? AND voice_id = ? AND variant = ?',
+                (video_id, language, voice_id, variant)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, video_id, language, voice_id, audio_url, variant='full'):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                (video_id, language, voice_id, variant, audio_url, time.time())
+            )
+            self._conn.commit()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+result_index = ResultIndex()
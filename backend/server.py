@@ -1,7 +1,17 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 import os
-from main import translate_and_create_timed_audio, get_transcript, get_video_id
+from main import translate_and_create_timed_audio, create_synced_audio_track, get_transcript, get_video_id
+from jobs import JobQueue, stream_events
+from result_index import result_index
+from transcript_window import parse_time_window, window_variant
+from transcript_cache import transcript_cache
+from translation_cache import translation_cache
+from tts_cache import tts_cache
+from video_info import video_info_cache
+from ffmpeg_pool import ffmpeg_pool
+from metrics import (metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE, stage_seconds, upstream_request,
+                     register_cache_metrics, register_job_metrics)
 import tempfile
 import shutil
 import cloudinary
@@ -24,6 +34,37 @@ cloudinary.config(
 app = Flask(__name__)
 CORS(app)
 
+# Worker pool that runs dubbing pipelines outside the request threads
+job_queue = JobQueue()
+
+# Scrape-time metrics read from the caches, the job queue and the ffmpeg pool
+register_cache_metrics({
+    'transcript': transcript_cache,
+    'translation': translation_cache,
+    'tts': tts_cache,
+    'result_index': result_index,
+    'video_info': video_info_cache,
+})
+register_job_metrics(job_queue)
+metrics.callback(
+    'dubbing_ffmpeg_invocations_total', 'ffmpeg processes run, by outcome.', 'counter', ['outcome'],
+    lambda: {
+        ('failed',): ffmpeg_pool.failures,
+        ('timed_out',): ffmpeg_pool.timeouts,
+        ('succeeded',): ffmpeg_pool.invocations - ffmpeg_pool.failures - ffmpeg_pool.timeouts,
+    })
+metrics.callback(
+    'dubbing_ffmpeg_seconds_total', 'Time spent in ffmpeg processes and waiting for a free slot.',
+    'counter', ['kind'],
+    lambda: {
+        ('wall',): ffmpeg_pool.wall_seconds,
+        ('cpu',): ffmpeg_pool.cpu_seconds,
+        ('wait',): ffmpeg_pool.wait_seconds,
+    })
+
+# Result index variant for audio produced by this server's pipeline
+RESULT_VARIANT = 'timed'
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # can also be ["*"] to allow all
@@ -33,60 +74,149 @@ app.add_middleware(
 )
 
 
-@app.route('/translate', methods=['POST'])
-def translate_video():
-    try:
-        data = request.json
-        video_url = data.get('videoUrl')
-        voice_id = data.get('voiceId')
-        target_language = data.get('targetLanguage', 'hi-IN')
-
-        if not video_url or not voice_id:
-            return jsonify({'error': 'Missing required parameters'}), 400
-
-        # Create temporary directory for processing
-        temp_dir = tempfile.mkdtemp()
-        try:            # Get video ID and transcript
-            video_id = get_video_id(video_url)
-            if not video_id:
-                return jsonify({'error': 'Invalid YouTube URL'}), 400
+def run_translation_job(job, video_id, voice_id, target_language, start_time=None, end_time=None):
+    """Run the timed dubbing pipeline for a queued job and return the audio URL.
 
+    start_time/end_time limit the dub to that part of the video; the track then
+    starts at start_time. All intermediate files live in a workspace private to
+    the job, so any number of jobs can run side by side.
+    """
+    # Create temporary directory for processing
+    temp_dir = tempfile.mkdtemp(prefix=f'dub_{job.id}_')
+    try:
+        job.update(stage='transcript', progress=0.05, message='Fetching transcript')
+        with stage_seconds.time(stage='transcript'):
             transcript_data, transcript_text = get_transcript(video_id)
-            if not transcript_data:
-                return jsonify({'error': 'This video does not have captions available. Please try a different video with captions/subtitles.'}), 400
+        if not transcript_data:
+            raise Exception('This video does not have captions available. Please try a different video with captions/subtitles.')
+
+        print(f"Retrieved transcript with {len(transcript_data)} segments")
 
-            print(f"Retrieved transcript with {len(transcript_data)} segments")
-            
-            # Process translation and audio generation
+        # Process translation and audio generation
+        job.update(stage='synthesis', progress=0.25, message=f'Translating and generating speech for {len(transcript_data)} segments')
+        with stage_seconds.time(stage='synthesis'):
             audio_segments = translate_and_create_timed_audio(
                 transcript_data,
                 target_language=target_language,
-                voice_id=voice_id
+                voice_id=voice_id,
+                concurrent=True,
+                start_time=start_time,
+                end_time=end_time,
+                workspace=temp_dir
             )
 
-            if not audio_segments:
-                return jsonify({'error': 'Failed to generate audio'}), 500
-
-            # Upload audio file to Cloudinary
+        if not audio_segments:
+            raise Exception('Failed to generate audio')
+
+        # Mix the segments into one track that starts at the window start
+        job.update(stage='mixing', progress=0.8, message=f'Mixing {len(audio_segments)} audio segments')
+        offset = start_time or 0
+        timed_segments = [
+            dict(segment, start_time=max(0.0, segment['start_time'] - offset), end_time=segment['end_time'] - offset)
+            for segment in audio_segments
+        ]
+        total_duration = max(segment['end_time'] for segment in timed_segments)
+        with stage_seconds.time(stage='mixing'):
+            audio_path = create_synced_audio_track(timed_segments, total_duration, os.path.join(temp_dir, 'translated_audio_only.wav'))
+        if not audio_path:
+            raise Exception('Failed to mix audio')
+
+        # Upload audio file to Cloudinary
+        job.update(stage='upload', progress=0.9, message='Uploading audio')
+        variant = window_variant(RESULT_VARIANT, start_time, end_time)
+        with stage_seconds.time(stage='upload'), upstream_request('cloudinary'):
             result = cloudinary.uploader.upload(
-                'translated_audio_only.wav',
+                audio_path,
                 resource_type='raw',
-                public_id=f'translated_audio_{video_id}'
+                public_id=f'translated_audio_{variant}_{video_id}_{target_language}_{voice_id}',
+                overwrite=True
             )
 
-            # Return the Cloudinary URL
+        # Return the Cloudinary URL
+        result_index.put(video_id, target_language, voice_id, result['secure_url'], variant=variant)
+        return {'audioUrl': result['secure_url'], 'startTime': start_time, 'endTime': end_time}
+
+    finally:
+        # Clean up temporary directory
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+@app.route('/translate', methods=['POST'])
+def translate_video():
+    """Queue a dubbing job and return its ID without waiting for the pipeline."""
+    try:
+        data = request.json
+        video_url = data.get('videoUrl')
+        voice_id = data.get('voiceId')
+        target_language = data.get('targetLanguage', 'hi-IN')
+
+        if not video_url or not voice_id:
+            return jsonify({'error': 'Missing required parameters'}), 400
+
+        # Optional window (seconds) so only the part being watched is dubbed
+        try:
+            start_time, end_time = parse_time_window(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        video_id = get_video_id(video_url)
+        if not video_id:
+            return jsonify({'error': 'Invalid YouTube URL'}), 400
+
+        # Finished dubs are served straight from the result index
+        variant = window_variant(RESULT_VARIANT, start_time, end_time)
+        audio_url = result_index.get(video_id, target_language, voice_id, variant=variant)
+        if audio_url:
+            print(f"Result index hit for {video_id} ({target_language}, {voice_id}, {variant})")
             return jsonify({
                 'success': True,
-                'audioUrl': result['secure_url']
+                'status': 'completed',
+                'audioUrl': audio_url,
+                'startTime': start_time,
+                'endTime': end_time,
+                'cached': True
             })
 
-        finally:
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir)
+        # Identical requests already in progress share the running job
+        job = job_queue.submit(
+            run_translation_job, video_id, voice_id, target_language, start_time, end_time,
+            dedupe_key=(video_id, target_language, voice_id, start_time, end_time)
+        )
+        return jsonify({
+            'success': True,
+            'jobId': job.id,
+            'status': job.status,
+            'statusUrl': f"/jobs/{job.id}",
+            'eventsUrl': f"/jobs/{job.id}/events"
+        }), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Return the current state of a dubbing job."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream per-stage progress of a dubbing job as server-sent events."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return Response(
+        stream_events(job),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose stage latencies, upstream counters and cache statistics for Prometheus."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/audio/<filename>')
 def serve_audio(filename):
     return send_from_directory('.', filename)
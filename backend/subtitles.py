@@ -0,0 +1,91 @@
+"""Streaming WebVTT/SRT parser producing timed transcript segments."""
+import html
+import re
+
+# "00:01:02.345 --> 00:01:04.000" (WebVTT) or "00:01:02,345 --> 00:01:04,000" (SRT); hours optional
+_TIMING = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})')
+# Inline markup: <c>, <i>, karaoke timestamps like <00:00:01.234>, and {\an8}-style tags
+_MARKUP = re.compile(r'<[^>]*>|\{[^}]*\}')
+
+# Identical consecutive cues this close together are one segment
+MERGE_GAP_SECONDS = 0.05
+
+
+def _seconds(hours, minutes, seconds, fraction):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, '0')) / 1000
+
+
+def _cues(lines):
+    """Yield (start, end, text_lines) for each cue, reading lines one at a time."""
+    start = end = None
+    text = []
+    identifier = None  # a line that may be the next cue's number (SRT) or id (WebVTT)
+    for line in lines:
+        line = line.rstrip('\r\n').lstrip('\ufeff')
+        timing = _TIMING.search(line) if '-->' in line else None
+        if timing:
+            if start is not None:
+                yield start, end, text
+            start, end = _seconds(*timing.group(1, 2, 3, 4)), _seconds(*timing.group(5, 6, 7, 8))
+            text, identifier = [], None
+        elif not line:
+            # A blank line ends the cue; headers, NOTE and STYLE blocks are never inside one
+            if start is not None:
+                if identifier is not None:
+                    text.append(identifier)
+                yield start, end, text
+            start, identifier = None, None
+        elif start is not None:
+            if identifier is not None:
+                text.append(identifier)
+                identifier = None
+            cleaned = ' '.join(html.unescape(_MARKUP.sub('', line)).split())
+            if cleaned.isdigit():
+                identifier = cleaned
+            elif cleaned:
+                text.append(cleaned)
+    if start is not None:
+        if identifier is not None:
+            text.append(identifier)
+        yield start, end, text
+
+
+def parse_subtitles(lines):
+    """Yield {'text', 'start', 'duration'} segments from WebVTT or SRT lines.
+
+    lines can be any iterable of lines, e.g. an open file, so files of any size
+    are parsed in constant memory. Auto-generated captions repeat the previous
+    cue's lines before adding new words; only the new lines are kept, timed
+    from the cue that introduced them, and identical consecutive cues are
+    merged into one segment.
+    """
+    previous_lines = []
+    pending = None  # [text, start, end] of the segment not yet yielded
+    for start, end, text in _cues(lines):
+        # Drop the longest run of leading lines that repeats the end of the previous cue
+        overlap = min(len(text), len(previous_lines))
+        while overlap and text[:overlap] != previous_lines[-overlap:]:
+            overlap -= 1
+        new_lines = text[overlap:]
+        previous_lines = text
+
+        if not new_lines:
+            if pending is not None and text:
+                pending[2] = max(pending[2], end)
+            continue
+        new_text = ' '.join(new_lines)
+        if pending is not None and pending[0] == new_text and start - pending[2] <= MERGE_GAP_SECONDS:
+            pending[2] = max(pending[2], end)
+            continue
+        if pending is not None:
+            yield {'text': pending[0], 'start': pending[1], 'duration': max(0.0, pending[2] - pending[1])}
+        pending = [new_text, start, end]
+    if pending is not None:
+        yield {'text': pending[0], 'start': pending[1], 'duration': max(0.0, pending[2] - pending[1])}
+
+
+def read_subtitle_file(path):
+    """Parse a .vtt or .srt file into a list of timed segments."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return list(parse_subtitles(f))
@@ -0,0 +1,98 @@
+"""Sentence-aware splitting of text into chunks that fit a provider's request limit."""
+import re
+
+# Per-provider chunk budgets as (size, unit); unit is 'chars' or 'bytes' (UTF-8)
+CHUNK_BUDGETS = {
+    'google_translate': (4500, 'chars'),  # Google rejects requests over 5000 characters
+    'murf_translate': (2500, 'chars'),
+    'murf_tts': (2800, 'chars'),  # Murf allows 3000; stay a little below
+}
+
+# Sentence-ending punctuation (and one closing quote or bracket) followed by a space;
+# full-width CJK stops end a sentence even without a space after them
+_SENTENCE_END = re.compile(r'([.!?\u0964\u3002\uff01\uff1f]+["\')\]]?)(?: |(?<=[\u3002\uff01\uff1f]))')
+
+
+def _measure(unit):
+    if unit == 'chars':
+        return len
+    if unit == 'bytes':
+        return lambda text: len(text.encode('utf-8'))
+    raise ValueError(f"Unknown chunk unit: {unit!r}")
+
+
+def split_sentences(text):
+    """Return the sentences of text, punctuation kept and whitespace collapsed."""
+    # split() alternates sentence bodies with the punctuation that ended them
+    parts = _SENTENCE_END.split(' '.join(text.split()))
+    parts.append('')
+    return [sentence for sentence in map(str.__add__, parts[0::2], parts[1::2]) if sentence]
+
+
+def _split_word(word, max_size, measure):
+    """Cut a single word that is over budget into pieces that are not."""
+    piece = []
+    piece_size = 0
+    for char in word:
+        char_size = measure(char)
+        if piece and piece_size + char_size > max_size:
+            yield ''.join(piece)
+            piece, piece_size = [], 0
+        piece.append(char)
+        piece_size += char_size
+    if piece:
+        yield ''.join(piece)
+
+
+def chunk_text(text, provider=None, max_size=None, unit=None):
+    """Split text into chunks that each fit one request to a provider.
+
+    Whole sentences are packed together while they fit; a sentence over the
+    budget is split between words, and a word over the budget is cut. The
+    budget comes from CHUNK_BUDGETS[provider] unless max_size/unit are given.
+    Runs in time linear in the length of text.
+    """
+    if provider is not None:
+        budget_size, budget_unit = CHUNK_BUDGETS[provider]
+        max_size = max_size or budget_size
+        unit = unit or budget_unit
+    if not max_size or max_size < 1:
+        raise ValueError("chunk_text needs a provider or a positive max_size")
+    measure = _measure(unit or 'chars')
+
+    chunks = []
+    parts = []  # pieces of the chunk being built, joined by single spaces
+    size = -1   # its measured size; -1 so the first piece adds no separator
+
+    for sentence in split_sentences(text):
+        sentence_size = measure(sentence)
+        if size + 1 + sentence_size <= max_size:
+            parts.append(sentence)
+            size += 1 + sentence_size
+            continue
+        if parts:
+            chunks.append(' '.join(parts))
+        if sentence_size <= max_size:
+            parts, size = [sentence], sentence_size
+            continue
+
+        # Too long for any chunk: fall back to words, and cut words that still don't fit
+        parts, size = [], -1
+        for word in sentence.split(' '):
+            word_size = measure(word)
+            if size + 1 + word_size <= max_size:
+                parts.append(word)
+                size += 1 + word_size
+                continue
+            if parts:
+                chunks.append(' '.join(parts))
+            if word_size <= max_size:
+                parts, size = [word], word_size
+                continue
+            pieces = list(_split_word(word, max_size, measure))
+            chunks.extend(pieces[:-1])
+            parts, size = [pieces[-1]], measure(pieces[-1])
+
+    if parts:
+        chunks.append(' '.join(parts))
+    return chunks
@@ -0,0 +1,54 @@
+"""In-memory TTL cache of fetched YouTube transcripts."""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a fetched transcript is reused before YouTube is asked again
+TRANSCRIPT_CACHE_TTL = float(os.getenv('TRANSCRIPT_CACHE_TTL', '3600'))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_MAX_ENTRIES', '512'))
+
+
+class TranscriptCache:
+    """Timed segments, source language and formatted text per video ID."""
+
+    def __init__(self, ttl=TRANSCRIPT_CACHE_TTL, max_entries=TRANSCRIPT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # video_id -> (expires_at, entry)
+
+    def get(self, video_id):
+        """Return {'segments', 'language_code', 'text'} for video_id, or None if absent or expired."""
+        with self._lock:
+            item = self._entries.get(video_id)
+            if item and item[0] > time.monotonic():
+                self._entries.move_to_end(video_id)
+                self.hits += 1
+                return item[1]
+            if item:
+                del self._entries[video_id]
+            self.misses += 1
+            return None
+
+    def put(self, video_id, segments, language_code, text):
+        """Store a transcript. segments is a list of {'text', 'start', 'duration'} or None."""
+        if segments is not None:
+            segments = [
+                {'text': entry['text'], 'start': entry['start'], 'duration': entry['duration']}
+                for entry in segments
+            ]
+        entry = {'segments': segments, 'language_code': language_code, 'text': text}
+        with self._lock:
+            self._entries[video_id] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+transcript_cache = TranscriptCache()
@@ -0,0 +1,62 @@
+"""Restrict dubbing to the part of a video between startTime and endTime."""
+import math
+
+# Window bounds are kept to the millisecond, so requests that differ by less
+# share one job and one cached result
+WINDOW_DECIMALS = 3
+
+
+def parse_time_window(data):
+    """Read the optional startTime/endTime (seconds) of a /translate request body.
+
+    Returns (start_time, end_time) rounded to WINDOW_DECIMALS; either is None
+    when not given. Raises
+    ValueError for negative, non-finite (nan, inf) or non-numeric values and
+    for empty windows.
+    """
+    window = []
+    for name in ('startTime', 'endTime'):
+        value = data.get(name)
+        if value is None:
+            window.append(None)
+            continue
+        if isinstance(value, bool):
+            raise ValueError(f"{name} must be a number of seconds")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number of seconds")
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be a number of seconds")
+        if value < 0:
+            raise ValueError(f"{name} must not be negative")
+        window.append(round(value, WINDOW_DECIMALS))
+
+    start_time, end_time = window
+    if start_time is not None and end_time is not None and end_time <= start_time:
+        raise ValueError("endTime must be after startTime")
+    # A window starting at 0 with no end is the whole video
+    if not start_time and end_time is None:
+        return None, None
+    return start_time, end_time
+
+
+def select_transcript_window(segments, start_time=None, end_time=None):
+    """Return the segments that overlap [start_time, end_time); None means unbounded."""
+    return [
+        segment for segment in segments
+        if (end_time is None or segment['start'] < end_time)
+        and (start_time is None or segment['start'] + segment['duration'] > start_time)
+    ]
+
+
+def window_variant(variant, start_time=None, end_time=None):
+    """Result index variant for a windowed dub, or variant itself for the whole video."""
+    if start_time is None and end_time is None:
+        return variant
+    end = 'end' if end_time is None else _format_bound(end_time)
+    return f"{variant}_{_format_bound(start_time or 0)}-{end}"
+
+
+def _format_bound(seconds):
+    return f"{round(seconds, WINDOW_DECIMALS):.{WINDOW_DECIMALS}f}"
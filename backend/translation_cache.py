@@ -0,0 +1,85 @@
+"""Persistent SQLite cache of translated transcript segments."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file that keeps translations across restarts
+TRANSLATION_CACHE_PATH = os.getenv(
+    'TRANSLATION_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translation_cache.sqlite3')
+)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """Translations keyed by (source text hash, source language, target language, provider)."""
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            ' text_hash TEXT NOT NULL,'
+            ' source_language TEXT NOT NULL,'
+            ' target_language TEXT NOT NULL,'
+            ' provider TEXT NOT NULL,'
+            ' translated_text TEXT NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' PRIMARY KEY (text_hash, source_language, target_language, provider))'
+        )
+        self._conn.commit()
+
+    def get(self, text, source_language, target_language, provider):
+        """Return the cached translation or None, counting the hit or miss."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT translated_text FROM translations'
+                ' WHERE text_hash = ? AND source_language = ? AND target_language = ? AND provider = ?',
+                (text_hash(text), source_language, target_language, provider)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, text, source_language, target_language, provider, translated_text):
+        if not translated_text:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)',
+                (text_hash(text), source_language, target_language, provider, translated_text, time.time())
+            )
+            self._conn.commit()
+
+    def translate(self, text, source_language, target_language, provider, translate_fn):
+        """Return a cached translation of text, calling translate_fn(text) only on a miss.
+
+        Raises ValueError if translate_fn returns nothing for non-blank text.
+        """
+        if not text.strip():
+            return text
+        cached = self.get(text, source_language, target_language, provider)
+        if cached is not None:
+            return cached
+        translated_text = translate_fn(text)
+        if not translated_text or not translated_text.strip():
+            raise ValueError(f"{provider} returned an empty translation for {len(text)} characters")
+        self.put(text, source_language, target_language, provider, translated_text)
+        return translated_text
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+translation_cache = TranslationCache()
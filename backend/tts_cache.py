@@ -0,0 +1,116 @@
+"""Content-addressed on-disk cache for synthesized speech."""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+
+# Where cached audio lives and how much disk it may use before evicting
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache'))
+TTS_CACHE_MAX_BYTES = int(float(os.getenv('TTS_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share a cache entry."""
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def cache_key(text, voice_id, audio_format):
+    """Hash of (normalized text, voice, output format)."""
+    payload = '\0'.join([normalize_text(text), voice_id, audio_format.lower()])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Audio files keyed by cache_key(), evicted least-recently-used past a size budget."""
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # filename -> size, oldest use first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Rebuild the LRU order from file modification times left by earlier runs."""
+        files = []
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if filename.startswith('.') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, filename, stat.st_size))
+        for _, filename, size in sorted(files):
+            self._entries[filename] = size
+            self._total_bytes += size
+
+    def _filename(self, text, voice_id, audio_format):
+        return f"{cache_key(text, voice_id, audio_format)}.{audio_format.lower()}"
+
+    def fetch(self, text, voice_id, audio_format, output_path):
+        """Copy cached audio to output_path. Returns True on a hit."""
+        filename = self._filename(text, voice_id, audio_format)
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            if filename not in self._entries or not os.path.exists(path):
+                self._entries.pop(filename, None)
+                self.misses += 1
+                return False
+            self._entries.move_to_end(filename)
+            self.hits += 1
+            try:
+                # mtime records recency so the LRU order survives restarts
+                os.utime(path)
+            except OSError:
+                pass
+        try:
+            shutil.copyfile(path, output_path)
+        except OSError:
+            # A concurrent store evicted the entry after the lookup; synthesize instead
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return False
+        return True
+
+    def store(self, text, voice_id, audio_format, source_path):
+        """Add a synthesized file to the cache and evict old entries if over budget."""
+        filename = self._filename(text, voice_id, audio_format)
+        path = os.path.join(self.directory, filename)
+        size = os.path.getsize(source_path)
+        if size == 0 or size > self.max_bytes:
+            return
+
+        # Copy under a temporary name first so readers never see a partial file
+        temp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(source_path, temp_path)
+            with self._lock:
+                os.replace(temp_path, path)
+                self._total_bytes += size - self._entries.pop(filename, 0)
+                self._entries[filename] = size
+                self._evict()
+        except OSError as e:
+            print(f"Warning: could not store audio in TTS cache: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            filename, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+
+
+tts_cache = TTSCache()
@@ -0,0 +1,107 @@
+"""yt-dlp metadata shared by subtitle retrieval and video downloads."""
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import yt_dlp
+
+from http_client import http_session
+from metrics import upstream_request
+from subtitles import parse_subtitles
+
+# Seconds an extracted info dict is reused; its media URLs are signed and expire after a few hours
+VIDEO_INFO_TTL = float(os.getenv('VIDEO_INFO_TTL', '900'))
+# Info dicts list every format and caption track, so keep only a few
+VIDEO_INFO_MAX_ENTRIES = int(os.getenv('VIDEO_INFO_MAX_ENTRIES', '32'))
+
+# Subtitle languages in order of preference, and the formats the parser reads
+SUBTITLE_LANGUAGES = ['en', 'en-US', 'en-GB', 'en-CA', 'en-AU']
+SUBTITLE_FORMATS = ('vtt', 'srt')
+SUBTITLE_FETCH_TIMEOUT = 30
+
+
+class VideoInfoCache:
+    """yt-dlp info dicts per video ID, kept for a short TTL."""
+
+    def __init__(self, ttl=VIDEO_INFO_TTL, max_entries=VIDEO_INFO_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # video_id -> (expires_at, info)
+
+    def get(self, video_id):
+        """Return the info dict for video_id, or None if absent or expired."""
+        with self._lock:
+            item = self._entries.get(video_id)
+            if item and item[0] > time.monotonic():
+                self._entries.move_to_end(video_id)
+                self.hits += 1
+                return item[1]
+            if item:
+                del self._entries[video_id]
+            self.misses += 1
+            return None
+
+    def put(self, video_id, info):
+        with self._lock:
+            self._entries[video_id] = (time.monotonic() + self.ttl, info)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+video_info_cache = VideoInfoCache()
+
+
+def extract_video_info(video_id):
+    """Return yt-dlp's info dict for a YouTube video, reusing a recent extraction."""
+    info = video_info_cache.get(video_id)
+    if info is None:
+        ydl_opts = {'skip_download': True, 'quiet': True, 'no_warnings': True}
+        with upstream_request('yt_dlp'), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        video_info_cache.put(video_id, info)
+    return info
+
+
+def select_subtitle_track(info, languages=SUBTITLE_LANGUAGES):
+    """Return (language, url) of the preferred subtitle track in an info dict, or None.
+
+    Uploaded subtitles win over automatic captions; within each, languages
+    are tried in order.
+    """
+    for kind in ('subtitles', 'automatic_captions'):
+        tracks = info.get(kind) or {}
+        for language in languages:
+            for subtitle_format in SUBTITLE_FORMATS:
+                for track in tracks.get(language) or []:
+                    if track.get('ext') == subtitle_format and track.get('url'):
+                        return language, track['url']
+    return None
+
+
+def fetch_subtitle_segments(info, languages=SUBTITLE_LANGUAGES):
+    """Download the preferred subtitle track of an info dict straight into timed segments.
+
+    Returns (language, segments), or (None, None) if the video has no usable track.
+    """
+    track = select_subtitle_track(info, languages)
+    if track is None:
+        return None, None
+    language, url = track
+    with upstream_request('youtube_subtitles'), \
+            http_session.get(url, stream=True, timeout=SUBTITLE_FETCH_TIMEOUT) as response:
+        response.raise_for_status()
+        # Let the text wrapper see EOF instead of a stream urllib3 already closed
+        response.raw.decode_content = True
+        response.raw.auto_close = False
+        lines = io.TextIOWrapper(response.raw, encoding='utf-8', errors='replace')
+        segments = list(parse_subtitles(lines))
+    return language, segments
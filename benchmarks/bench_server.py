@@ -0,0 +1,85 @@
+"""Serve the root dubbing server with every upstream client pointed at the local fakes.
+
+Started by e2e.py in its own process so the server's memory can be measured on
+its own; it can also be run by hand against fake_upstreams.py:
+
+    python benchmarks/bench_server.py --upstream http://127.0.0.1:8900 --port 5055
+"""
+import argparse
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeYoutubeDL:
+    """Minimal yt_dlp.YoutubeDL that reads video info from the fake upstream."""
+
+    upstream = None
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def _video_id(self, url):
+        return parse_qs(urlparse(url).query).get('v', [''])[0]
+
+    def extract_info(self, url, download=False):
+        response = requests.get(f"{self.upstream}/ytdlp/info", params={'v': self._video_id(url)}, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+
+def point_clients_at(upstream):
+    """Redirect YouTube, yt-dlp, Google Translate, Murf and Cloudinary to upstream."""
+    import cloudinary
+    import yt_dlp
+    import youtube_transcript_api._transcripts as youtube_transcripts
+    from deep_translator.constants import BASE_URLS
+    from http_client import httpx_client
+    from murf import Murf
+    from murf.environment import MurfEnvironment
+
+    youtube_transcripts.WATCH_URL = upstream + '/youtube/watch?v={video_id}'
+    BASE_URLS['GOOGLE_TRANSLATE'] = upstream + '/google/m'
+    FakeYoutubeDL.upstream = upstream
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    cloudinary.config(upload_prefix=upstream + '/cloudinary', cloud_name='bench', api_key='bench', api_secret='bench')
+
+    regions = [name for name in vars(MurfEnvironment.DEFAULT)]
+    environment = MurfEnvironment(**{name: upstream + '/murf' for name in regions})
+    return Murf(api_key='bench', environment=environment, httpx_client=httpx_client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--upstream', required=True, help='base URL of fake_upstreams.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    import server
+    from werkzeug.serving import make_server
+
+    # After the import, which configures the real clients from the environment
+    server.murf_client = point_clients_at(args.upstream.rstrip('/'))
+    http_server = make_server(args.host, args.port, server.app, threaded=True)
+    print(f"listening on http://{args.host}:{http_server.server_port}", flush=True)
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
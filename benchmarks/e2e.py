@@ -0,0 +1,275 @@
+"""End-to-end load benchmark of POST /translate against fake upstream services.
+
+Starts fake_upstreams.py and bench_server.py as child processes, then for each
+concurrency level runs that many clients, each queueing dubbing jobs for fresh
+video IDs and following the job's event stream until it finishes. Reports
+throughput, p50/p95/p99 job latency and the server's peak RSS per level:
+
+    python benchmarks/e2e.py --levels 1,4,16,64 --latency murf_tts=800 --failure-rate google=0.02
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from fake_upstreams import add_upstream_arguments
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds to wait for a child process to start answering requests
+STARTUP_TIMEOUT = 60
+# Seconds between RSS samples of the server process
+RSS_SAMPLE_SECONDS = 0.1
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[1]} exited with code {process.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {STARTUP_TIMEOUT}s")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class RssSampler:
+    """Tracks the peak resident set size of a process from /proc (Linux only)."""
+
+    def __init__(self, pid):
+        self.path = f'/proc/{pid}/status'
+        self.peak_kb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _read_kb(self):
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self._read_kb()
+            if rss is not None:
+                self.peak_kb = max(self.peak_kb or 0, rss)
+            self._stop.wait(RSS_SAMPLE_SECONDS)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def random_video_id(rng):
+    return ''.join(rng.choice(string.ascii_letters + string.digits + '-_') for _ in range(11))
+
+
+def run_one(server_url, video_id, args):
+    """Queue one dub and follow its events; return (seconds, error or None)."""
+    started = time.perf_counter()
+    try:
+        response = requests.post(f"{server_url}/translate", json={
+            'videoUrl': f"https://www.youtube.com/watch?v={video_id}",
+            'voiceId': args.voice_id,
+            'targetLanguage': args.target_language,
+        }, timeout=args.request_timeout)
+        response.raise_for_status()
+        job = response.json()
+        if job.get('status') == 'completed':
+            return time.perf_counter() - started, None
+
+        status, error = None, None
+        with requests.get(f"{server_url}{job['eventsUrl']}", stream=True, timeout=args.request_timeout) as events:
+            events.raise_for_status()
+            for line in events.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data: '):
+                    continue
+                event = json.loads(line[len('data: '):])
+                status, error = event['status'], event.get('error')
+                if status in ('completed', 'failed'):
+                    break
+        elapsed = time.perf_counter() - started
+        if status != 'completed':
+            return elapsed, error or f'job ended as {status}'
+        return elapsed, None
+    except Exception as e:
+        return time.perf_counter() - started, str(e)
+
+
+def run_level(server_url, server_pid, concurrency, args, rng):
+    latencies, succeeded, errors = [], [], []
+    lock = threading.Lock()
+    video_ids = [[random_video_id(rng) for _ in range(args.requests_per_client)] for _ in range(concurrency)]
+
+    def client(ids):
+        for video_id in ids:
+            elapsed, error = run_one(server_url, video_id, args)
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    errors.append(error)
+                else:
+                    succeeded.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(ids,)) for ids in video_ids]
+    with RssSampler(server_pid) as rss:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'wall_seconds': wall,
+        'throughput_per_minute': len(succeeded) / wall * 60 if wall else 0.0,
+        'p50_seconds': percentile(succeeded, 0.50),
+        'p95_seconds': percentile(succeeded, 0.95),
+        'p99_seconds': percentile(succeeded, 0.99),
+        'peak_rss_mb': rss.peak_kb / 1024 if rss.peak_kb is not None else None,
+    }
+
+
+def format_table(results):
+    def cell(value, spec):
+        return 'n/a' if value is None else format(value, spec)
+
+    lines = [f"{'clients':>7} {'requests':>8} {'errors':>6} {'jobs/min':>9} {'p50 s':>8} "
+             f"{'p95 s':>8} {'p99 s':>8} {'peak RSS MB':>11}"]
+    for r in results:
+        lines.append(
+            f"{r['concurrency']:>7} {r['requests']:>8} {r['errors']:>6} {r['throughput_per_minute']:>9.2f} "
+            f"{cell(r['p50_seconds'], '>8.2f')} {cell(r['p95_seconds'], '>8.2f')} "
+            f"{cell(r['p99_seconds'], '>8.2f')} {cell(r['peak_rss_mb'], '>11.1f')}")
+    return '\n'.join(lines)
+
+
+def upstream_arguments(args):
+    """Re-serialize the fake upstream options for the child process."""
+    forwarded = ['--jitter', str(args.jitter), '--transcript-minutes', str(args.transcript_minutes)]
+    for setting in args.latency or []:
+        forwarded += ['--latency', setting]
+    for setting in args.failure_rate or []:
+        forwarded += ['--failure-rate', setting]
+    if args.seed is not None:
+        forwarded += ['--seed', str(args.seed)]
+    return forwarded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--levels', default='1,4,16,64', help='comma-separated concurrency levels')
+    parser.add_argument('--requests-per-client', type=int, default=2)
+    parser.add_argument('--voice-id', default='en-US-natalie')
+    parser.add_argument('--target-language', default='hi-IN')
+    parser.add_argument('--job-workers', type=int, help='JOB_WORKERS for the server (its default if omitted)')
+    parser.add_argument('--request-timeout', type=float, default=1800)
+    parser.add_argument('--server-log', help='file for the server output (default: in the scratch directory)')
+    parser.add_argument('--json', help='also write the results to this file')
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',') if level.strip()]
+
+    scratch = tempfile.mkdtemp(prefix='dub_bench_')
+    server_log_path = args.server_log or os.path.join(scratch, 'server.log')
+    upstream_url = f"http://127.0.0.1:{free_port()}"
+    server_url = f"http://127.0.0.1:{free_port()}"
+
+    env = dict(os.environ,
+               PYTHONUNBUFFERED='1',
+               TTS_CACHE_DIR=os.path.join(scratch, 'tts_cache'),
+               TRANSLATION_CACHE_PATH=os.path.join(scratch, 'translation_cache.sqlite3'),
+               RESULT_INDEX_PATH=os.path.join(scratch, 'result_index.sqlite3'))
+    if args.job_workers:
+        env['JOB_WORKERS'] = str(args.job_workers)
+
+    processes = []
+    with open(server_log_path, 'w') as server_log:
+        try:
+            upstream = subprocess.Popen(
+                [sys.executable, os.path.join(BENCH_DIR, 'fake_upstreams.py'),
+                 '--port', upstream_url.rsplit(':', 1)[1]] + upstream_arguments(args),
+                stdout=subprocess.DEVNULL)
+            processes.append(upstream)
+            wait_until_ready(f"{upstream_url}/_stats", upstream)
+
+            # Files the server writes to its working directory stay out of the repo
+            server = subprocess.Popen(
+                [sys.executable, os.path.join(BENCH_DIR, 'bench_server.py'),
+                 '--upstream', upstream_url, '--port', server_url.rsplit(':', 1)[1]],
+                stdout=server_log, stderr=subprocess.STDOUT, cwd=scratch, env=env)
+            processes.append(server)
+            wait_until_ready(f"{server_url}/metrics", server)
+
+            rng = random.Random(args.seed)
+            results = []
+            for concurrency in levels:
+                print(f"Running {concurrency} concurrent client(s)...", flush=True)
+                results.append(run_level(server_url, server.pid, concurrency, args, rng))
+            upstream_stats = requests.get(f"{upstream_url}/_stats", timeout=10).json()
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    print()
+    print(format_table(results))
+    for r in results:
+        for sample in r['error_samples']:
+            print(f"  {r['concurrency']} clients, error: {sample}")
+    print()
+    print('Upstream requests:', ', '.join(f"{service}={count}" for service, count in sorted(upstream_stats['requests'].items())))
+    if upstream_stats['failures']:
+        print('Injected failures:', ', '.join(f"{service}={count}" for service, count in sorted(upstream_stats['failures'].items())))
+    print(f"Server log: {server_log_path}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'levels': results, 'upstream': upstream_stats}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
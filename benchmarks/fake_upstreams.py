@@ -0,0 +1,318 @@
+"""Local stand-ins for every upstream service the dubbing pipeline talks to.
+
+One HTTP server answers for YouTube (watch page and timed text), the yt-dlp
+subtitle fetches, Google Translate, Murf (TTS, streaming TTS, translation and
+generated audio files) and Cloudinary uploads. Every service has its own
+injectable latency and failure rate, so benchmarks run without network access
+and with reproducible upstream behaviour.
+
+Run it standalone with:
+
+    python benchmarks/fake_upstreams.py --port 8900 --latency murf_tts=800 --failure-rate google=0.02
+"""
+import argparse
+import html
+import json
+import random
+import re
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Default latency per request (milliseconds), roughly what the real services take
+DEFAULT_LATENCY_MS = {
+    'youtube': 150,
+    'ytdlp': 300,
+    'google': 250,
+    'murf_tts': 1200,
+    'murf_translate': 400,
+    'murf_audio': 80,
+    'cloudinary': 500,
+}
+
+# Synthetic transcripts: one caption line every CAPTION_SECONDS of video
+CAPTION_SECONDS = 3.0
+# Speaking rate used to size synthesized audio
+CHARACTERS_PER_SECOND = 15.0
+
+_WORDS = (
+    'the quick brown fox jumps over a lazy dog while we talk about video dubbing '
+    'translation speech latency throughput and the many ways a pipeline can be slow'
+).split()
+
+# One silent MPEG-1 Layer III frame: 128 kbit/s, 44.1 kHz, mono, 417 bytes
+_MP3_FRAME = b'\xff\xfb\x90\xc4' + b'\x00' * 413
+_MP3_FRAME_SECONDS = 1152 / 44100
+
+
+def caption_lines(video_id, minutes):
+    """Deterministic caption lines [(start, duration, text)] for a fake video."""
+    rng = random.Random(video_id)
+    lines = []
+    for i in range(int(minutes * 60 / CAPTION_SECONDS)):
+        words = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12)))
+        lines.append((i * CAPTION_SECONDS, CAPTION_SECONDS, f"{words.capitalize()}."))
+    return lines
+
+
+def webvtt(lines):
+    """Render caption lines as a WebVTT document."""
+    def stamp(seconds):
+        return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+    cues = [f"{stamp(start)} --> {stamp(start + duration)}\n{text}\n" for start, duration, text in lines]
+    return 'WEBVTT\n\n' + '\n'.join(cues)
+
+
+def silent_mp3(seconds):
+    return _MP3_FRAME * max(1, int(seconds / _MP3_FRAME_SECONDS))
+
+
+def silent_wav(seconds, sample_rate=16000):
+    data_size = int(seconds * sample_rate) * 2
+    header = struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, 1, 1,
+                         sample_rate, sample_rate * 2, 2, 16, b'data', data_size)
+    return header + b'\x00' * data_size
+
+
+class UpstreamConfig:
+    """Latency, jitter and failure injection per service, plus request counters."""
+
+    def __init__(self, latency_ms=None, failure_rate=None, jitter=0.2, transcript_minutes=10, seed=None):
+        self.latency_ms = dict(DEFAULT_LATENCY_MS, **(latency_ms or {}))
+        self.failure_rate = dict(failure_rate or {})
+        self.jitter = jitter
+        self.transcript_minutes = transcript_minutes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.failures = {}
+
+    def delay(self, service):
+        """Sleep for the service latency and return True if this request should fail."""
+        with self._lock:
+            self.requests[service] = self.requests.get(service, 0) + 1
+            spread = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            fail = self._random.random() < self.failure_rate.get(service, 0.0)
+            if fail:
+                self.failures[service] = self.failures.get(service, 0) + 1
+        time.sleep(max(0.0, self.latency_ms.get(service, 0) * spread / 1000))
+        return fail
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.requests), 'failures': dict(self.failures)}
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None  # UpstreamConfig, set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def _send(self, status, body, content_type):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, json.dumps(payload), 'application/json')
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self._read_body() if method == 'POST' else b''
+
+        for pattern, service, handler in self.routes:
+            match = re.fullmatch(pattern, url.path)
+            if match and handler.__name__.startswith(method.lower()):
+                if service and self.config.delay(service):
+                    self._send_json({'error': f'injected {service} failure'}, status=503)
+                    return
+                handler(self, query, body, *match.groups())
+                return
+        self._send_json({'error': f'no fake for {method} {url.path}'}, status=404)
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    # YouTube watch page and timed text, as read by youtube-transcript-api
+    def get_watch_page(self, query, body):
+        video_id = query.get('v', '')
+        captions = {
+            'playerCaptionsTracklistRenderer': {
+                'captionTracks': [{
+                    'baseUrl': f"{self.base_url}/youtube/timedtext?v={video_id}",
+                    'name': {'simpleText': 'English (auto-generated)'},
+                    'languageCode': 'en',
+                    'kind': 'asr',
+                    'isTranslatable': False,
+                }],
+                'translationLanguages': [],
+            }
+        }
+        page = ('<html><body><script>var ytInitialPlayerResponse = {"playabilityStatus":{"status":"OK"},'
+                f'"captions":{json.dumps(captions)},"videoDetails":{{"videoId":"{video_id}"}}}};</script></body></html>')
+        self._send(200, page, 'text/html; charset=utf-8')
+
+    def get_timed_text(self, query, body):
+        lines = caption_lines(query.get('v', ''), self.config.transcript_minutes)
+        xml = '<?xml version="1.0" encoding="utf-8" ?><transcript>' + ''.join(
+            f'<text start="{start:.2f}" dur="{duration:.2f}">{html.escape(text)}</text>'
+            for start, duration, text in lines
+        ) + '</transcript>'
+        self._send(200, xml, 'text/xml; charset=utf-8')
+
+    # yt-dlp subtitle lookups
+    def get_ytdlp_info(self, query, body):
+        video_id = query.get('v', '')
+        self._send_json({
+            'id': video_id,
+            'subtitles': {'en': [{'ext': 'vtt', 'url': f"{self.base_url}/ytdlp/subtitles?v={video_id}"}]},
+            'automatic_captions': {},
+        })
+
+    def get_ytdlp_subtitles(self, query, body):
+        vtt = webvtt(caption_lines(query.get('v', ''), self.config.transcript_minutes))
+        self._send(200, vtt, 'text/vtt; charset=utf-8')
+
+    # Google Translate's mobile page, as scraped by deep-translator
+    def get_google_translate(self, query, body):
+        translated = f"[{query.get('tl', '')}] {query.get('q', '')}"
+        self._send(200, f'<html><body><div class="t0">{html.escape(translated)}</div></body></html>',
+                   'text/html; charset=utf-8')
+
+    # Murf REST API
+    def post_murf_generate(self, query, body):
+        text = json.loads(body or b'{}').get('text', '')
+        seconds = max(1.0, len(text) / CHARACTERS_PER_SECOND)
+        self._send_json({
+            'audioFile': f"{self.base_url}/murf/audio/{len(text)}.mp3",
+            'audioLengthInSeconds': seconds,
+            'consumedCharacterCount': len(text),
+            'remainingCharacterCount': 1000000,
+            'wordDurations': [],
+        })
+
+    def post_murf_stream(self, query, body):
+        text = json.loads(body or b'{}').get('text', '')
+        self._send(200, silent_wav(max(1.0, len(text) / CHARACTERS_PER_SECOND)), 'audio/wav')
+
+    def post_murf_translate(self, query, body):
+        payload = json.loads(body or b'{}')
+        language = payload.get('targetLanguage') or payload.get('target_language', '')
+        self._send_json({'translations': [
+            {'source_text': text, 'translated_text': f"[{language}] {text}"}
+            for text in payload.get('texts', [])
+        ]})
+
+    def get_murf_audio(self, query, body, characters):
+        self._send(200, silent_mp3(max(1.0, int(characters) / CHARACTERS_PER_SECOND)), 'audio/mpeg')
+
+    # Cloudinary upload API
+    def post_cloudinary_upload(self, query, body, cloud_name, resource_type):
+        public_id = re.search(rb'name="public_id"\r\n\r\n([^\r]*)', body)
+        public_id = public_id.group(1).decode('utf-8') if public_id else 'upload'
+        self._send_json({
+            'public_id': public_id,
+            'bytes': len(body),
+            'resource_type': resource_type,
+            'secure_url': f"{self.base_url}/cloudinary/files/{public_id}",
+        })
+
+    # Harness endpoint
+    def get_stats(self, query, body):
+        self._send_json(self.config.stats())
+
+    routes = [
+        (r'/youtube/watch', 'youtube', get_watch_page),
+        (r'/youtube/timedtext', 'youtube', get_timed_text),
+        (r'/ytdlp/info', 'ytdlp', get_ytdlp_info),
+        (r'/ytdlp/subtitles', 'ytdlp', get_ytdlp_subtitles),
+        (r'/google/m', 'google', get_google_translate),
+        (r'/murf/v1/speech/generate', 'murf_tts', post_murf_generate),
+        (r'/murf/v1/speech/stream', 'murf_tts', post_murf_stream),
+        (r'/murf/v1/text/translate', 'murf_translate', post_murf_translate),
+        (r'/murf/audio/(\d+)\.mp3', 'murf_audio', get_murf_audio),
+        (r'/cloudinary/v1_1/([^/]+)/([^/]+)/upload', 'cloudinary', post_cloudinary_upload),
+        (r'/_stats', None, get_stats),
+    ]
+
+
+def make_server(config, host='127.0.0.1', port=0):
+    """Create (but do not start) a threaded fake upstream server bound to host:port."""
+    handler = type('ConfiguredUpstreamHandler', (FakeUpstreamHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_service_values(items, cast=float):
+    """Turn ['murf_tts=800', 'google=250'] into {'murf_tts': 800.0, 'google': 250.0}."""
+    values = {}
+    for item in items or []:
+        service, _, value = item.partition('=')
+        if service not in DEFAULT_LATENCY_MS:
+            raise argparse.ArgumentTypeError(f"unknown service {service!r}; expected one of {sorted(DEFAULT_LATENCY_MS)}")
+        values[service] = cast(value)
+    return values
+
+
+def add_upstream_arguments(parser):
+    parser.add_argument('--latency', action='append', metavar='SERVICE=MS',
+                        help=f"per-request latency of a fake service (default: {DEFAULT_LATENCY_MS})")
+    parser.add_argument('--failure-rate', action='append', metavar='SERVICE=P',
+                        help='probability that a request to the service fails with HTTP 503')
+    parser.add_argument('--jitter', type=float, default=0.2, help='relative latency jitter (default: 0.2)')
+    parser.add_argument('--transcript-minutes', type=float, default=10, help='length of fake videos (default: 10)')
+    parser.add_argument('--seed', type=int, default=None, help='seed for jitter and failure injection')
+
+
+def config_from_args(args):
+    return UpstreamConfig(
+        latency_ms=parse_service_values(args.latency),
+        failure_rate=parse_service_values(args.failure_rate),
+        jitter=args.jitter,
+        transcript_minutes=args.transcript_minutes,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(config_from_args(args), args.host, args.port)
+    print(f"listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
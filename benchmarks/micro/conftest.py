@@ -0,0 +1,161 @@
+"""Shared fixtures for the micro-benchmarks of the text and timing hot paths.
+
+Run from the repository root:
+
+    python -m pytest benchmarks/micro
+
+Every run checks how the cost grows with the transcript length: the time per
+transcript minute of the longest input may be at most SCALING_LIMIT times that
+of the 10 minute one. Linear code stays well inside that on any machine, even
+a noisy shared VM, while accidentally quadratic code on long transcripts blows
+through it.
+
+Absolute timings are specific to a machine, so comparing them is opt-in and
+only meaningful against a baseline recorded on the same machine (baselines/
+is keyed by platform, interpreter and word size). Record one from the
+unchanged tree, then run the gate with the change applied:
+
+    python -m pytest benchmarks/micro --benchmark-save=baseline
+    python -m pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=mean:35%
+
+The second command fails when a mean slows down by more than 35%. Timings of
+the shortest inputs are the noisiest, so their threshold is scaled up by
+REGRESSION_THRESHOLD_SCALE. On a shared VM single runs can still swing past
+that, so re-run before trusting a failure. The committed baseline is the
+reference VM's; local baselines land next to it and are not meant to be
+committed.
+"""
+import os
+import re
+import sys
+from collections import defaultdict
+
+import pytest
+from pytest_benchmark.utils import PercentageRegressionCheck, get_machine_id
+
+BENCH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'backend'))
+sys.path.insert(0, REPO_ROOT)  # ahead of backend/, so `server` is the root server
+
+from fake_upstreams import caption_lines, webvtt  # noqa: E402
+
+# Synthetic video lengths, from a short clip to a five hour stream
+TRANSCRIPT_MINUTES = [1, 10, 60, 300]
+
+# Multiplier of the --benchmark-compare-fail percentage per transcript length;
+# microsecond-scale runs swing far more between runs than the long ones
+REGRESSION_THRESHOLD_SCALE = {1: 1.5, 10: 1.25, 60: 1.0, 300: 1.0}
+
+# Allowed growth of the time per transcript minute from the reference length
+# to the longest one; linear code stays within about 2x, quadratic code grows
+# with the length ratio (30x)
+SCALING_LIMIT = 4.0
+SCALING_REFERENCE_MINUTES = 10
+
+_MINUTES_PARAM = re.compile(r'\[(\d+)min\b')
+_MINUTES_ID = re.compile(r'\d+min-?')
+
+# Benchmark id without the length -> {minutes: fastest round per transcript minute}
+_cost_per_minute = defaultdict(dict)
+_scaling_failures = []
+
+
+class ScaledRegressionCheck(PercentageRegressionCheck):
+    """Percentage check whose threshold depends on the benchmark's transcript length."""
+
+    def fails(self, current, compared):
+        match = _MINUTES_PARAM.search(compared['name'])
+        scale = REGRESSION_THRESHOLD_SCALE.get(int(match.group(1)), 1.0) if match else 1.0
+        value = self.compute(current, compared)
+        threshold = self.threshold * scale
+        if value > threshold:
+            return f'Field {self.field!r} regressed by {value:.1f}% (allowed {threshold:.0f}%)'
+
+
+def pytest_configure(config):
+    # Runs before pytest-benchmark opens its storage, so an unset
+    # --benchmark-storage still finds the committed baselines from any directory
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + BASELINE_DIR
+
+    checks = config.getoption('benchmark_compare_fail', None)
+    if not checks:
+        return
+    machine_dir = os.path.join(BASELINE_DIR, get_machine_id())
+    if config.option.benchmark_storage == 'file://' + BASELINE_DIR and not (
+            os.path.isdir(machine_dir) and any(name.endswith('.json') for name in os.listdir(machine_dir))):
+        # Nothing to compare with yet; let the run record the first baseline
+        print(f"No baseline for {get_machine_id()}; skipping the regression check")
+        config.option.benchmark_compare = []
+        config.option.benchmark_compare_fail = None
+        return
+    config.option.benchmark_compare_fail = [
+        ScaledRegressionCheck(check.field, check.threshold) if type(check) is PercentageRegressionCheck else check
+        for check in checks
+    ]
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    yield
+    benchmark = item.funcargs.get('benchmark')
+    minutes = item.funcargs.get('minutes')
+    if benchmark is None or minutes is None or benchmark.stats is None:  # stats is None under --benchmark-disable
+        return
+    _cost_per_minute[_MINUTES_ID.sub('', item.nodeid)][minutes] = benchmark.stats.stats.min / minutes
+
+
+def pytest_sessionfinish(session):
+    for name, costs in sorted(_cost_per_minute.items()):
+        longest = max(costs)
+        if SCALING_REFERENCE_MINUTES not in costs or longest <= SCALING_REFERENCE_MINUTES:
+            continue
+        growth = costs[longest] / costs[SCALING_REFERENCE_MINUTES]
+        if growth > SCALING_LIMIT:
+            _scaling_failures.append(
+                f"{name}: time per minute grew {growth:.1f}x from {SCALING_REFERENCE_MINUTES}min "
+                f"to {longest}min (allowed {SCALING_LIMIT:g}x)")
+    if _scaling_failures:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _scaling_failures:
+        terminalreporter.section('cost does not scale linearly', red=True)
+        for line in _scaling_failures:
+            terminalreporter.line(line)
+
+
+@pytest.fixture(params=TRANSCRIPT_MINUTES, ids=lambda minutes: f'{minutes}min')
+def minutes(request):
+    return request.param
+
+
+@pytest.fixture
+def transcript_segments(minutes):
+    """Timed segments as returned by the transcript API, [{'text', 'start', 'duration'}]."""
+    return [{'text': text, 'start': start, 'duration': duration}
+            for start, duration, text in caption_lines('benchmark', minutes)]
+
+
+@pytest.fixture
+def transcript_text(transcript_segments):
+    return ' '.join(segment['text'] for segment in transcript_segments)
+
+
+@pytest.fixture
+def vtt_content(minutes):
+    return webvtt(caption_lines('benchmark', minutes))
+
+
+@pytest.fixture
+def rolling_vtt_content(minutes):
+    """Auto-caption style WebVTT: every cue repeats the previous line before the new one."""
+    lines = caption_lines('benchmark', minutes)
+    previous = [''] + [text for _, _, text in lines[:-1]]
+    return webvtt([(start, duration, f"{before}\n{text}".lstrip('\n'))
+                   for (start, duration, text), before in zip(lines, previous)])
@@ -0,0 +1,21 @@
+"""Chunking of transcript text before translation and speech synthesis."""
+import pytest
+
+import main as backend_main
+from text_chunking import CHUNK_BUDGETS, chunk_text
+
+
+@pytest.mark.parametrize('provider', sorted(CHUNK_BUDGETS))
+def test_chunk_text(benchmark, transcript_text, provider):
+    chunks = benchmark(chunk_text, transcript_text, provider)
+    assert all(len(chunk) <= CHUNK_BUDGETS[provider][0] for chunk in chunks)
+
+
+def test_chunk_text_bytes(benchmark, transcript_text):
+    chunks = benchmark(chunk_text, transcript_text, max_size=4500, unit='bytes')
+    assert all(len(chunk.encode('utf-8')) <= 4500 for chunk in chunks)
+
+
+def test_group_transcript_segments(benchmark, transcript_segments):
+    groups = benchmark(backend_main.group_transcript_segments, transcript_segments)
+    assert sum(len(group['segments']) for group in groups) == len(transcript_segments)
@@ -0,0 +1,25 @@
+"""Parsing and writing of subtitle and timestamped transcript files."""
+import main as backend_main
+from subtitles import parse_subtitles
+
+
+def test_parse_subtitles(benchmark, vtt_content):
+    segments = benchmark(lambda: list(parse_subtitles(vtt_content.splitlines(True))))
+    assert segments and all(segment['duration'] > 0 for segment in segments)
+
+
+def test_parse_subtitles_rolling(benchmark, rolling_vtt_content, transcript_segments):
+    segments = benchmark(lambda: list(parse_subtitles(rolling_vtt_content.splitlines(True))))
+    assert len(segments) == len(transcript_segments)
+
+
+def test_save_transcript_with_timestamps(benchmark, transcript_segments, tmp_path):
+    output_file = str(tmp_path / 'transcript.txt')
+    assert benchmark(backend_main.save_transcript_with_timestamps, transcript_segments, output_file)
+
+
+def test_read_transcript_with_timestamps(benchmark, transcript_segments, tmp_path):
+    transcript_file = str(tmp_path / 'transcript.txt')
+    backend_main.save_transcript_with_timestamps(transcript_segments, transcript_file)
+    segments = benchmark(backend_main.read_transcript_with_timestamps, transcript_file)
+    assert len(segments) == len(transcript_segments)
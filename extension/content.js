@@ -69,6 +69,231 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     }
 });
 
+const API_BASE_URL = 'http://localhost:5000';
+const JOB_POLL_INTERVAL_MS = 2000;
+// Seconds of dubbed audio that must be ready before streamed playback starts
+const STREAM_START_BUFFER_SECONDS = 60;
+
+// Map backend error messages to something friendlier for the user
+function describeTranslationError(error) {
+    if (!error) {
+        return 'Translation service error';
+    }
+    if (error.includes('captions available')) {
+        return 'This video does not have captions available. Please try a different video.';
+    }
+    if (error.includes('Invalid YouTube URL')) {
+        return 'Invalid YouTube URL. Please make sure you are on a YouTube video page.';
+    }
+    return error;
+}
+
+// Poll a queued translation job until it completes and return its result
+async function waitForTranslationJob(jobId) {
+    let lastStage = null;
+    while (true) {
+        const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok) {
+            throw new Error(describeTranslationError(job.error));
+        }
+        if (job.stage !== lastStage) {
+            console.log(`Translation job ${jobId}: ${job.stage} (${Math.round(job.progress * 100)}%) - ${job.message}`);
+            lastStage = job.stage;
+        }
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(describeTranslationError(job.error));
+        }
+
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+}
+
+// Plays the pieces of a streamed dub back to back through one audio element,
+// exposing the subset of the <audio> interface the video controls rely on
+class ProgressiveDubPlayer {
+    // clock returns the video's current time, which piece starts refer to
+    constructor(audioElement, clock) {
+        this.audio = audioElement;
+        this.clock = clock;
+        this.pieces = [];
+        this.complete = false;
+        this.index = -1; // -1 while the video is past the published audio
+        this.waitTimer = null;
+        this.playing = false;
+        this.detached = false;
+        this.onEnded = () => this.advance();
+        this.audio.addEventListener('ended', this.onEnded);
+    }
+
+    // Stop driving the shared audio element once another dub replaces this one
+    detach() {
+        this.detached = true;
+        this.cancelWait();
+        this.audio.removeEventListener('ended', this.onEnded);
+        this.audio.pause();
+    }
+
+    get bufferedDuration() {
+        const last = this.pieces[this.pieces.length - 1];
+        return last ? last.start + last.duration : 0;
+    }
+
+    addPieces(pieces, complete) {
+        for (const piece of pieces.slice(this.pieces.length)) {
+            this.pieces.push({ ...piece, url: `${API_BASE_URL}${piece.url}` });
+        }
+        this.complete = complete;
+        const time = this.clock();
+        if (this.index === -1 && time < this.bufferedDuration) {
+            this.seek(time);
+        }
+    }
+
+    seek(time) {
+        if (this.detached) {
+            return;
+        }
+        this.cancelWait();
+        const index = this.pieces.findIndex(piece => time < piece.start + piece.duration);
+        if (index === -1) {
+            // Past the published audio: resume once the next piece arrives
+            this.index = -1;
+            this.audio.pause();
+            return;
+        }
+        const piece = this.pieces[index];
+        if (index !== this.index) {
+            this.index = index;
+            this.audio.src = piece.url;
+        }
+        this.audio.currentTime = Math.max(0, time - piece.start);
+        this.resume(piece.start - time).catch(error => {
+            console.error('Error playing translated audio:', error);
+        });
+    }
+
+    // Move on to the next piece explicitly: a piece whose header is slightly
+    // longer than its audio would otherwise be found again by seek()
+    advance() {
+        this.cancelWait();
+        const next = this.pieces[this.index + 1];
+        if (!next) {
+            // Not published yet: addPieces() picks up at the video's position
+            this.index = -1;
+            this.audio.pause();
+            return;
+        }
+        this.index += 1;
+        this.audio.src = next.url;
+        this.audio.currentTime = 0;
+        this.resume(next.start - this.clock()).catch(error => {
+            console.error('Error playing translated audio:', error);
+        });
+    }
+
+    // Play the current piece, first waiting delay seconds if the video has not
+    // reached it yet: dubbed speech can be shorter than the original, and
+    // starting early would put every later piece ahead of the video
+    resume(delay) {
+        if (!this.playing) {
+            return Promise.resolve();
+        }
+        if (delay > 0) {
+            this.audio.pause();
+            this.waitTimer = setTimeout(() => {
+                this.waitTimer = null;
+                this.resume(this.pieces[this.index].start - this.clock()).catch(error => {
+                    console.error('Error playing translated audio:', error);
+                });
+            }, delay * 1000 / (this.audio.playbackRate || 1));
+            return Promise.resolve();
+        }
+        return this.audio.play();
+    }
+
+    cancelWait() {
+        if (this.waitTimer !== null) {
+            clearTimeout(this.waitTimer);
+            this.waitTimer = null;
+        }
+    }
+
+    get currentTime() {
+        const piece = this.pieces[this.index];
+        return piece ? piece.start + this.audio.currentTime : this.clock();
+    }
+
+    set currentTime(time) {
+        this.seek(time);
+    }
+
+    play() {
+        this.playing = true;
+        if (this.index === -1) {
+            return Promise.resolve();
+        }
+        this.cancelWait();
+        return this.resume(this.pieces[this.index].start - this.clock());
+    }
+
+    pause() {
+        this.playing = false;
+        this.cancelWait();
+        this.audio.pause();
+    }
+
+    get volume() { return this.audio.volume; }
+    set volume(value) { this.audio.volume = value; }
+
+    get muted() { return this.audio.muted; }
+    set muted(value) { this.audio.muted = value; }
+
+    get playbackRate() { return this.audio.playbackRate; }
+    set playbackRate(rate) {
+        // Loading the next piece resets playbackRate to the default
+        this.audio.defaultPlaybackRate = rate;
+        this.audio.playbackRate = rate;
+    }
+}
+
+// Feed published pieces to the player until the job finishes. Resolves once
+// enough audio is buffered to start playback; polling continues after that.
+function followDubManifest(manifestUrl, player) {
+    return new Promise((resolve, reject) => {
+        let started = false;
+        const poll = async () => {
+            try {
+                const response = await fetch(`${API_BASE_URL}${manifestUrl}`);
+                const manifest = await response.json();
+                if (!response.ok || manifest.status === 'failed') {
+                    throw new Error(describeTranslationError(manifest.error));
+                }
+                player.addPieces(manifest.pieces, manifest.complete);
+                if (!started && (manifest.complete || player.bufferedDuration >= STREAM_START_BUFFER_SECONDS)) {
+                    started = true;
+                    resolve(player);
+                }
+                // Stop once the dub is complete or has been replaced by another one
+                if (!manifest.complete && !player.detached && (!started || translatedAudio === player)) {
+                    setTimeout(poll, JOB_POLL_INTERVAL_MS);
+                }
+            } catch (error) {
+                if (started) {
+                    console.error('Dub streaming error:', error);
+                } else {
+                    reject(error);
+                }
+            }
+        };
+        poll();
+    });
+}
+
 async function handleVideoTranslation(voiceId) {
     try {
         console.log('Starting video translation...');
@@ -89,7 +314,7 @@ async function handleVideoTranslation(voiceId) {
         originalVolume = video.volume;console.log('Calling backend API...');
         console.log('Voice ID being sent:', voiceId);
         // Call backend API to process video
-        const response = await fetch('http://localhost:5000/translate', {
+        const response = await fetch(`${API_BASE_URL}/translate`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -97,58 +322,59 @@ async function handleVideoTranslation(voiceId) {
             body: JSON.stringify({
                 videoUrl,
                 voiceId,
-                targetLanguage: 'hi-IN'
+                targetLanguage: 'hi-IN',
+                stream: true
             })
         });
 
-        const data = await response.json();
+        const job = await response.json();
         
         if (!response.ok) {
-            let errorMessage = 'Translation service error';
-            if (data.error) {
-                if (data.error.includes('captions available')) {
-                    errorMessage = 'This video does not have captions available. Please try a different video.';
-                } else if (data.error.includes('Invalid YouTube URL')) {
-                    errorMessage = 'Invalid YouTube URL. Please make sure you are on a YouTube video page.';
-                } else {
-                    errorMessage = data.error;
-                }
-            }
-            throw new Error(errorMessage);
+            throw new Error(describeTranslationError(job.error));
+        }
+
+        // The previous streaming dub must stop changing the reused element
+        if (translatedAudio instanceof ProgressiveDubPlayer) {
+            translatedAudio.detach();
         }
 
-        console.log('Received audio URL:', data.audioUrl);
-        
         // Create or get visible audio element
         let audioElement = document.getElementById('murfai-translated-audio');
         if (!audioElement) {
             audioElement = createHiddenAudioElement();
         }
-
-        // Set audio source and properties
-        audioElement.src = data.audioUrl;
-        audioElement.muted = false;        
+        audioElement.muted = false;
         audioElement.volume = 1;
-
         audioElement.loop = false;
-        translatedAudio = audioElement;
 
-        // Wait for audio to be loaded
-        await new Promise((resolve, reject) => {
-            audioElement.addEventListener('canplaythrough', resolve, { once: true });
-            audioElement.addEventListener('error', () => reject(new Error('Failed to load audio. Please try again.')), { once: true });
-            audioElement.load();
-        });
+        if (job.audioUrl || !job.manifestUrl) {
+            // Finished dubs come back immediately; otherwise wait for the queued job
+            const data = job.audioUrl ? job : await waitForTranslationJob(job.jobId);
+            console.log('Received audio URL:', data.audioUrl);
+            audioElement.src = data.audioUrl;
+            translatedAudio = audioElement;
+
+            // Wait for audio to be loaded
+            await new Promise((resolve, reject) => {
+                audioElement.addEventListener('canplaythrough', resolve, { once: true });
+                audioElement.addEventListener('error', () => reject(new Error('Failed to load audio. Please try again.')), { once: true });
+                audioElement.load();
+            });
+        } else {
+            // Start playing as soon as the first minute of the dub is published
+            console.log('Streaming dub for job:', job.jobId);
+            translatedAudio = await followDubManifest(job.manifestUrl, new ProgressiveDubPlayer(audioElement, () => video.currentTime));
+        }
 
         // Set up event listeners for video control
         setupVideoControls(video);
 
         // Mute original video
         video.volume = 0;        // Don't automatically start playing - wait for button click
-        audioElement.currentTime = video.currentTime;
+        translatedAudio.currentTime = video.currentTime;
         isPlaying = false;
-        audioElement.muted = false;
-        audioElement.volume = 1;
+        translatedAudio.muted = false;
+        translatedAudio.volume = 1;
 
         return true;
     } catch (error) {
@@ -248,6 +474,9 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
         console.log('Performing cleanup...');
         if (translatedAudio) {
             translatedAudio.pause();
+            if (translatedAudio instanceof ProgressiveDubPlayer) {
+                translatedAudio.detach();
+            }
             translatedAudio = null;
         }
         const audioElement = document.getElementById('murfai-translated-audio');
@@ -269,6 +498,9 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 window.addEventListener('beforeunload', () => {
     if (translatedAudio) {
         translatedAudio.pause();
+        if (translatedAudio instanceof ProgressiveDubPlayer) {
+            translatedAudio.detach();
+        }
         translatedAudio = null;
     }
     if (controlButton) {
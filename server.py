@@ -1,23 +1,38 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, TranscriptsDisabled, CouldNotRetrieveTranscript
+from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound, TranscriptsDisabled, CouldNotRetrieveTranscript
 from youtube_transcript_api.formatters import TextFormatter
 import re
-from deep_translator import GoogleTranslator
 import os
 from murf import Murf
-import requests
-import tempfile
 import uuid
-import shutil
 import time
 import json
 import subprocess
 import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
-import yt_dlp  # Alternative for transcript extraction
-import random
+import sys
+import threading
+from xml.etree.ElementTree import ParseError
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared pipeline helpers live in the backend package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from jobs import JobQueue, stream_events
+from result_index import result_index
+from transcript_cache import transcript_cache
+from transcript_window import parse_time_window, select_transcript_window, window_variant
+from text_chunking import chunk_text
+from video_info import extract_video_info, fetch_subtitle_segments, video_info_cache
+from audio_metadata import audio_duration, join_mp3
+from tts_cache import tts_cache
+from translation_cache import translation_cache
+from metrics import (metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE, stage_seconds, characters_total,
+                     upstream_request, upstream_retries_total, register_cache_metrics, register_job_metrics)
+from rate_limit import rate_limiter, retry_after_seconds, is_youtube_throttling_error
+from http_client import http_session, httpx_client, list_youtube_transcripts, PooledGoogleTranslator
 
 # Load environment variables
 load_dotenv()
@@ -32,7 +47,8 @@ else:
 
 # Initialize Murf client
 murf_client = Murf(
-    api_key=murf_api_key
+    api_key=murf_api_key,
+    httpx_client=httpx_client
 )
 
 # Configure Cloudinary
@@ -49,6 +65,39 @@ CORS(app)
 AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audio_files')
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+# Worker pool that runs dubbing pipelines outside the request threads
+job_queue = JobQueue()
+
+# Scrape-time metrics read from the caches and the job queue
+register_cache_metrics({
+    'transcript': transcript_cache,
+    'translation': translation_cache,
+    'tts': tts_cache,
+    'result_index': result_index,
+    'video_info': video_info_cache,
+})
+register_job_metrics(job_queue)
+
+# Result index variant for audio produced by this server's pipeline
+RESULT_VARIANT = 'text'
+
+# Maximum number of Murf chunk requests in flight for one text_to_speech call
+TTS_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', '4'))
+# Process-wide cap on concurrent Murf synthesis calls, across chunks, pieces and jobs
+TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', '4'))
+tts_slots = threading.BoundedSemaphore(TTS_MAX_CONCURRENCY)
+
+# Synthesized audio is streamed to disk in blocks of this size
+AUDIO_STREAM_BLOCK_SIZE = 64 * 1024
+
+# Shared by every thread that talks to YouTube, so one 429 slows all of them down
+youtube_limiter = rate_limiter('www.youtube.com')
+
+# Source characters per progressively delivered piece (roughly a minute of speech)
+STREAM_PIECE_CHARS = int(os.getenv('STREAM_PIECE_CHARS', '1000'))
+# Seconds published pieces are kept for listeners before they are deleted
+PIECE_RETENTION_SECONDS = int(os.getenv('PIECE_RETENTION_SECONDS', '3600'))
+
 # Language code mapping
 LANGUAGE_MAP = {
     'hi-IN': 'hi',  # Hindi
@@ -174,17 +223,43 @@ def extract_video_id(url):
             return match.group(1)
     return None
 
-def get_transcript(video_id):
-    """Get transcript for a YouTube video with improved error handling."""
+def load_transcript(video_id):
+    """Fetch a video's transcript, reusing recently fetched transcripts.
+
+    Returns (formatted_text, language_code, segments) like fetch_transcript.
+    """
+    cached = transcript_cache.get(video_id)
+    if cached:
+        print(f"Using cached transcript for video ID: {video_id}")
+        return cached['text'], cached['language_code'], cached['segments']
+    with stage_seconds.time(stage='transcript'):
+        formatted_transcript, language_code, segments = fetch_transcript(video_id)
+    transcript_cache.put(video_id, segments, language_code, formatted_transcript)
+    return formatted_transcript, language_code, segments
+
+def get_transcript(video_id, start_time=None, end_time=None):
+    """Get transcript for a YouTube video, reusing recently fetched transcripts.
+
+    With start_time/end_time (seconds) only the text spoken in that window is
+    returned, which needs a timed transcript.
+    """
+    formatted_transcript, language_code, segments = load_transcript(video_id)
+    if start_time is None and end_time is None:
+        return formatted_transcript, language_code
+    if not segments:
+        raise Exception('This video has no timed transcript, so it cannot be dubbed by time window')
+    window = select_transcript_window(segments, start_time, end_time)
+    print(f"Using {len(window)} of {len(segments)} transcript segments in the requested window")
+    return '\n'.join(segment['text'] for segment in window), language_code
+
+def fetch_transcript(video_id):
+    """Fetch transcript for a YouTube video with improved error handling.
+
+    Returns (formatted_text, language_code, segments).
+    """
     try:
         print(f"Attempting to get transcript for video ID: {video_id}")
         
-        # Setup session with random user agent to avoid blocking
-        session = setup_youtube_session()
-        
-        # Add delay to avoid rate limiting
-        time.sleep(random.uniform(1, 3))  # Random delay between 1-3 seconds
-        
         # Try to get transcript in any available language with retry logic
         max_list_retries = 3
         transcript_list = None
@@ -192,15 +267,18 @@ def get_transcript(video_id):
         for attempt in range(max_list_retries):
             try:
                 print(f"Attempting to list transcripts (attempt {attempt + 1}/{max_list_retries})...")
-                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+                youtube_limiter.acquire()
+                with upstream_request('youtube_transcript'):
+                    transcript_list = list_youtube_transcripts(video_id)
+                youtube_limiter.record_success()
                 print(f"Available transcripts found for video {video_id}")
                 break
             except Exception as list_error:
                 print(f"Error listing transcripts (attempt {attempt + 1}): {list_error}")
-                if attempt < max_list_retries - 1:
-                    wait_time = random.uniform(2, 5) * (attempt + 1)
-                    print(f"Waiting {wait_time:.1f} seconds before retry...")
-                    time.sleep(wait_time)
+                # Only throttling is worth retrying; the limiter then holds back every caller
+                if attempt < max_list_retries - 1 and is_youtube_throttling_error(list_error):
+                    youtube_limiter.record_throttled(retry_after_seconds(list_error))
+                    upstream_retries_total.inc(service='youtube_transcript')
                 else:
                     raise list_error
         
@@ -251,19 +329,12 @@ def get_transcript(video_id):
             try:
                 print(f"Fetching transcript data (attempt {retry_count + 1}/{max_retries})...")
                 
-                # Add progressive delay between retries to avoid rate limiting
-                if retry_count > 0:
-                    wait_time = min(5 + (retry_count * 3), 12)  # Progressive backoff, max 12 seconds
-                    print(f"Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
-                
-                # Clear any cached session data to avoid stale connections
-                session = setup_youtube_session()
-                
-                # Try to fetch transcript data with session management
-                transcript_data = transcript.fetch()
+                youtube_limiter.acquire()
+                with upstream_request('youtube_transcript'):
+                    transcript_data = transcript.fetch()
                 
                 if transcript_data and len(transcript_data) > 0:
+                    youtube_limiter.record_success()
                     print(f"Successfully got {len(transcript_data)} transcript segments")
                     break
                 else:
@@ -273,21 +344,24 @@ def get_transcript(video_id):
                 last_error = str(e)
                 print(f"Error fetching transcript data (attempt {retry_count + 1}): {last_error}")
                 
+                # Only throttling is worth retrying; anything else goes to the alternatives
+                if not is_youtube_throttling_error(e):
+                    break
+                
                 # Handle specific XML parsing errors - these usually indicate rate limiting or API issues
-                if ("no element found" in last_error.lower() or 
-                    "xml" in last_error.lower() or 
-                    "parsing" in last_error.lower() or
-                    "not well-formed" in last_error.lower()):
+                if isinstance(e, ParseError):
                     print("XML parsing error detected - likely YouTube API rate limiting or temporary issue")
                     
                     # For XML parsing errors, immediately try the fallback method after first failure
                     if retry_count == 0:
                         print("Trying yt-dlp fallback immediately due to XML parsing error...")
-                        fallback_transcript, fallback_lang = get_transcript_via_ytdlp(video_id)
-                        if fallback_transcript:
+                        fallback = get_transcript_via_ytdlp(video_id)
+                        if fallback[0]:
                             print("Successfully retrieved transcript using yt-dlp fallback")
-                            return fallback_transcript, fallback_lang
+                            return fallback
                 
+                youtube_limiter.record_throttled(retry_after_seconds(e))
+                upstream_retries_total.inc(service='youtube_transcript')
                 retry_count += 1
         
         if not transcript_data:
@@ -297,9 +371,11 @@ def get_transcript(video_id):
                 if alt_transcript != transcript:
                     try:
                         print(f"Trying alternative transcript: {alt_transcript.language_code}")
-                        time.sleep(2)  # Delay before trying alternative
-                        transcript_data = alt_transcript.fetch()
+                        youtube_limiter.acquire()
+                        with upstream_request('youtube_transcript'):
+                            transcript_data = alt_transcript.fetch()
                         if transcript_data and len(transcript_data) > 0:
+                            youtube_limiter.record_success()
                             print(f"Successfully got alternative transcript with {len(transcript_data)} segments")
                             transcript = alt_transcript
                             break
@@ -335,7 +411,7 @@ def get_transcript(video_id):
                 raise Exception("Could not format transcript data")
         
         print("Successfully formatted transcript")
-        return formatted_transcript, transcript.language_code
+        return formatted_transcript, transcript.language_code, transcript_data
     
     except TranscriptsDisabled:
         print("Transcripts are disabled for this video")
@@ -352,11 +428,11 @@ def get_transcript(video_id):
         
         # Try fallback method using yt-dlp
         print("Attempting fallback method using yt-dlp...")
-        fallback_transcript, fallback_lang = get_transcript_via_ytdlp(video_id)
+        fallback = get_transcript_via_ytdlp(video_id)
         
-        if fallback_transcript:
+        if fallback[0]:
             print("Successfully retrieved transcript using fallback method")
-            return fallback_transcript, fallback_lang
+            return fallback
         
         # If fallback also fails, provide more specific error messages
         if "no element found" in error_msg.lower():
@@ -369,108 +445,38 @@ def get_transcript(video_id):
             raise Exception(f"Could not get transcript using any method: {error_msg}")
 
 def get_transcript_via_ytdlp(video_id):
-    """Fallback method to get transcript using yt-dlp when YouTube Transcript API fails."""
+    """Fallback method to get transcript using yt-dlp when YouTube Transcript API fails.
+
+    The subtitle track is read straight from the URL in yt-dlp's info dict and
+    parsed in memory. Returns (formatted_text, language_code, segments) like
+    fetch_transcript, or Nones if no subtitles could be read.
+    """
     try:
         print(f"Attempting to get transcript via yt-dlp for video ID: {video_id}")
         
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        info = extract_video_info(video_id)
         
-        # Configure yt-dlp options for subtitle extraction
-        ydl_opts = {
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': ['en', 'en-US', 'en-GB', 'en-CA', 'en-AU'],
-            'subtitlesformat': 'vtt',
-            'skip_download': True,
-            'outtmpl': f'temp_subtitle_{video_id}',
-            'quiet': True,
-            'no_warnings': True
-        }
+        # Check if subtitles are available
+        if info.get('subtitles'):
+            print("Manual subtitles found")
+        elif info.get('automatic_captions'):
+            print("Automatic captions found")
+        else:
+            raise Exception("No subtitles available via yt-dlp")
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract info to check available subtitles
-            info = ydl.extract_info(video_url, download=False)
-            
-            # Check if subtitles are available
-            has_subtitles = False
-            if 'subtitles' in info and info['subtitles']:
-                has_subtitles = True
-                print("Manual subtitles found")
-            elif 'automatic_captions' in info and info['automatic_captions']:
-                has_subtitles = True
-                print("Automatic captions found")
-            
-            if not has_subtitles:
-                raise Exception("No subtitles available via yt-dlp")
-            
-            # Download subtitles
-            ydl.download([video_url])
-            
-            # Look for downloaded subtitle files
-            import glob
-            subtitle_patterns = [
-                f'temp_subtitle_{video_id}.*.vtt',
-                f'temp_subtitle_{video_id}.vtt'
-            ]
-            
-            subtitle_files = []
-            for pattern in subtitle_patterns:
-                subtitle_files.extend(glob.glob(pattern))
-            
-            if not subtitle_files:
-                raise Exception("No subtitle files were downloaded")
-            
-            # Use the first available subtitle file
-            subtitle_file = subtitle_files[0]
-            print(f"Reading subtitle file: {subtitle_file}")
-            
-            # Parse VTT file and extract text
-            with open(subtitle_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse VTT content
-            lines = content.split('\n')
-            text_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                # Skip VTT headers, timestamps, style tags, and empty lines
-                if (line and 
-                    not line.startswith('WEBVTT') and 
-                    not line.startswith('NOTE') and
-                    not line.startswith('STYLE') and
-                    '-->' not in line and
-                    not line.startswith('<') and
-                    not line.endswith('>') and
-                    not line.isdigit()):
-                    # Clean up subtitle artifacts
-                    line = re.sub(r'<[^>]+>', '', line)  # Remove HTML tags
-                    line = re.sub(r'\{[^}]+\}', '', line)  # Remove styling tags
-                    if line.strip():
-                        text_lines.append(line.strip())
-            
-            # Clean up subtitle files
-            try:
-                for file in subtitle_files:
-                    if os.path.exists(file):
-                        os.remove(file)
-            except Exception as cleanup_error:
-                print(f"Warning: Could not clean up subtitle files: {cleanup_error}")
-            
-            # Join text and clean up
-            transcript = ' '.join(text_lines)
-            transcript = re.sub(r'\s+', ' ', transcript)  # Normalize whitespace
-            transcript = transcript.strip()
-            
-            if not transcript:
-                raise Exception("Extracted transcript is empty")
-            
-            print(f"Successfully extracted transcript via yt-dlp: {len(transcript)} characters")
-            return transcript, 'en'  # Assume English for yt-dlp extracted content
+        language_code, segments = fetch_subtitle_segments(info)
+        if language_code is None:
+            raise Exception("No English subtitles available via yt-dlp")
+        if not segments:
+            raise Exception("Extracted transcript is empty")
+        
+        transcript = TextFormatter().format_transcript(segments)
+        print(f"Successfully extracted transcript via yt-dlp: {len(segments)} segments, {len(transcript)} characters")
+        return transcript, language_code, segments
             
     except Exception as e:
         print(f"yt-dlp transcript extraction failed: {e}")
-        return None, None
+        return None, None, None
 
 def translate_text(text, target_language):
     """Translate text using Murf API."""
@@ -479,18 +485,24 @@ def translate_text(text, target_language):
         mapped_language = map_language_code(target_language)
         print(f"Translating text to {mapped_language} (mapped from {target_language})...")
         
-        # Split text into chunks to avoid hitting translation limits
-        chunks = [text[i:i+5000] for i in range(0, len(text), 5000)]
+        # Split text at sentence boundaries into chunks Google accepts
+        chunks = chunk_text(text, 'google_translate')
         print(f"Split text into {len(chunks)} chunks")
         translated_chunks = []
         
-        translator = GoogleTranslator(source='auto', target=mapped_language)
+        translator = PooledGoogleTranslator(source='auto', target=mapped_language)
+        
+        def google_translate(chunk):
+            # Only cache misses reach Google
+            characters_total.inc(len(chunk), operation='translate', provider='google')
+            with upstream_request('google_translate'):
+                return translator.translate(chunk)
         
         # Process each chunk
         for i, chunk in enumerate(chunks):
             print(f"Translating chunk {i+1}/{len(chunks)}...")
             try:
-                translated = translator.translate(chunk)
+                translated = translation_cache.translate(chunk, 'auto', mapped_language, 'google', google_translate)
                 
                 # Format response to match Murf's API response structure
                 mock_response = type('MockResponse', (), {
@@ -513,155 +525,107 @@ def translate_text(text, target_language):
         
         # Join all translated chunks
         result = ' '.join(translated_chunks)
-        print("Translation completed successfully")
+        print(f"Translation completed successfully (cache hits: {translation_cache.hits}, misses: {translation_cache.misses})")
         return result
         
     except Exception as e:
         print(f"Error translating text: {str(e)}")
         raise Exception(f"Translation failed: {str(e)}")
 
-def text_to_speech(text, voice_id):
-    """Convert text to speech using Murf AI."""
+def synthesize_chunk(text, voice_id, output_path):
+    """Generate speech for a single chunk with Murf and save it to output_path."""
+    if tts_cache.fetch(text, voice_id, 'mp3', output_path):
+        print(f"Using cached audio for {len(text)} characters")
+        return output_path
+    
+    characters_total.inc(len(text), operation='synthesize', provider='murf')
+    with tts_slots, upstream_request('murf_tts'):
+        res = murf_client.text_to_speech.generate(
+            text=text,
+            voice_id=voice_id,
+        )
+    
+    print(f"Generated audio file URL: {res.audio_file}")
+    
+    # Stream the audio file to disk block by block over a pooled connection
+    with upstream_request('murf_audio_download'), \
+            http_session.get(res.audio_file, stream=True) as response:
+        response.raise_for_status()
+        with open(output_path, 'wb') as f:
+            for block in response.iter_content(chunk_size=AUDIO_STREAM_BLOCK_SIZE):
+                f.write(block)
+    
+    tts_cache.store(text, voice_id, 'mp3', output_path)
+    return output_path
+
+def text_to_speech(text, voice_id, max_workers=None):
+    """Convert text to speech using Murf AI.
+
+    Long texts are split into chunks that are synthesized concurrently by up to
+    max_workers threads (TTS_MAX_WORKERS by default) and reassembled in order.
+    """
     try:
         print(f"Converting text to speech using Murf with voice: {voice_id}...")
         print(f"Text length: {len(text)} characters")
         
-        # Check if text exceeds Murf's limit (3000 characters)
-        max_length = 2800  # Use slightly less than 3000 to be safe
+        # Murf accepts at most 3000 characters per request
+        chunks = chunk_text(text, 'murf_tts')
         
-        if len(text) <= max_length:
-            # Generate audio using Murf API directly
-            res = murf_client.text_to_speech.generate(
-                text=text,
-                voice_id=voice_id,
-            )
-            
-            print(f"Generated audio file URL: {res.audio_file}")
-            
+        if len(chunks) <= 1:
             # Create a unique filename
             filename = f"{uuid.uuid4()}.mp3"
             audio_path = os.path.join(AUDIO_DIR, filename)
             
-            # Download and save the audio file response = requests.get(res.audio_file)
-            response.raise_for_status()
-            
-            with open(audio_path, 'wb') as f:
-                f.write(response.content)
+            synthesize_chunk(text, voice_id, audio_path)
             
             print("Audio generation completed successfully")
             return filename
         else:
             # Split text into chunks and combine audio files
-            print(f"Text is too long ({len(text)} chars), splitting into chunks...")
-            
-            # Split text into chunks of reasonable size
-            chunks = []
-            # Split by sentences first, then combine sentences into chunks
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            current_chunk = ""
-            
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                    
-                # Test if adding this sentence would exceed the limit
-                test_chunk = current_chunk + " " + sentence if current_chunk else sentence
-                
-                if len(test_chunk) <= max_length:
-                    current_chunk = test_chunk
-                else:
-                    # If current_chunk is empty and single sentence is too long, split it further
-                    if not current_chunk and len(sentence) > max_length:
-                        # Split long sentence into smaller parts
-                        words = sentence.split()
-                        temp_chunk = ""
-                        for word in words:
-                            test_word_chunk = temp_chunk + " " + word if temp_chunk else word
-                            if len(test_word_chunk) <= max_length:
-                                temp_chunk = test_word_chunk
-                            else:
-                                if temp_chunk:
-                                    chunks.append(temp_chunk)
-                                temp_chunk = word
-                        if temp_chunk:
-                            chunks.append(temp_chunk)
-                    else:
-                        # Add current chunk and start new one
-                        if current_chunk:
-                            chunks.append(current_chunk)
-                        current_chunk = sentence
-            
-            # Add the last chunk if it exists
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            print(f"Split text into {len(chunks)} chunks")
+            print(f"Text is too long ({len(text)} chars), split into {len(chunks)} chunks")
             
             # Debug: print chunk sizes
             for i, chunk in enumerate(chunks):
                 print(f"Chunk {i+1}: {len(chunk)} characters")
             
-            # Generate audio for each chunk
-            chunk_files = []
-            for i, chunk in enumerate(chunks):
-                print(f"Generating audio for chunk {i+1}/{len(chunks)}...")
-                
-                res = murf_client.text_to_speech.generate(
-                    text=chunk,
-                    voice_id=voice_id,
-                )
-                
-                # Download chunk audio
-                chunk_filename = f"{uuid.uuid4()}_chunk_{i+1}.mp3"
-                chunk_path = os.path.join(AUDIO_DIR, chunk_filename)
-                
-                response = requests.get(res.audio_file)
-                response.raise_for_status()
-                
-                with open(chunk_path, 'wb') as f:
-                    f.write(response.content)
-                
-                chunk_files.append(chunk_path)
-                print(f"Chunk {i+1} completed")
+            # Generate audio for all chunks concurrently; futures keep the original order
+            batch_id = uuid.uuid4()
+            chunk_paths = [os.path.join(AUDIO_DIR, f"{batch_id}_chunk_{i+1}.mp3") for i in range(len(chunks))]
+            workers = max(1, min(max_workers or TTS_MAX_WORKERS, len(chunks)))
+            print(f"Generating audio for {len(chunks)} chunks with {workers} workers...")
+            
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='murf-tts') as executor:
+                futures = [
+                    executor.submit(synthesize_chunk, chunk, voice_id, chunk_path)
+                    for chunk, chunk_path in zip(chunks, chunk_paths)
+                ]
+                try:
+                    chunk_files = [future.result() for future in futures]
+                except Exception:
+                    # Stop pending chunks and drop whatever was already downloaded
+                    for future in futures:
+                        future.cancel()
+                    executor.shutdown(wait=True)
+                    for chunk_path in chunk_paths:
+                        if os.path.exists(chunk_path):
+                            os.remove(chunk_path)
+                    raise
             
-            # Use pydub to concatenate MP3 files (more reliable than ffmpeg for this case)
+            # MP3 is a stream of self-contained frames, so chunks can be joined
+            # frame by frame without decoding and re-encoding
             final_filename = f"{uuid.uuid4()}.mp3"
             final_path = os.path.join(AUDIO_DIR, final_filename)
             
             try:
-                from pydub import AudioSegment
-                print("Using pydub to combine audio chunks...")
-                
-                # Load the first audio file
-                combined = AudioSegment.from_mp3(chunk_files[0])
-                
-                # Add each subsequent file
-                for chunk_file in chunk_files[1:]:
-                    audio_segment = AudioSegment.from_mp3(chunk_file)
-                    combined += audio_segment
-                
-                # Export the combined audio
-                combined.export(final_path, format="mp3")
-                
+                with stage_seconds.time(stage='concatenation'), open(final_path, 'wb') as final_file:
+                    join_mp3(final_file, chunk_files)
+            finally:
                 # Clean up chunk files
                 for chunk_file in chunk_files:
                     if os.path.exists(chunk_file):
                         os.remove(chunk_file)
-                
-                print("Audio chunks combined successfully with pydub")
-                
-            except ImportError:
-                print("pydub not available, using simple concatenation...")
-                
-                # Fallback to simple concatenation (may have audio glitches)
-                with open(final_path, 'wb') as final_file:
-                    for chunk_file in chunk_files:
-                        with open(chunk_file, 'rb') as cf:
-                            final_file.write(cf.read())
-                        # Clean up chunk file                        os.remove(chunk_file)
-                
-                print("Audio chunks combined with simple concatenation")
+            
+            print("Audio chunks combined successfully")
             
             return final_filename
     
@@ -680,68 +644,278 @@ def serve_audio(filename):
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
+def publish_audio(audio_filename, video_id, voice_id, target_language, start_time=None, end_time=None):
+    """Upload finished audio to Cloudinary and record it in the result index."""
+    audio_path = os.path.join(AUDIO_DIR, audio_filename)
+    variant = window_variant(RESULT_VARIANT, start_time, end_time)
+    try:
+        with stage_seconds.time(stage='upload'), upstream_request('cloudinary'):
+            result = cloudinary.uploader.upload(
+                audio_path,
+                resource_type='raw',
+                public_id=f'translated_audio_{variant}_{video_id}_{target_language}_{voice_id}',
+                overwrite=True
+            )
+
+        # Clean up local file
+        os.remove(audio_path)
+
+        result_index.put(video_id, target_language, voice_id, result['secure_url'], variant=variant)
+        audio_url = result['secure_url']
+    except Exception as e:
+        print(f"Cloudinary upload error: {str(e)}")
+        # Fallback to local file serving if Cloudinary fails
+        audio_url = f"http://localhost:5000/audio/{audio_filename}"
+    return {'audioUrl': audio_url, 'startTime': start_time, 'endTime': end_time}
+
+def run_translation_job(job, video_id, voice_id, target_language, start_time=None, end_time=None):
+    """Run the full dubbing pipeline for a queued job and return the audio URL.
+
+    start_time/end_time limit the dub to that part of the video.
+    """
+    job.update(stage='transcript', progress=0.05, message='Fetching transcript')
+    transcript_data, source_language = get_transcript(video_id, start_time, end_time)
+    if not transcript_data:
+        raise Exception('Could not get transcript')
+
+    # Translate the transcript
+    job.update(stage='translation', progress=0.25, message=f'Translating from {source_language} to {target_language}')
+    with stage_seconds.time(stage='translation'):
+        translated_text = translate_text(transcript_data, target_language)
+    if not translated_text:
+        raise Exception('Translation failed')
+
+    # Generate audio file using Murf AI
+    job.update(stage='synthesis', progress=0.45, message='Generating speech')
+    with stage_seconds.time(stage='synthesis'):
+        audio_filename = text_to_speech(translated_text, voice_id)
+
+    # Upload to Cloudinary
+    job.update(stage='upload', progress=0.9, message='Uploading audio')
+    return publish_audio(audio_filename, video_id, voice_id, target_language, start_time, end_time)
+
+def remove_files_later(paths, delay):
+    """Delete paths after delay seconds on a daemon timer thread."""
+    def remove():
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    timer = threading.Timer(delay, remove)
+    timer.daemon = True
+    timer.start()
+
+def transcript_pieces(segments, max_chars):
+    """Group consecutive transcript segments into pieces of at most max_chars characters.
+
+    Returns [(start, text)], where start is the video time of the piece's first
+    segment. A single segment longer than max_chars becomes a piece of its own.
+    """
+    pieces = []
+    piece_start, piece_lines, piece_chars = None, [], 0
+    for segment in segments:
+        text = segment['text'].strip()
+        if not text:
+            continue
+        if piece_lines and piece_chars + 1 + len(text) > max_chars:
+            pieces.append((piece_start, '\n'.join(piece_lines)))
+            piece_lines, piece_chars = [], 0
+        if not piece_lines:
+            piece_start = segment['start']
+            piece_chars = len(text)
+        else:
+            piece_chars += 1 + len(text)
+        piece_lines.append(text)
+    if piece_lines:
+        pieces.append((piece_start, '\n'.join(piece_lines)))
+    return pieces
+
+def run_streaming_translation_job(job, video_id, voice_id, target_language, start_time=None, end_time=None):
+    """Dub a video piece by piece, publishing each piece as soon as it is playable.
+
+    Transcript segments are grouped into pieces of about STREAM_PIECE_CHARS
+    characters that are translated and synthesized concurrently. Pieces are
+    published strictly in order, so the first minute can play while the rest
+    is still in progress. A piece's start is the video time of its first
+    segment; the player waits for the video to get there when the dub of the
+    previous piece ends early. Pieces are deleted PIECE_RETENTION_SECONDS after
+    the job finishes.
+    """
+    job.update(stage='transcript', progress=0.05, message='Fetching transcript')
+    _, source_language, segments = load_transcript(video_id)
+    if not segments:
+        raise Exception('This video has no timed transcript, so it cannot be streamed')
+    segments = select_transcript_window(segments, start_time, end_time)
+    pieces = transcript_pieces(segments, STREAM_PIECE_CHARS)
+    if not pieces:
+        raise Exception('Could not get transcript')
+    job.update(stage='synthesis', progress=0.1, message=f'Dubbing {len(pieces)} pieces from {source_language} to {target_language}')
+
+    def dub_piece(text):
+        with stage_seconds.time(stage='translation'):
+            translated_text = translate_text(text, target_language)
+        with stage_seconds.time(stage='synthesis'):
+            return text_to_speech(translated_text, voice_id)
+
+    piece_paths = []
+    futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=TTS_MAX_WORKERS, thread_name_prefix='dub-piece') as executor:
+            # The pool starts pieces in order, so early pieces are ready first
+            futures = [executor.submit(dub_piece, text) for _, text in pieces]
+            try:
+                for i, future in enumerate(futures):
+                    filename = future.result()
+                    piece_path = os.path.join(AUDIO_DIR, filename)
+                    piece_paths.append(piece_path)
+                    duration = audio_duration(piece_path)
+                    if not duration:
+                        raise Exception(f'Could not read the duration of piece {i+1}')
+                    # A segment can begin before the window; the piece starts no earlier than the window
+                    job.add_piece(f"/audio/{filename}", max(pieces[i][0], start_time or 0.0), duration)
+                    job.update(progress=0.1 + 0.8 * (i + 1) / len(futures))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        # Full-length file for the result index and non-streaming clients
+        job.update(stage='upload', progress=0.9, message='Uploading full audio')
+        final_filename = f"{uuid.uuid4()}.mp3"
+        with stage_seconds.time(stage='concatenation'), open(os.path.join(AUDIO_DIR, final_filename), 'wb') as final_file:
+            join_mp3(final_file, piece_paths)
+        return publish_audio(final_filename, video_id, voice_id, target_language, start_time, end_time)
+    finally:
+        # Pieces that finished after a failure were never published; drop them too
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                piece_path = os.path.join(AUDIO_DIR, future.result())
+                if piece_path not in piece_paths:
+                    piece_paths.append(piece_path)
+        # Only once the join has read them; listeners may still be playing published pieces
+        remove_files_later(piece_paths, PIECE_RETENTION_SECONDS)
+
 @app.route('/translate', methods=['POST'])
 def translate_video():
+    """Queue a dubbing job and return its ID without waiting for the pipeline."""
     try:
         data = request.json
         video_url = data.get('videoUrl')
         voice_id = data.get('voiceId')
         target_language = data.get('targetLanguage', 'hi-IN')
-        print(f"Received request to translate video: {video_url}, voice ID: {voice_id}, target language: {target_language}")
+        streaming = bool(data.get('stream', False))
+        print(f"Received request to translate video: {video_url}, voice ID: {voice_id}, target language: {target_language}, streaming: {streaming}")
 
         if not video_url or not voice_id:
             return jsonify({'error': 'Missing required parameters'}), 400
 
-        # Create temporary directory for processing
-        temp_dir = tempfile.mkdtemp()
+        video_id = extract_video_id(video_url)
+        if not video_id:
+            return jsonify({'error': 'Invalid YouTube URL'}), 400
+
+        # Optional window (seconds) so only the part being watched is dubbed
         try:
-            # Get video ID and transcript
-            video_id = extract_video_id(video_url)
-            if not video_id:
-                return jsonify({'error': 'Invalid YouTube URL'}), 400
-
-            transcript_data, source_language = get_transcript(video_id)
-            if not transcript_data:
-                return jsonify({'error': 'Could not get transcript'}), 400
-
-            # Translate the transcript
-            translated_text = translate_text(transcript_data, target_language)
-            if not translated_text:
-                return jsonify({'error': 'Translation failed'}), 500            # Generate audio file using Murf AI
-            audio_filename = text_to_speech(translated_text, voice_id)
-            audio_path = os.path.join(AUDIO_DIR, audio_filename)
-
-            # Upload to Cloudinary
-            try:
-                result = cloudinary.uploader.upload(
-                    audio_path,
-                    resource_type='raw',
-                    public_id=f'translated_audio_{video_id}',
-                    overwrite=True
-                )
-                
-                # Clean up local file
-                os.remove(audio_path)
-                
-                return jsonify({
-                    'success': True,
-                    'audioUrl': result['secure_url']
-                })
-            except Exception as e:
-                print(f"Cloudinary upload error: {str(e)}")
-                # Fallback to local file serving if Cloudinary fails
-                return jsonify({
-                    'success': True,
-                    'audioUrl': f"http://localhost:5000/audio/{audio_filename}"
-                })
+            start_time, end_time = parse_time_window(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        finally:
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir)
+        # Finished dubs are served straight from the result index
+        variant = window_variant(RESULT_VARIANT, start_time, end_time)
+        audio_url = result_index.get(video_id, target_language, voice_id, variant=variant)
+        if audio_url:
+            print(f"Result index hit for {video_id} ({target_language}, {voice_id}, {variant})")
+            return jsonify({
+                'success': True,
+                'status': 'completed',
+                'audioUrl': audio_url,
+                'startTime': start_time,
+                'endTime': end_time,
+                'cached': True
+            })
+
+        # Identical requests already in progress share the running job
+        job = job_queue.submit(
+            run_streaming_translation_job if streaming else run_translation_job,
+            video_id, voice_id, target_language, start_time, end_time,
+            dedupe_key=(video_id, target_language, voice_id, start_time, end_time, streaming)
+        )
+        response = {
+            'success': True,
+            'jobId': job.id,
+            'status': job.status,
+            'statusUrl': f"/jobs/{job.id}",
+            'eventsUrl': f"/jobs/{job.id}/events"
+        }
+        if streaming:
+            response['manifestUrl'] = f"/jobs/{job.id}/manifest"
+            response['playlistUrl'] = f"/jobs/{job.id}/playlist.m3u8"
+        return jsonify(response), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Return the current state of a dubbing job."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream per-stage progress of a dubbing job as server-sent events."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return Response(
+        stream_events(job),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>/manifest')
+def job_manifest(job_id):
+    """List the dubbed audio pieces published so far, in playback order."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return jsonify({
+        'jobId': job.id,
+        'status': job.status,
+        'error': job.error,
+        'complete': job.finished,
+        'pieces': list(job.pieces)
+    })
+
+@app.route('/jobs/<job_id>/playlist.m3u8')
+def job_playlist(job_id):
+    """Expose the published pieces as a live HLS audio playlist."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    pieces = list(job.pieces)
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f"#EXT-X-TARGETDURATION:{max([math.ceil(piece['duration']) for piece in pieces] + [1])}",
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:EVENT',
+    ]
+    for piece in pieces:
+        lines.append(f"#EXTINF:{piece['duration']:.3f},")
+        lines.append(piece['url'])
+    if job.finished:
+        lines.append('#EXT-X-ENDLIST')
+    return Response('\n'.join(lines) + '\n', mimetype='application/vnd.apple.mpegurl',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose stage latencies, upstream counters and cache statistics for Prometheus."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 # Clean up old audio files periodically
 def cleanup_old_files():
     """Remove audio files older than 1 hour."""
@@ -754,32 +928,11 @@ def cleanup_old_files():
     except Exception as e:
         print(f"Error cleaning up files: {str(e)}")
 
-# User agents for rotation to avoid blocking
-USER_AGENTS = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0'
-]
-
-def setup_youtube_session():
-    """Setup a session with random user agent for YouTube requests."""
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': random.choice(USER_AGENTS),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    })
-    return session
-
 if __name__ == '__main__':
     # Configure Flask to avoid auto-reload issues during audio generation
     app.run(
         debug=False,  # Disable debug mode to prevent auto-reload interruptions
         port=5000,
-        host='localhost'
+        host='localhost',
+        threaded=True  # Status polls and event streams need their own threads
     )
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""Fixtures shared by the tests; run from the repository root with python -m pytest tests."""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'backend'))
+
+# The backend opens its caches on import; keep the tests' out of the working tree
+_STATE_DIR = tempfile.mkdtemp(prefix='dub_tests_')
+os.environ.setdefault('TTS_CACHE_DIR', os.path.join(_STATE_DIR, 'tts_cache'))
+os.environ.setdefault('TRANSLATION_CACHE_PATH', os.path.join(_STATE_DIR, 'translation_cache.sqlite3'))
+os.environ.setdefault('RESULT_INDEX_PATH', os.path.join(_STATE_DIR, 'result_index.sqlite3'))
+
+from fake_upstreams import DEFAULT_LATENCY_MS, UpstreamConfig, make_server  # noqa: E402
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def upstream():
+    """Base URL of an in-process fake of the upstream services, without added latency."""
+    config = UpstreamConfig(latency_ms={service: 0 for service in DEFAULT_LATENCY_MS}, jitter=0)
+    server = make_server(config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
@@ -0,0 +1,163 @@
+"""probe_audio and join_mp3 on hand-built WAV and MP3 files."""
+import io
+import struct
+
+import pytest
+
+import audio_metadata
+from audio_metadata import audio_duration, join_mp3, probe_audio
+from fake_upstreams import silent_mp3, silent_wav
+
+# The silent frame of fake_upstreams: MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono
+FRAME_HEADER = b'\xff\xfb\x90\xc4'
+FRAME_BYTES = 417
+FRAME_SECONDS = 1152 / 44100
+XING_OFFSET = 4 + 17  # header + mono MPEG-1 side info
+# Constant bitrate files are timed by byte rate: 417 unpadded bytes are a little under a frame's time
+CBR_FRAME_SECONDS = FRAME_BYTES * 8 / 128000
+
+
+def frame(header=FRAME_HEADER, length=FRAME_BYTES):
+    return header + b'\x00' * (length - 4)
+
+
+def id3v2(payload_size=100):
+    size = bytes((payload_size >> shift) & 0x7f for shift in (21, 14, 7, 0))
+    return b'ID3\x03\x00\x00' + size + b'\x00' * payload_size
+
+
+def id3v1():
+    return b'TAG' + b'\x00' * 125
+
+
+def xing_frame(frame_count, tag=b'Xing'):
+    data = bytearray(frame())
+    data[XING_OFFSET:XING_OFFSET + 12] = tag + struct.pack('>II', 0x01, frame_count)
+    return bytes(data)
+
+
+def info_tag(data):
+    """(tag, frame count, byte count) of the Xing/Info header at the start of data."""
+    tag, flags, frames, byte_count = struct.unpack('>4sIII', data[XING_OFFSET:XING_OFFSET + 16])
+    assert flags == 0x03
+    return tag, frames, byte_count
+
+
+def vbri_frame(frame_count):
+    data = bytearray(frame())
+    data[36:54] = b'VBRI' + b'\x00' * 10 + struct.pack('>I', frame_count)
+    return bytes(data)
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+
+def test_probe_wav(write):
+    info = probe_audio(write('a.wav', silent_wav(2.5, sample_rate=16000)))
+    assert info.duration == pytest.approx(2.5)
+    assert (info.sample_rate, info.channels) == (16000, 1)
+
+
+def test_probe_constant_bitrate_mp3(write):
+    info = probe_audio(write('a.mp3', frame() * 100))
+    assert info.duration == pytest.approx(100 * CBR_FRAME_SECONDS)
+    assert (info.sample_rate, info.channels) == (44100, 1)
+
+
+def test_probe_skips_id3_tags(write):
+    path = write('a.mp3', id3v2(5000) + frame() * 100 + id3v1())
+    assert probe_audio(path).duration == pytest.approx(100 * CBR_FRAME_SECONDS)
+
+
+@pytest.mark.parametrize('tag', [b'Xing', b'Info'])
+def test_probe_reads_the_frame_count_of_a_xing_header(write, tag):
+    # The header claims far more frames than the file holds; the count wins
+    path = write('a.mp3', id3v2() + xing_frame(5000, tag) + frame() * 10)
+    assert probe_audio(path).duration == pytest.approx(5000 * FRAME_SECONDS)
+
+
+def test_probe_reads_the_frame_count_of_a_vbri_header(write):
+    path = write('a.mp3', vbri_frame(2000) + frame() * 10)
+    assert probe_audio(path).duration == pytest.approx(2000 * FRAME_SECONDS)
+
+
+def test_unrecognised_audio(write):
+    path = write('a.bin', b'not audio at all' * 10)
+    with pytest.raises(ValueError):
+        probe_audio(path)
+    assert audio_duration(path) is None
+
+
+def test_audio_duration_of_a_missing_file(tmp_path):
+    assert audio_duration(str(tmp_path / 'missing.mp3')) is None
+
+
+def test_fake_upstream_audio_has_the_requested_length(write):
+    assert audio_duration(write('a.mp3', silent_mp3(30))) == pytest.approx(30, rel=0.01)
+    assert audio_duration(write('a.wav', silent_wav(30))) == pytest.approx(30)
+
+
+def joined(paths):
+    dest = io.BytesIO()
+    join_mp3(dest, paths)
+    return dest.getvalue()
+
+
+def test_join_copies_only_audio_frames(write):
+    first = write('1.mp3', id3v2() + xing_frame(3) + frame() * 3 + id3v1())
+    second = write('2.mp3', id3v2(2000) + frame() * 2)
+    output = joined([first, second])
+    # One new Info frame, then the five audio frames and nothing else
+    assert output[FRAME_BYTES:] == frame() * 5
+    assert info_tag(output) == (b'Info', 5, 6 * FRAME_BYTES)
+
+
+def test_joined_file_probes_to_the_total_length(write):
+    paths = [write(f'{i}.mp3', id3v2() + xing_frame(40) + frame() * 40 + id3v1()) for i in range(3)]
+    output = write('joined.mp3', joined(paths))
+    assert probe_audio(output).duration == pytest.approx(120 * FRAME_SECONDS)
+
+
+def test_join_skips_bytes_between_frames(write):
+    path = write('1.mp3', frame() + b'junk\xff\x00\xff' + frame() + frame()[:100])
+    output = joined([path])
+    assert output[FRAME_BYTES:] == frame() * 2
+    assert info_tag(output)[1] == 2
+
+
+def test_join_marks_mixed_bitrates_as_xing(write):
+    loud = frame(b'\xff\xfb\xb0\xc4', 626)  # 192 kbit/s
+    output = joined([write('1.mp3', frame() * 2), write('2.mp3', loud)])
+    assert output[FRAME_BYTES:] == frame() * 2 + loud
+    assert info_tag(output) == (b'Xing', 3, 2 * FRAME_BYTES + 626 + FRAME_BYTES)
+
+
+def test_join_writes_at_the_current_position(write):
+    dest = io.BytesIO()
+    dest.write(b'prefix')
+    join_mp3(dest, [write('1.mp3', frame() * 2)])
+    output = dest.getvalue()
+    assert output.startswith(b'prefix')
+    assert info_tag(output[6:])[1] == 2
+    assert dest.tell() == len(output)
+
+
+@pytest.mark.parametrize('block_size', [1, 7, FRAME_BYTES, FRAME_BYTES + 1, 4096])
+def test_join_output_does_not_depend_on_the_read_block_size(write, monkeypatch, block_size):
+    paths = [
+        write('1.mp3', id3v2() + xing_frame(4) + frame() * 4 + b'\xff\xfb' + frame() + id3v1()),
+        write('2.mp3', frame(b'\xff\xfb\xb0\xc4', 626) * 3 + frame()[:50]),
+    ]
+    expected = joined(paths)
+    monkeypatch.setattr(audio_metadata, '_MP3_JOIN_BLOCK_BYTES', block_size)
+    assert joined(paths) == expected
+
+
+def test_join_of_files_without_audio_writes_nothing(write):
+    assert joined([write('1.mp3', id3v2() + id3v1())]) == b''
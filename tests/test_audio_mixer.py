@@ -0,0 +1,99 @@
+"""render_timeline against a whole-track mix, across block boundaries."""
+import wave
+
+import numpy as np
+import pytest
+
+from audio_mixer import decode_segment, render_timeline, write_wav
+
+RATE = 1000  # samples per second; small so every sample can be compared
+
+
+@pytest.fixture
+def segment(tmp_path):
+    """Write a WAV segment of distinct samples and return its timeline entry."""
+    count = [0]
+
+    def segment(start_time, seconds, rate=RATE, level=0.3):
+        count[0] += 1
+        samples = np.linspace(-level, level, int(seconds * rate), dtype=np.float32)
+        path = str(tmp_path / f'segment_{count[0]}.wav')
+        write_wav(path, samples, rate)
+        return {'file': path, 'start_time': start_time, 'end_time': start_time + seconds}
+    return segment
+
+
+def read_track(path):
+    with wave.open(path, 'rb') as wav:
+        assert wav.getframerate() == RATE
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+
+
+def expected_track(segments, total_duration):
+    """Mix every segment into one buffer at once, the straightforward way."""
+    length = int(total_duration * RATE)
+    track = np.zeros(length, dtype=np.float32)
+    end = 0
+    for item in segments:
+        samples, _ = decode_segment(item['file'], RATE)
+        offset = int(round(item['start_time'] * RATE))
+        stop = min(offset + len(samples), length)
+        track[offset:stop] += samples[:stop - offset]
+        end = max(end, stop)
+    return (np.clip(track[:end], -1.0, 1.0) * 32767.0).astype('<i2')
+
+
+@pytest.mark.parametrize('block_seconds', [0.013, 0.1, 0.25, 1, 30])
+def test_blocks_match_a_whole_track_mix(segment, tmp_path, block_seconds):
+    segments = [
+        segment(0.5, 0.3),
+        segment(0.7, 0.4, level=0.6),  # overlaps the first one
+        segment(0.99, 0.02),           # straddles a block boundary
+        segment(1.5, 0.5),
+        segment(1.6, 0.1, level=0.9),  # overlaps with clipping
+    ]
+    output = str(tmp_path / 'track.wav')
+    duration = render_timeline(segments[::-1], 3.0, output, block_seconds=block_seconds)
+    expected = expected_track(segments, 3.0)
+    assert duration == pytest.approx(2.0)
+    assert np.array_equal(read_track(output), expected)
+
+
+def test_track_is_cut_at_the_total_duration(segment, tmp_path):
+    segments = [segment(0.0, 0.5), segment(0.8, 0.5)]
+    output = str(tmp_path / 'track.wav')
+    assert render_timeline(segments, 1.0, output, block_seconds=0.3) == pytest.approx(1.0)
+    assert np.array_equal(read_track(output), expected_track(segments, 1.0))
+
+
+def test_silence_before_the_first_segment(segment, tmp_path):
+    output = str(tmp_path / 'track.wav')
+    render_timeline([segment(0.75, 0.1)], 2.0, output, block_seconds=0.2)
+    track = read_track(output)
+    assert len(track) == 850
+    assert not track[:750].any()
+
+
+def test_segments_are_resampled_to_the_first_segments_rate(segment, tmp_path):
+    segments = [segment(0.0, 0.2), segment(0.5, 0.2, rate=2 * RATE)]
+    output = str(tmp_path / 'track.wav')
+    assert render_timeline(segments, 1.0, output, block_seconds=0.1) == pytest.approx(0.7)
+
+
+def test_fit_segment_swaps_in_a_replacement(segment, tmp_path):
+    long_segment = segment(0.0, 0.8)
+    short_segment = segment(0.0, 0.2)
+    calls = []
+
+    def fit_segment(item, duration):
+        calls.append((item['file'], duration))
+        return short_segment['file'] if item is long_segment else None
+
+    output = str(tmp_path / 'track.wav')
+    assert render_timeline([long_segment], 1.0, output, fit_segment=fit_segment) == pytest.approx(0.2)
+    assert calls == [(long_segment['file'], pytest.approx(0.8))]
+
+
+def test_no_segments():
+    with pytest.raises(ValueError):
+        render_timeline([], 1.0, 'unused.wav')
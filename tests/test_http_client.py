@@ -0,0 +1,86 @@
+"""The shared-session wrappers in http_client against the pinned upstream libraries.
+
+PooledGoogleTranslator and list_youtube_transcripts rely on private internals
+of deep-translator and youtube-transcript-api; these tests fail if an upgrade
+changes them.
+"""
+import inspect
+
+import pytest
+import youtube_transcript_api._transcripts as youtube_transcripts
+from deep_translator import GoogleTranslator
+from deep_translator.constants import BASE_URLS
+from youtube_transcript_api import YouTubeTranscriptApi
+
+import http_client
+from http_client import PooledGoogleTranslator, http_session, list_youtube_transcripts
+
+
+@pytest.fixture
+def session_calls(monkeypatch):
+    """URLs requested through the shared session during the test."""
+    calls = []
+    original_get = http_session.get
+
+    def get(url, *args, **kwargs):
+        calls.append(url)
+        return original_get(url, *args, **kwargs)
+
+    monkeypatch.setattr(http_session, 'get', get)
+    return calls
+
+
+@pytest.fixture
+def fake_google(monkeypatch, upstream):
+    monkeypatch.setitem(BASE_URLS, 'GOOGLE_TRANSLATE', upstream + '/google/m')
+
+
+@pytest.fixture
+def fake_youtube(monkeypatch, upstream):
+    monkeypatch.setattr(youtube_transcripts, 'WATCH_URL', upstream + '/youtube/watch?v={video_id}')
+
+
+def test_google_translator_internals_exist():
+    translator = GoogleTranslator(source='auto', target='fr')
+    for name in ('_url_params', '_base_url', '_element_tag', '_element_query', '_alt_element_query',
+                 'payload_key', 'proxies', '_source', '_target'):
+        assert hasattr(translator, name), name
+    assert callable(translator._same_source_target)
+
+
+def test_transcript_list_fetcher_takes_a_session():
+    assert list(inspect.signature(youtube_transcripts.TranscriptListFetcher).parameters) == ['http_client']
+
+
+@pytest.mark.usefixtures('fake_google')
+def test_pooled_translator_matches_stock_translator(session_calls):
+    text = 'The quick brown fox. It jumps over the lazy dog!'
+    expected = GoogleTranslator(source='auto', target='fr').translate(text)
+    assert PooledGoogleTranslator(source='auto', target='fr').translate(text) == expected
+    assert session_calls and all(url.endswith('/google/m') for url in session_calls)
+
+
+@pytest.mark.usefixtures('fake_google')
+def test_pooled_translator_leaves_shared_state_alone():
+    translator = PooledGoogleTranslator(source='auto', target='fr')
+    params = dict(translator._url_params)
+    translator.translate('Hello there')
+    assert translator._url_params == params
+
+
+@pytest.mark.usefixtures('fake_youtube')
+def test_list_youtube_transcripts_matches_library(session_calls):
+    listed = list_youtube_transcripts('abcdefghijk')
+    expected = YouTubeTranscriptApi.list_transcripts('abcdefghijk')
+    assert [t.language_code for t in listed] == [t.language_code for t in expected]
+    assert session_calls
+    segments = listed.find_transcript(['en']).fetch()
+    assert segments and {'text', 'start', 'duration'} <= set(segments[0])
+
+
+def test_httpx_limits_cover_every_host():
+    pool = http_client.httpx_client._transport._pool
+    expected = http_client.HTTP_MAX_CONNECTIONS_PER_HOST * http_client.HTTP_MAX_HOSTS
+    assert http_client.HTTPX_MAX_CONNECTIONS == expected
+    assert pool._max_connections == expected
+    assert pool._max_keepalive_connections == expected
@@ -0,0 +1,124 @@
+"""JobQueue: running jobs, coalescing identical requests and forgetting old jobs."""
+import json
+import threading
+import time
+
+import pytest
+
+from jobs import Job, JobQueue, stream_events
+
+
+def wait_until_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job {job.id} did not finish"
+        job.wait_for_events(len(job.events), timeout=0.1)
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(max_workers=2, retention_seconds=60)
+
+
+def test_job_runs_and_completes(queue):
+    def pipeline(job, a, b=0):
+        job.update(stage='adding', progress=0.5)
+        return a + b
+
+    job = queue.submit(pipeline, 1, b=2)
+    wait_until_finished(job)
+    assert (job.status, job.result, job.error, job.progress) == ('completed', 3, None, 1.0)
+    assert queue.get(job.id) is job
+    assert 'adding' in [event['stage'] for event in job.events]
+
+
+def test_failed_job_records_the_error(queue):
+    def pipeline(job):
+        raise RuntimeError('no transcript')
+
+    job = queue.submit(pipeline)
+    wait_until_finished(job)
+    assert (job.status, job.error) == ('failed', 'no transcript')
+
+
+def test_identical_requests_share_one_job(queue):
+    release = threading.Event()
+    calls = []
+
+    def pipeline(job):
+        calls.append(job.id)
+        release.wait(5)
+        return 'done'
+
+    first = queue.submit(pipeline, dedupe_key=('video', 'hi-IN'))
+    second = queue.submit(pipeline, dedupe_key=('video', 'hi-IN'))
+    other = queue.submit(pipeline, dedupe_key=('video', 'es-ES'))
+    assert second is first
+    assert other is not first
+    release.set()
+    wait_until_finished(first)
+    wait_until_finished(other)
+    assert len(calls) == 2
+
+
+def test_finished_job_is_not_reused(queue):
+    first = queue.submit(lambda job: 1, dedupe_key='key')
+    wait_until_finished(first)
+    second = queue.submit(lambda job: 2, dedupe_key='key')
+    assert second is not first
+    wait_until_finished(second)
+    assert second.result == 2
+
+
+def test_old_finished_jobs_are_pruned_on_submit(queue):
+    old = queue.submit(lambda job: None)
+    wait_until_finished(old)
+    recent = queue.submit(lambda job: None)
+    wait_until_finished(recent)
+    release = threading.Event()
+    running = queue.submit(lambda job: release.wait(5))
+    old.updated_at -= 120
+    running.updated_at -= 120  # old but unfinished: kept
+
+    queue.submit(lambda job: None)
+    assert queue.get(old.id) is None
+    assert queue.get(recent.id) is recent
+    assert queue.get(running.id) is running
+    release.set()
+
+
+def test_status_counts(queue):
+    release = threading.Event()
+    done = queue.submit(lambda job: None)
+    wait_until_finished(done)
+    blocked = queue.submit(lambda job: release.wait(5))
+    while blocked.status == 'queued':
+        blocked.wait_for_events(len(blocked.events), timeout=0.1)
+    counts = queue.status_counts()
+    assert (counts[('completed',)], counts[('running',)], counts[('failed',)]) == (1, 1, 0)
+    release.set()
+
+
+def test_pieces_are_published_in_order():
+    job = Job('job')
+    job.add_piece('/audio/1.mp3', 0.0, 4.5)
+    job.add_piece('/audio/2.mp3', 6.0, 3.0)
+    assert [(piece['index'], piece['start']) for piece in job.pieces] == [(0, 0.0), (1, 6.0)]
+    assert job.to_dict()['pieceCount'] == 2
+
+
+def test_stream_events_ends_with_the_final_state():
+    job = Job('job')
+    job.update(stage='transcript', progress=0.1)
+    job.complete({'audioUrl': 'url'})
+    events = list(stream_events(job, heartbeat=0.1))
+    assert [event.split('\n')[0] for event in events] == [
+        'event: queued', 'event: running', 'event: completed']
+    assert json.loads(events[-1].split('data: ', 1)[1])['result'] == {'audioUrl': 'url'}
+
+
+def test_stream_events_sends_keep_alives_while_idle():
+    job = Job('job')
+    events = stream_events(job, heartbeat=0.01)
+    assert next(events).startswith('event: queued')
+    assert next(events) == ': keep-alive\n\n'
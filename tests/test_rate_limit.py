@@ -0,0 +1,132 @@
+"""AdaptiveRateLimiter backoff and recovery, and recognising YouTube throttling."""
+from xml.etree.ElementTree import ParseError
+
+import pytest
+import requests
+from youtube_transcript_api import TooManyRequests, YouTubeRequestFailed
+
+import rate_limit
+from rate_limit import (AdaptiveRateLimiter, RECOVERY_FRACTION, backoff_delay, is_youtube_throttling_error,
+                        rate_limiter, retry_after_seconds)
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f'{status} error', response=response)
+
+
+@pytest.mark.parametrize('attempt, low, high', [(1, 0.5, 1), (2, 1, 2), (3, 2, 4), (10, 15, 30)])
+def test_backoff_delay_is_jittered_exponential_and_capped(attempt, low, high):
+    for _ in range(50):
+        assert low <= backoff_delay(attempt) <= high
+
+
+def test_burst_passes_without_waiting(clock):
+    limiter = AdaptiveRateLimiter('host', max_rate=10, burst=5)
+    assert [limiter.acquire() for _ in range(5)] == [0.0] * 5
+    assert limiter.acquire() == pytest.approx(0.1)
+
+
+def test_throttling_halves_the_rate_down_to_the_minimum(clock):
+    limiter = AdaptiveRateLimiter('host', max_rate=8, burst=1, min_rate=1)
+    rates = []
+    for _ in range(5):
+        limiter.record_throttled(retry_after=0)
+        rates.append(limiter.rate)
+    assert rates == [4, 2, 1, 1, 1]
+    assert limiter.stats()['throttled'] == 5
+
+
+def test_throttling_pauses_every_caller(clock):
+    limiter = AdaptiveRateLimiter('host', max_rate=10, burst=10)
+    assert limiter.record_throttled(retry_after=7) == 7
+    assert limiter.acquire() == pytest.approx(7)
+    assert limiter.acquire() == 0.0  # the pause is over and tokens are left
+
+
+def test_backoff_grows_with_consecutive_throttles(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit.random, 'uniform', lambda low, high: high)
+    limiter = AdaptiveRateLimiter('host')
+    assert [limiter.record_throttled() for _ in range(3)] == [1, 2, 4]
+    limiter.record_success()
+    assert limiter.record_throttled() == 1
+
+
+def test_successes_recover_the_rate_step_by_step(clock):
+    limiter = AdaptiveRateLimiter('host', max_rate=10, min_rate=0.1)
+    for _ in range(3):
+        limiter.record_throttled(retry_after=0)
+    assert limiter.rate == pytest.approx(1.25)
+    limiter.record_success()
+    assert limiter.rate == pytest.approx(1.25 + 10 * RECOVERY_FRACTION)
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.rate == 10
+
+
+def test_rate_limiter_is_shared_per_host():
+    assert rate_limiter('www.youtube.com') is rate_limiter('www.youtube.com')
+    assert rate_limiter('www.youtube.com').max_rate == rate_limit.HOST_MAX_RATES['www.youtube.com']
+    assert rate_limiter('example.com') is not rate_limiter('www.youtube.com')
+
+
+def youtube_request_failed(status):
+    # youtube-transcript-api 0.4.4 passes its arguments in swapped order; the
+    # HTTP error is only reachable as the context of the raised exception
+    try:
+        try:
+            raise http_error(status)
+        except requests.HTTPError as error:
+            raise YouTubeRequestFailed(error, 'abc429xyz')
+    except YouTubeRequestFailed as error:
+        return error
+
+
+@pytest.mark.parametrize('error', [
+    TooManyRequests('abc'),
+    ParseError('no element found: line 1, column 0'),
+    http_error(429),
+    youtube_request_failed(429),
+])
+def test_youtube_throttling_errors(error):
+    assert is_youtube_throttling_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    http_error(404),
+    youtube_request_failed(500),
+    Exception('Could not retrieve a transcript for https://www.youtube.com/watch?v=abc429xyz'),
+])
+def test_other_errors_are_not_throttling(error):
+    assert not is_youtube_throttling_error(error)
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(http_error(429, {'Retry-After': '12'})) == 12
+    assert retry_after_seconds(http_error(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) is None
+    assert retry_after_seconds(http_error(429)) is None
+    assert retry_after_seconds(ValueError('no response')) is None
@@ -0,0 +1,88 @@
+"""parse_subtitles on WebVTT and SRT, including rolling auto-generated captions."""
+import pytest
+
+from fake_upstreams import caption_lines, webvtt
+from subtitles import parse_subtitles, read_subtitle_file
+
+
+def parse(document):
+    return [(segment['text'], segment['start'], pytest.approx(segment['duration']))
+            for segment in parse_subtitles(document.splitlines(keepends=True))]
+
+
+def test_webvtt_cues():
+    document = """WEBVTT
+Kind: captions
+
+NOTE a comment, not a cue
+
+00:00:01.000 --> 00:00:02.500
+Hello <c>there</c>
+
+1:02:03.040 --> 1:02:04.000 align:start position:0%
+Tom &amp; Jerry
+"""
+    assert parse(document) == [('Hello there', 1.0, 1.5), ('Tom & Jerry', 3723.04, 0.96)]
+
+
+def test_srt_cues_drop_their_numbers():
+    document = "\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\n<i>First</i>\r\n\r\n2\r\n00:00:03,000 --> 00:00:04,500\r\nSecond\r\nline\r\n"
+    assert parse(document) == [('First', 1.0, 1.0), ('Second line', 3.0, 1.5)]
+
+
+def test_a_number_that_is_the_cue_text_is_kept():
+    document = "1\n00:00:01,000 --> 00:00:02,000\n42\n\n2\n00:00:02,000 --> 00:00:03,000\nAnswer\n"
+    assert parse(document) == [('42', 1.0, 1.0), ('Answer', 2.0, 1.0)]
+
+
+def test_rolling_auto_captions_keep_only_new_lines():
+    # YouTube auto captions repeat the previous line above the new one, with
+    # 10 ms cues in between that only hold the old line
+    document = """WEBVTT
+
+00:00:00.000 --> 00:00:02.000
+hello everyone
+
+00:00:02.000 --> 00:00:02.010
+hello everyone
+
+00:00:02.010 --> 00:00:04.000
+hello everyone
+welcome back
+
+00:00:04.000 --> 00:00:04.010
+welcome back
+
+00:00:04.010 --> 00:00:06.000
+welcome back
+to the channel
+"""
+    assert parse(document) == [
+        ('hello everyone', 0.0, 2.01),
+        ('welcome back', 2.01, 2.0),
+        ('to the channel', 4.01, 1.99),
+    ]
+
+
+def test_identical_consecutive_cues_are_merged():
+    document = """WEBVTT
+
+00:00:00.000 --> 00:00:01.000
+same words
+
+00:00:01.020 --> 00:00:02.000
+same words
+
+00:00:05.000 --> 00:00:06.000
+other words
+"""
+    assert parse(document) == [('same words', 0.0, 2.0), ('other words', 5.0, 1.0)]
+
+
+def test_parses_a_file_of_generated_captions(tmp_path):
+    lines = caption_lines('video', 2)
+    path = tmp_path / 'captions.en.vtt'
+    path.write_text(webvtt(lines), encoding='utf-8')
+    segments = read_subtitle_file(str(path))
+    assert [(s['text'], s['start'], s['duration']) for s in segments] == [
+        (text, pytest.approx(start), pytest.approx(duration)) for start, duration, text in lines]
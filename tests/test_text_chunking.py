@@ -0,0 +1,70 @@
+"""chunk_text: provider budgets, sentence packing, CJK stops and over-long words."""
+import pytest
+
+from text_chunking import CHUNK_BUDGETS, chunk_text, split_sentences
+
+
+def test_split_sentences_keeps_punctuation_and_collapses_whitespace():
+    assert split_sentences('One.  Two?\n"Three!" four') == ['One.', 'Two?', '"Three!"', 'four']
+
+
+def test_split_sentences_ends_on_cjk_stops_without_a_space():
+    assert split_sentences('你好。再见！好吗？') == ['你好。', '再见！', '好吗？']
+    assert split_sentences('नमस्ते। फिर मिलेंगे।') == ['नमस्ते।', 'फिर मिलेंगे।']
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text('Hello there. How are you?', 'murf_tts') == ['Hello there. How are you?']
+
+
+def test_sentences_are_packed_up_to_the_budget():
+    chunks = chunk_text('Aaaa. Bbbb. Cccc. Dddd.', max_size=11)
+    assert chunks == ['Aaaa. Bbbb.', 'Cccc. Dddd.']
+
+
+@pytest.mark.parametrize('provider', sorted(CHUNK_BUDGETS))
+def test_chunks_fit_the_provider_budget(provider):
+    size, _ = CHUNK_BUDGETS[provider]
+    text = ' '.join(f'Sentence number {i} has a few words in it.' for i in range(1000))
+    chunks = chunk_text(text, provider)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= size for chunk in chunks)
+    assert ' '.join(chunks) == text
+
+
+def test_long_sentence_is_split_between_words():
+    sentence = ' '.join(['word'] * 10) + '.'
+    chunks = chunk_text(sentence, max_size=12)
+    assert all(len(chunk) <= 12 for chunk in chunks)
+    assert ' '.join(chunks) == sentence
+
+
+def test_over_long_word_is_cut_and_its_tail_packed_on():
+    chunks = chunk_text('short ' + 'x' * 25 + ' tail', max_size=10)
+    assert chunks == ['short', 'x' * 10, 'x' * 10, 'x' * 5 + ' tail']
+
+
+def test_byte_budget_counts_utf8():
+    text = '你好。' * 10  # 9 bytes per sentence
+    chunks = chunk_text(text, max_size=20, unit='bytes')
+    assert all(len(chunk.encode('utf-8')) <= 20 for chunk in chunks)
+    assert ''.join(chunk.replace(' ', '') for chunk in chunks) == text
+
+
+def test_byte_budget_never_splits_a_character():
+    chunks = chunk_text('你' * 7, max_size=6, unit='bytes')
+    assert chunks == ['你你', '你你', '你你', '你']
+
+
+def test_max_size_overrides_the_provider_budget():
+    text = 'One sentence. Another sentence.'
+    assert chunk_text(text, 'google_translate', max_size=20) == ['One sentence.', 'Another sentence.']
+
+
+def test_invalid_budget_is_rejected():
+    with pytest.raises(ValueError):
+        chunk_text('text')
+    with pytest.raises(ValueError):
+        chunk_text('text', max_size=0)
+    with pytest.raises(ValueError):
+        chunk_text('text', max_size=10, unit='words')
@@ -0,0 +1,56 @@
+"""parse_time_window, select_transcript_window and window_variant."""
+import pytest
+
+from transcript_window import parse_time_window, select_transcript_window, window_variant
+
+
+@pytest.mark.parametrize('data, expected', [
+    ({}, (None, None)),
+    ({'startTime': 0}, (None, None)),  # the whole video
+    ({'startTime': 10}, (10.0, None)),
+    ({'endTime': '90.5'}, (None, 90.5)),
+    ({'startTime': 1234.5674, 'endTime': 2000}, (1234.567, 2000.0)),
+])
+def test_parse_time_window(data, expected):
+    assert parse_time_window(data) == expected
+
+
+@pytest.mark.parametrize('data', [
+    {'startTime': -1},
+    {'startTime': 'soon'},
+    {'startTime': True},
+    {'startTime': [1]},
+    {'startTime': float('nan')},
+    {'endTime': 'inf'},
+    {'startTime': 10, 'endTime': 10},
+    {'startTime': 20, 'endTime': 10},
+    {'startTime': 1.0001, 'endTime': 1.0002},  # the same millisecond
+])
+def test_parse_time_window_rejects(data):
+    with pytest.raises(ValueError):
+        parse_time_window(data)
+
+
+SEGMENTS = [{'text': str(i), 'start': i * 10.0, 'duration': 5.0} for i in range(5)]
+
+
+@pytest.mark.parametrize('start, end, expected', [
+    (None, None, ['0', '1', '2', '3', '4']),
+    (12, None, ['1', '2', '3', '4']),  # segment 1 ends at 15, after the start
+    (15, None, ['2', '3', '4']),       # ...but not when it ends exactly there
+    (None, 20, ['0', '1']),            # segment 2 starts exactly at the end
+    (12, 31, ['1', '2', '3']),
+    (100, None, []),
+])
+def test_select_transcript_window(start, end, expected):
+    assert [s['text'] for s in select_transcript_window(SEGMENTS, start, end)] == expected
+
+
+def test_window_variant():
+    assert window_variant('text') == 'text'
+    assert window_variant('text', 10, None) == 'text_10.000-end'
+    assert window_variant('text', None, 90.5) == 'text_0.000-90.500'
+
+
+def test_window_variants_differ_below_six_significant_digits():
+    assert window_variant('text', 1234.567, 2000) != window_variant('text', 1234.571, 2000)
@@ -0,0 +1,84 @@
+"""translate_lines_batched: batching, the translation cache and line count mismatches."""
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from translation_cache import TranslationCache
+
+
+class FakeMurf:
+    """Murf client whose text.translate answers with respond(texts), recording each call."""
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda texts: [text.upper() for text in texts])
+        self.calls = []
+        self.text = self
+
+    def translate(self, target_language, texts):
+        self.calls.append(list(texts))
+        return SimpleNamespace(translations=[SimpleNamespace(translated_text=text) for text in self.respond(texts)])
+
+
+@pytest.fixture(autouse=True)
+def translation_cache(tmp_path, monkeypatch):
+    cache = TranslationCache(str(tmp_path / 'translations.sqlite3'))
+    monkeypatch.setattr(main, 'translation_cache', cache)
+    return cache
+
+
+def translate(lines, client):
+    return main.translate_lines_batched(lines, 'fr-FR', provider='murf', client=client)
+
+
+def test_lines_are_translated_in_one_batch_and_in_order():
+    client = FakeMurf()
+    assert translate(['one', '', 'two ', 'three'], client) == ['ONE', '', 'TWO', 'THREE']
+    assert client.calls == [['one', 'two', 'three']]
+
+
+def test_batches_respect_the_item_limit():
+    client = FakeMurf()
+    lines = [f'line {i}' for i in range(2 * main.MURF_TRANSLATE_BATCH_TEXTS + 1)]
+    assert translate(lines, client) == [line.upper() for line in lines]
+    assert [len(call) for call in client.calls] == [main.MURF_TRANSLATE_BATCH_TEXTS] * 2 + [1]
+
+
+def test_count_mismatch_falls_back_to_one_line_at_a_time():
+    def merge_batches(texts):
+        # The provider merged the lines of a batch into one
+        return [' '.join(texts).upper()] if len(texts) > 1 else [texts[0].upper()]
+
+    client = FakeMurf(merge_batches)
+    assert translate(['one', 'two', 'three'], client) == ['ONE', 'TWO', 'THREE']
+    assert client.calls == [['one', 'two', 'three'], ['one'], ['two'], ['three']]
+
+
+def test_line_without_an_answer_in_the_fallback_keeps_the_source():
+    def respond(texts):
+        if len(texts) > 1:
+            return [texts[0].upper()]  # lines went missing
+        return [] if texts[0] == 'two' else [texts[0].upper()]
+
+    assert translate(['one', 'two'], FakeMurf(respond)) == ['ONE', 'two']
+
+
+def test_cached_lines_are_not_sent_again():
+    first = FakeMurf()
+    translate(['one', 'two'], first)
+    second = FakeMurf()
+    assert translate(['two', 'three', 'one'], second) == ['TWO', 'THREE', 'ONE']
+    assert second.calls == [['three']]
+
+
+def test_empty_translation_keeps_the_source_uncached():
+    client = FakeMurf(lambda texts: ['' if text == 'two' else text.upper() for text in texts])
+    assert translate(['one', 'two'], client) == ['ONE', 'two']
+    retry = FakeMurf()
+    assert translate(['one', 'two'], retry) == ['ONE', 'TWO']
+    assert retry.calls == [['two']]
+
+
+def test_unknown_provider():
+    with pytest.raises(ValueError):
+        main.translate_lines_batched(['one'], 'fr-FR', provider='deepl')
@@ -0,0 +1,93 @@
+"""TTSCache: hits and misses, LRU eviction and entries evicted during a fetch."""
+import os
+
+import pytest
+
+import tts_cache
+from tts_cache import TTSCache, cache_key
+
+
+@pytest.fixture
+def audio(tmp_path):
+    """Write a source file of the given size and return its path."""
+    def audio(name, size=100):
+        path = tmp_path / name
+        path.write_bytes((name.encode() * size)[:size])
+        return str(path)
+    return audio
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(str(tmp_path / 'cache'), max_bytes=250)
+
+
+def cached(cache, text, output_path):
+    return cache.fetch(text, 'voice', 'mp3', output_path)
+
+
+def test_store_then_fetch(cache, audio, tmp_path):
+    output = str(tmp_path / 'out.mp3')
+    assert not cached(cache, 'Hello.', output)
+    cache.store('Hello.', 'voice', 'mp3', audio('a'))
+    assert cached(cache, 'Hello.', output)
+    assert open(output, 'rb').read() == open(audio('a'), 'rb').read()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_ignores_whitespace_but_not_voice_or_format():
+    assert cache_key(' Hello\n  world ', 'v', 'MP3') == cache_key('Hello world', 'v', 'mp3')
+    assert cache_key('Hello world', 'v', 'mp3') != cache_key('Hello world', 'w', 'mp3')
+    assert cache_key('Hello world', 'v', 'mp3') != cache_key('Hello world', 'v', 'wav')
+
+
+def test_least_recently_used_entry_is_evicted(cache, audio, tmp_path):
+    output = str(tmp_path / 'out.mp3')
+    cache.store('one', 'voice', 'mp3', audio('1'))
+    cache.store('two', 'voice', 'mp3', audio('2'))
+    assert cached(cache, 'one', output)  # 'two' is now the oldest use
+    cache.store('three', 'voice', 'mp3', audio('3'))
+    assert [cached(cache, text, output) for text in ('one', 'two', 'three')] == [True, False, True]
+    assert len(os.listdir(cache.directory)) == 2
+
+
+def test_empty_and_oversized_files_are_not_stored(cache, audio, tmp_path):
+    output = str(tmp_path / 'out.mp3')
+    cache.store('empty', 'voice', 'mp3', audio('e', size=0))
+    cache.store('huge', 'voice', 'mp3', audio('h', size=251))
+    assert not cached(cache, 'empty', output)
+    assert not cached(cache, 'huge', output)
+    assert os.listdir(cache.directory) == []
+
+
+def test_entries_survive_a_restart_in_lru_order(cache, audio, tmp_path):
+    cache.store('one', 'voice', 'mp3', audio('1'))
+    cache.store('two', 'voice', 'mp3', audio('2'))
+    for name in os.listdir(cache.directory):
+        # mtime records recency; make 'one' clearly the older entry
+        stamp = 1000 if name.startswith(cache_key('one', 'voice', 'mp3')) else 2000
+        os.utime(os.path.join(cache.directory, name), (stamp, stamp))
+
+    reloaded = TTSCache(cache.directory, max_bytes=250)
+    reloaded.store('three', 'voice', 'mp3', audio('3'))
+    output = str(tmp_path / 'out.mp3')
+    assert [cached(reloaded, text, output) for text in ('one', 'two', 'three')] == [False, True, True]
+
+
+def test_entry_evicted_during_the_copy_is_a_miss(cache, audio, tmp_path, monkeypatch):
+    cache.store('one', 'voice', 'mp3', audio('1'))
+
+    def evicted_meanwhile(source, destination):
+        raise FileNotFoundError(source)
+
+    monkeypatch.setattr(tts_cache.shutil, 'copyfile', evicted_meanwhile)
+    assert not cached(cache, 'one', str(tmp_path / 'out.mp3'))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_entry_deleted_behind_the_cache_is_a_miss(cache, audio, tmp_path):
+    cache.store('one', 'voice', 'mp3', audio('1'))
+    for name in os.listdir(cache.directory):
+        os.remove(os.path.join(cache.directory, name))
+    assert not cached(cache, 'one', str(tmp_path / 'out.mp3'))
+    assert (cache.hits, cache.misses) == (0, 1)